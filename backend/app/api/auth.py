@@ -3,29 +3,51 @@ from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 import hashlib
+import time
 
 from app.db.database import get_db
 from app.models.models import User
+from app.core.cache import TTLCache
+from app.core.hashing import HashingOverloadedError, get_password_hasher
 from app.core.config import settings
+from app.core.metrics import register_cache
 from app.schemas.auth import UserCreate, UserResponse, Token
 
 router = APIRouter()
 
-# Use a simpler hashing for now to avoid bcrypt issues
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
+# Decoded JWT claims by token string, and user column values by user id
+_claims_cache = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CLAIMS_CACHE_TTL)
+_user_cache = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_USER_CACHE_TTL)
+register_cache("auth_claims", _claims_cache)
+register_cache("auth_users", _user_cache)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+
+def _hashing_unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many authentication requests, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    try:
+        return await get_password_hasher().verify(plain_password, hashed_password)
+    except HashingOverloadedError:
+        raise _hashing_unavailable()
 
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+async def get_password_hash(password: str) -> str:
+    try:
+        return await get_password_hasher().hash(password)
+    except HashingOverloadedError:
+        raise _hashing_unavailable()
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -39,6 +61,49 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
+def decode_token(token: str) -> dict:
+    """Decode and verify a JWT, caching the claims until the token expires"""
+    payload = _claims_cache.get(token)
+    if payload is None:
+        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        ttl = settings.AUTH_CLAIMS_CACHE_TTL
+        if "exp" in payload:
+            ttl = min(ttl, payload["exp"] - time.time())
+        if ttl > 0:
+            _claims_cache.set(token, payload, ttl=ttl)
+    return payload
+
+
+def invalidate_user(user_id) -> None:
+    """Drop a cached user record so the next request reloads it"""
+    _user_cache.invalidate(str(user_id))
+
+
+def _snapshot(user: User) -> dict:
+    """Column values of a user, safe to share between sessions"""
+    return {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _mark_user_changed(mapper, connection, target: User) -> None:
+    # Other requests still read the old row until commit, so invalidate then
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_user_ids", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session) -> None:
+    for user_id in session.info.pop("changed_user_ids", ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session: Session) -> None:
+    session.info.pop("changed_user_ids", None)
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
@@ -50,19 +115,28 @@ async def get_current_user(
     )
     
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        payload = decode_token(token)
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
     
+    cached = _user_cache.get(user_id)
+    if cached is not None:
+        # Attach a fresh instance to this session without querying the database
+        user = User(**cached)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+    
     query = select(User).where(User.id == user_id)
     result = await db.execute(query)
     user = result.scalar_one_or_none()
     
     if user is None:
         raise credentials_exception
+    
+    _user_cache.set(user_id, _snapshot(user))
     return user
 
 
@@ -86,7 +160,7 @@ async def register(
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_create.password)
+    hashed_password = await get_password_hash(user_create.password)
     db_user = User(
         email=user_create.email,
         username=user_create.username,
@@ -113,7 +187,7 @@ async def login(
     result = await db.execute(query)
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -1,37 +1,80 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional, Tuple
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, delete, and_, or_
+from sqlalchemy.orm import defer
+import base64
+import json
+import orjson
 import uuid
 
 from app.db.database import get_db
-from app.models.models import Flow, User
+from app.models.models import Flow, FlowVersion, User
 from app.api.auth import get_current_user
 from app.flows.executor import FlowExecutor
-from app.schemas.flow import FlowCreate, FlowUpdate, FlowResponse, FlowExecuteRequest
+from app.flows.autosave import VersionConflictError, get_autosave_buffer
+from app.flows.history import record_version, load_version, list_versions, forget_flow
+from app.flows.jsonpatch import JsonPatchError
+from app.flows.plan import PlanError
+from app.schemas.flow import (
+    FlowCreate, FlowUpdate, FlowResponse, FlowExecuteRequest, FlowPage, FlowPatchRequest, FlowPatchResponse,
+    FlowVersionInfo, FlowVersionResponse
+)
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[FlowResponse])
+def _encode_cursor(updated_at: datetime, flow_id: uuid.UUID) -> str:
+    raw = json.dumps([updated_at.isoformat(), str(flow_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        updated_at, flow_id = json.loads(raw)
+        return datetime.fromisoformat(updated_at), uuid.UUID(flow_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+@router.get("/", response_model=FlowPage)
 async def list_flows(
     project_id: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """List all flows for the current user"""
-    query = select(Flow).where(Flow.user_id == current_user.id)
+    """List the current user's flows, most recently updated first"""
+    # The graph JSON is not part of the summary, so it is never loaded
+    query = select(Flow).options(defer(Flow.data)).where(Flow.user_id == current_user.id)
     
     if project_id:
         query = query.where(Flow.project_id == uuid.UUID(project_id))
     
-    query = query.offset(skip).limit(limit)
+    # Keyset pagination: continue strictly after the last row of the previous page
+    if cursor:
+        updated_at, flow_id = _decode_cursor(cursor)
+        query = query.where(or_(
+            Flow.updated_at < updated_at,
+            and_(Flow.updated_at == updated_at, Flow.id < flow_id)
+        ))
+    
+    query = query.order_by(Flow.updated_at.desc(), Flow.id.desc()).limit(limit + 1)
     result = await db.execute(query)
     flows = result.scalars().all()
     
-    return flows
+    next_cursor = None
+    if len(flows) > limit:
+        flows = flows[:limit]
+        next_cursor = _encode_cursor(flows[-1].updated_at, flows[-1].id)
+    
+    return {"items": flows, "next_cursor": next_cursor}
 
 
 @router.post("/", response_model=FlowResponse)
@@ -50,20 +93,37 @@ async def create_flow(
     )
     
     db.add(db_flow)
+    await db.flush()
+    await record_version(db, db_flow.id, db_flow.version, db_flow.data)
     await db.commit()
     await db.refresh(db_flow)
     
     return db_flow
 
 
+def flow_etag(flow_id: uuid.UUID, version: int) -> str:
+    """Weak validator: version changes on every save, and compression alters the bytes"""
+    return f'W/"{flow_id}:{version}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    # Weak comparison: W/"x" and "x" match
+    return "*" in candidates or etag in candidates or etag[2:] in candidates
+
+
 @router.get("/{flow_id}", response_model=FlowResponse)
 async def get_flow(
     flow_id: str,
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Get a specific flow"""
-    query = select(Flow).where(
+    # Load metadata first; the graph is only fetched if the client's copy is stale
+    query = select(Flow).options(defer(Flow.data)).where(
         Flow.id == uuid.UUID(flow_id),
         Flow.user_id == current_user.id
     )
@@ -76,7 +136,36 @@ async def get_flow(
             detail="Flow not found"
         )
     
-    return flow
+    # Unsaved autosave patches are newer than the row
+    buffer = get_autosave_buffer()
+    pending = buffer.pending(flow.id)
+    version = pending.version if pending else flow.version
+    
+    headers = {"ETag": flow_etag(flow.id, version), "Cache-Control": "private, no-cache"}
+    if _etag_matches(if_none_match, headers["ETag"]):
+        # After a dropped autosave, a matching ETag may name the client's lost edits
+        if buffer.take_conflict(flow.id) is None:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    if pending:
+        data = pending.data
+    else:
+        await db.refresh(flow, ["data"])
+        data = flow.data
+    
+    # orjson encodes UUIDs and datetimes natively, so the graph skips pydantic
+    document = {
+        "id": flow.id,
+        "name": flow.name,
+        "description": flow.description,
+        "data": data,
+        "user_id": flow.user_id,
+        "project_id": flow.project_id,
+        "version": version,
+        "created_at": flow.created_at,
+        "updated_at": flow.updated_at,
+    }
+    return Response(orjson.dumps(document), media_type="application/json", headers=headers)
 
 
 @router.put("/{flow_id}", response_model=FlowResponse)
@@ -100,6 +189,15 @@ async def update_flow(
             detail="Flow not found"
         )
     
+    # A full save supersedes buffered patches; write them first so versions line up
+    buffer = get_autosave_buffer()
+    if buffer.pending(flow.id):
+        await buffer.flush(flow.id)
+        await db.refresh(flow)  # The flush wrote through its own session
+    buffer.take_conflict(flow.id)  # A full save replaces any edits a dropped autosave lost
+    
+    base_version, base_data = flow.version, flow.data
+    
     # Update fields
     if flow_update.name is not None:
         flow.name = flow_update.name
@@ -109,6 +207,7 @@ async def update_flow(
         flow.data = flow_update.data
     
     flow.version += 1
+    await record_version(db, flow.id, flow.version, flow.data, base_version, base_data)
     
     await db.commit()
     await db.refresh(flow)
@@ -136,12 +235,113 @@ async def delete_flow(
             detail="Flow not found"
         )
     
+    get_autosave_buffer().discard(flow.id)
+    await db.execute(delete(FlowVersion).where(FlowVersion.flow_id == flow.id))
     await db.delete(flow)
     await db.commit()
+    forget_flow(flow.id)
     
     return {"message": "Flow deleted successfully"}
 
 
+@router.patch("/{flow_id}", response_model=FlowPatchResponse)
+async def patch_flow(
+    flow_id: str,
+    patch: FlowPatchRequest,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Apply JSON Patch operations to a flow's graph; saves are coalesced"""
+    buffer = get_autosave_buffer()
+    flow_uuid = uuid.UUID(flow_id)
+    
+    # A flow with buffered patches is patched in memory without touching the database
+    flow = None
+    pending = buffer.pending(flow_uuid)
+    if pending is None or pending.user_id != current_user.id:
+        query = select(Flow).where(
+            Flow.id == flow_uuid,
+            Flow.user_id == current_user.id
+        )
+        result = await db.execute(query)
+        flow = result.scalar_one_or_none()
+        
+        if not flow:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Flow not found"
+            )
+    
+    operations = [op.model_dump(by_alias=True, exclude_unset=True) for op in patch.operations]
+    try:
+        entry = buffer.apply(flow_uuid, patch.base_version, operations, flow)
+    except VersionConflictError as e:
+        detail = {"message": "Flow was modified since base_version", "current_version": e.current_version}
+        if e.dropped_version is not None:
+            detail["message"] = "Unsaved changes were lost: flow was modified by another save"
+            detail["dropped_version"] = e.dropped_version
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=detail
+        )
+    except JsonPatchError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    
+    response.headers["ETag"] = flow_etag(flow_uuid, entry.version)
+    return {"id": flow_uuid, "version": entry.version, "saved": False}
+
+
+async def _get_user_flow_id(db: AsyncSession, flow_id: str, user: User) -> uuid.UUID:
+    query = select(Flow.id).where(
+        Flow.id == uuid.UUID(flow_id),
+        Flow.user_id == user.id
+    )
+    result = await db.execute(query)
+    found = result.scalar_one_or_none()
+    
+    if not found:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Flow not found"
+        )
+    return found
+
+
+@router.get("/{flow_id}/versions", response_model=List[FlowVersionInfo])
+async def get_flow_versions(
+    flow_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """List the saved versions of a flow, newest first"""
+    flow_uuid = await _get_user_flow_id(db, flow_id, current_user)
+    return await list_versions(db, flow_uuid)
+
+
+@router.get("/{flow_id}/versions/{version}", response_model=FlowVersionResponse)
+async def get_flow_version(
+    flow_id: str,
+    version: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the graph of a flow as it was at a given version"""
+    flow_uuid = await _get_user_flow_id(db, flow_id, current_user)
+    data = await load_version(db, flow_uuid, version)
+    
+    if data is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Version {version} not found"
+        )
+    
+    return {"id": flow_uuid, "version": version, "data": data}
+
+
 @router.post("/{flow_id}/run")
 async def run_flow(
     flow_id: str,
@@ -164,24 +364,49 @@ async def run_flow(
             detail="Flow not found"
         )
     
+    if request.version is not None:
+        # Pinned runs replay the graph exactly as saved at that version
+        flow_data = await load_version(db, flow.id, request.version)
+        if flow_data is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Version {request.version} not found"
+            )
+    else:
+        pending = get_autosave_buffer().pending(flow.id)
+        flow_data = pending.data if pending else flow.data
+    
     # Create executor
+    # Server-owned keys come last so the client cannot override them (chat
+    # memory is scoped by user_id)
     context = {
+        **request.context,
         "user_id": str(current_user.id),
         "flow_id": flow_id,
-        **request.context
+        "project_id": str(flow.project_id) if flow.project_id else None
     }
     
-    executor = FlowExecutor(flow.data, context)
+    executor = FlowExecutor(
+        flow_data, context, db=db, user_id=current_user.id, trace=request.trace, outputs=request.outputs
+    )
     
     try:
         # Execute flow
         results = await executor.execute()
         
-        return {
+        response = {
             "execution_id": executor.execution_id,
             "status": executor.status,
             "results": results
         }
+        if executor.trace:
+            response["trace"] = executor.trace.export(request.trace_format)
+        return response
+    except PlanError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -2,19 +2,23 @@
 API endpoints for managing variables
 """
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, select, delete, or_
+from pydantic import BaseModel, Field
 import uuid
 
 from app.db.database import get_db
 from app.models.models import Variable, User
-from app.api.deps import get_current_user
+from app.api.auth import get_current_user
 from app.core.security import encrypt_value, decrypt_value
+from app.flows.variables import invalidate_variables
 
 router = APIRouter()
 
+MAX_BULK_VARIABLES = 1000
+
 
 class VariableCreate(BaseModel):
     name: str
@@ -23,7 +27,7 @@ class VariableCreate(BaseModel):
     is_encrypted: bool = False
     description: Optional[str] = None
     scope: str = "global"  # global, project, user
-    project_id: Optional[str] = None
+    project_id: Optional[uuid.UUID] = None
 
 
 class VariableUpdate(BaseModel):
@@ -34,6 +38,14 @@ class VariableUpdate(BaseModel):
     description: Optional[str] = None
 
 
+class VariableBulkUpdate(VariableUpdate):
+    id: str
+
+
+class VariableBulkDelete(BaseModel):
+    ids: List[str] = Field(..., max_length=MAX_BULK_VARIABLES)
+
+
 class VariableResponse(BaseModel):
     id: str
     name: str
@@ -43,9 +55,86 @@ class VariableResponse(BaseModel):
     scope: str
     project_id: Optional[str]
     value: Optional[str] = None  # Only included if not encrypted or explicitly requested
-
+    
     class Config:
-        orm_mode = True
+        from_attributes = True
+
+
+def _to_response(variable: Variable) -> Dict[str, Any]:
+    return {
+        "id": str(variable.id),
+        "name": variable.name,
+        "type": variable.type,
+        "is_encrypted": variable.is_encrypted,
+        "description": variable.description,
+        "scope": variable.scope,
+        "project_id": str(variable.project_id) if variable.project_id else None,
+    }
+
+
+def _new_variable(variable: VariableCreate, user_id: uuid.UUID) -> Variable:
+    return Variable(
+        id=uuid.uuid4(),
+        name=variable.name,
+        value=encrypt_value(variable.value) if variable.is_encrypted else variable.value,
+        type=variable.type,
+        is_encrypted=variable.is_encrypted,
+        description=variable.description,
+        scope=variable.scope,
+        project_id=variable.project_id,
+        user_id=user_id
+    )
+
+
+def _name_clash(variable: VariableCreate):
+    """Condition matching existing variables a new variable's name would clash with"""
+    condition = and_(Variable.scope == variable.scope, Variable.name == variable.name)
+    if variable.project_id:
+        condition = and_(condition, Variable.project_id == variable.project_id)
+    return condition
+
+
+def _apply_update(db_variable: Variable, variable: VariableUpdate) -> None:
+    if variable.name is not None:
+        db_variable.name = variable.name
+    
+    # Re-encrypt/decrypt the stored value if encryption status changed
+    was_encrypted = bool(db_variable.is_encrypted)
+    encrypted = was_encrypted if variable.is_encrypted is None else variable.is_encrypted
+    
+    if variable.value is not None:
+        db_variable.value = encrypt_value(variable.value) if encrypted else variable.value
+    elif encrypted and not was_encrypted:
+        db_variable.value = encrypt_value(db_variable.value)
+    elif was_encrypted and not encrypted:
+        db_variable.value = decrypt_value(db_variable.value)
+    db_variable.is_encrypted = encrypted
+    
+    if variable.type is not None:
+        db_variable.type = variable.type
+    
+    if variable.description is not None:
+        db_variable.description = variable.description
+
+
+def _parse_ids(ids: List[str]) -> List[uuid.UUID]:
+    try:
+        return [uuid.UUID(variable_id) for variable_id in ids]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid variable ID")
+
+
+async def _get_user_variable(db: AsyncSession, variable_id: str, user: User) -> Variable:
+    query = select(Variable).where(
+        Variable.id == _parse_ids([variable_id])[0],
+        Variable.user_id == user.id
+    )
+    result = await db.execute(query)
+    variable = result.scalar_one_or_none()
+    
+    if not variable:
+        raise HTTPException(status_code=404, detail="Variable not found")
+    return variable
 
 
 @router.get("/", response_model=List[VariableResponse])
@@ -53,32 +142,25 @@ async def list_variables(
     scope: Optional[str] = Query(None, description="Filter by scope (global, project, user)"),
     project_id: Optional[str] = Query(None, description="Filter by project ID"),
     include_values: bool = Query(False, description="Include decrypted values"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """List all variables accessible to the current user"""
-    query = db.query(Variable).filter(Variable.user_id == current_user.id)
+    query = select(Variable).where(Variable.user_id == current_user.id)
     
     if scope:
-        query = query.filter(Variable.scope == scope)
+        query = query.where(Variable.scope == scope)
     
     if project_id:
-        query = query.filter(Variable.project_id == project_id)
+        query = query.where(Variable.project_id == uuid.UUID(project_id))
     
-    variables = query.all()
+    result = await db.execute(query)
+    variables = result.scalars().all()
     
     # Convert to response format
     response = []
     for var in variables:
-        var_dict = {
-            "id": str(var.id),
-            "name": var.name,
-            "type": var.type,
-            "is_encrypted": var.is_encrypted,
-            "description": var.description,
-            "scope": var.scope,
-            "project_id": str(var.project_id) if var.project_id else None,
-        }
+        var_dict = _to_response(var)
         
         # Include value if requested and not encrypted
         if include_values and not var.is_encrypted:
@@ -91,31 +173,103 @@ async def list_variables(
     return response
 
 
+@router.post("/bulk", response_model=List[VariableResponse])
+async def bulk_create_variables(
+    variables: List[VariableCreate],
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Create many variables in a single transaction"""
+    if len(variables) > MAX_BULK_VARIABLES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_VARIABLES} variables per request")
+    if not variables:
+        return []
+    
+    keys = [(v.name, v.scope, v.project_id) for v in variables]
+    if len(set(keys)) != len(keys):
+        raise HTTPException(status_code=400, detail="Duplicate variable names in request")
+    
+    # One query for every name that could clash, by the same rule as a single create
+    query = select(Variable.name).where(
+        Variable.user_id == current_user.id,
+        or_(*(_name_clash(variable) for variable in variables))
+    )
+    result = await db.execute(query)
+    clashes = sorted(set(result.scalars().all()))
+    if clashes:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Variables with these names already exist: {', '.join(clashes)}"
+        )
+    
+    db_variables = [_new_variable(variable, current_user.id) for variable in variables]
+    db.add_all(db_variables)
+    await db.commit()
+    invalidate_variables(current_user.id)
+    
+    return [_to_response(v) for v in db_variables]
+
+
+@router.put("/bulk", response_model=List[VariableResponse])
+async def bulk_update_variables(
+    variables: List[VariableBulkUpdate],
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Update many variables in a single transaction"""
+    if len(variables) > MAX_BULK_VARIABLES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_VARIABLES} variables per request")
+    
+    ids = _parse_ids([v.id for v in variables])
+    query = select(Variable).where(
+        Variable.id.in_(ids),
+        Variable.user_id == current_user.id
+    )
+    result = await db.execute(query)
+    db_variables = {v.id: v for v in result.scalars().all()}
+    
+    missing = [str(variable_id) for variable_id in ids if variable_id not in db_variables]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Variables not found: {', '.join(missing)}")
+    
+    for variable_id, variable in zip(ids, variables):
+        _apply_update(db_variables[variable_id], variable)
+    
+    await db.commit()
+    invalidate_variables(current_user.id)
+    
+    return [_to_response(db_variables[variable_id]) for variable_id in ids]
+
+
+@router.delete("/bulk")
+async def bulk_delete_variables(
+    request: VariableBulkDelete,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Delete many variables in a single statement"""
+    query = delete(Variable).where(
+        Variable.id.in_(_parse_ids(request.ids)),
+        Variable.user_id == current_user.id
+    )
+    result = await db.execute(query)
+    await db.commit()
+    invalidate_variables(current_user.id)
+    
+    return {"message": f"Deleted {result.rowcount} variables", "deleted": result.rowcount}
+
+
 @router.get("/{variable_id}", response_model=VariableResponse)
 async def get_variable(
     variable_id: str,
     include_value: bool = Query(False, description="Include decrypted value"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific variable"""
-    variable = db.query(Variable).filter(
-        Variable.id == variable_id,
-        Variable.user_id == current_user.id
-    ).first()
-    
-    if not variable:
-        raise HTTPException(status_code=404, detail="Variable not found")
+    variable = await _get_user_variable(db, variable_id, current_user)
     
-    response = {
-        "id": str(variable.id),
-        "name": variable.name,
-        "type": variable.type,
-        "is_encrypted": variable.is_encrypted,
-        "description": variable.description,
-        "scope": variable.scope,
-        "project_id": str(variable.project_id) if variable.project_id else None,
-    }
+    response = _to_response(variable)
     
     if include_value:
         if variable.is_encrypted:
@@ -129,121 +283,59 @@ async def get_variable(
 @router.post("/", response_model=VariableResponse)
 async def create_variable(
     variable: VariableCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new variable"""
     # Check if variable with same name exists for user
-    existing = db.query(Variable).filter(
-        Variable.name == variable.name,
+    query = select(Variable.id).where(
         Variable.user_id == current_user.id,
-        Variable.scope == variable.scope
+        _name_clash(variable)
     )
-    
-    if variable.project_id:
-        existing = existing.filter(Variable.project_id == variable.project_id)
-    
-    if existing.first():
+    result = await db.execute(query.limit(1))
+    if result.first():
         raise HTTPException(status_code=400, detail="Variable with this name already exists")
     
     # Create new variable
-    db_variable = Variable(
-        id=uuid.uuid4(),
-        name=variable.name,
-        value=encrypt_value(variable.value) if variable.is_encrypted else variable.value,
-        type=variable.type,
-        is_encrypted=variable.is_encrypted,
-        description=variable.description,
-        scope=variable.scope,
-        project_id=uuid.UUID(variable.project_id) if variable.project_id else None,
-        user_id=current_user.id
-    )
+    db_variable = _new_variable(variable, current_user.id)
     
     db.add(db_variable)
-    db.commit()
-    db.refresh(db_variable)
+    await db.commit()
+    invalidate_variables(current_user.id)
     
-    return {
-        "id": str(db_variable.id),
-        "name": db_variable.name,
-        "type": db_variable.type,
-        "is_encrypted": db_variable.is_encrypted,
-        "description": db_variable.description,
-        "scope": db_variable.scope,
-        "project_id": str(db_variable.project_id) if db_variable.project_id else None,
-    }
+    return _to_response(db_variable)
 
 
 @router.put("/{variable_id}", response_model=VariableResponse)
 async def update_variable(
     variable_id: str,
     variable: VariableUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update a variable"""
-    db_variable = db.query(Variable).filter(
-        Variable.id == variable_id,
-        Variable.user_id == current_user.id
-    ).first()
+    db_variable = await _get_user_variable(db, variable_id, current_user)
     
-    if not db_variable:
-        raise HTTPException(status_code=404, detail="Variable not found")
+    _apply_update(db_variable, variable)
     
-    # Update fields
-    if variable.name is not None:
-        db_variable.name = variable.name
+    await db.commit()
+    await db.refresh(db_variable)
+    invalidate_variables(current_user.id)
     
-    if variable.value is not None:
-        if variable.is_encrypted or db_variable.is_encrypted:
-            db_variable.value = encrypt_value(variable.value)
-        else:
-            db_variable.value = variable.value
-    
-    if variable.type is not None:
-        db_variable.type = variable.type
-    
-    if variable.is_encrypted is not None:
-        db_variable.is_encrypted = variable.is_encrypted
-        # Re-encrypt/decrypt value if encryption status changed
-        if variable.is_encrypted and not db_variable.is_encrypted:
-            db_variable.value = encrypt_value(db_variable.value)
-        elif not variable.is_encrypted and db_variable.is_encrypted:
-            db_variable.value = decrypt_value(db_variable.value)
-    
-    if variable.description is not None:
-        db_variable.description = variable.description
-    
-    db.commit()
-    db.refresh(db_variable)
-    
-    return {
-        "id": str(db_variable.id),
-        "name": db_variable.name,
-        "type": db_variable.type,
-        "is_encrypted": db_variable.is_encrypted,
-        "description": db_variable.description,
-        "scope": db_variable.scope,
-        "project_id": str(db_variable.project_id) if db_variable.project_id else None,
-    }
+    return _to_response(db_variable)
 
 
 @router.delete("/{variable_id}")
 async def delete_variable(
     variable_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a variable"""
-    db_variable = db.query(Variable).filter(
-        Variable.id == variable_id,
-        Variable.user_id == current_user.id
-    ).first()
-    
-    if not db_variable:
-        raise HTTPException(status_code=404, detail="Variable not found")
+    db_variable = await _get_user_variable(db, variable_id, current_user)
     
-    db.delete(db_variable)
-    db.commit()
+    await db.delete(db_variable)
+    await db.commit()
+    invalidate_variables(current_user.id)
     
     return {"message": "Variable deleted successfully"}
@@ -3,6 +3,8 @@ from typing import Dict
 import json
 import logging
 
+from app.core import metrics
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
@@ -32,6 +34,7 @@ class ConnectionManager:
 
 
 manager = ConnectionManager()
+metrics.WEBSOCKET_CONNECTIONS.set_function(lambda: len(manager.active_connections))
 
 
 @router.websocket("/flow/{flow_id}")
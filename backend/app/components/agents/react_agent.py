@@ -1,102 +1,375 @@
-from typing import Any, Dict, List
-from app.components.base import BaseComponent, PortSchema, DataType
+from typing import Any, Dict, List, Optional, Tuple, Type
+import asyncio
+import inspect
+import re
+import time
+from app.components.base import BaseComponent, ComponentSchema, PortSchema, DataType
+from app.components.llms.openai import OpenAILLMComponent
+from app.components.pool import get_component_pool
+from app.components.tools.web_search import WebSearchComponent
+from app.core.prompt_budget import count_tokens
+
+
+REACT_PROMPT = """Answer the following task as best you can. You have access to the following tools:
+
+{tool_descriptions}
+
+Use the following format:
+
+Thought: think about what to do next
+Action: the tool to use, one of [{tool_names}]
+Action Input: the input to the tool
+Observation: the result of the tool
+
+You may give several Action/Action Input pairs in a single step when the calls
+do not depend on each other; they will be run at the same time.
+When you know the answer, respond with:
+
+Thought: I now know the final answer
+Final Answer: the final answer to the task
+
+Task: {task}
+{scratchpad}"""
+
+FINAL_ANSWER_PATTERN = re.compile(r"Final Answer\s*:\s*(.*)", re.DOTALL)
+ACTION_PATTERN = re.compile(
+    r"Action\s*\d*\s*:\s*(.+?)\s*\n\s*Action\s*\d*\s*Input\s*\d*\s*:\s*(.*?)"
+    r"(?=\n\s*(?:Thought|Action|Observation|Final Answer)\b|\Z)",
+    re.DOTALL,
+)
+
+
+# Edges carry values, not live objects, so the agent runs the model and tools
+# itself: they are chosen by component type and checked out of the shared pool.
+LLM_COMPONENTS: Dict[str, Type[BaseComponent]] = {
+    "openai_llm": OpenAILLMComponent,
+}
+TOOL_COMPONENTS: Dict[str, Type[BaseComponent]] = {
+    "web_search": WebSearchComponent,
+}
 
 
 class ReactAgentComponent(BaseComponent):
     """ReAct agent component for reasoning and acting"""
     
-    name = "react_agent"
-    display_name = "ReAct Agent"
-    description = "Agent that reasons and acts to solve tasks"
-    category = "Agents"
-    icon = "Bot"
-    version = "1.0.0"
+    build_inputs = ()  # Nothing is built; the model and tools are pooled separately
+    side_effects = True  # Tools may act on the outside world
     
-    inputs = [
-        PortSchema(
-            name="task",
-            display_name="Task",
-            type=DataType.TEXT,
-            description="Task for the agent to solve",
-            required=True
-        ),
-        PortSchema(
-            name="llm",
-            display_name="Language Model",
-            type=DataType.LANGUAGE_MODEL,
-            description="LLM to use for reasoning",
-            required=True
-        ),
-        PortSchema(
-            name="tools",
-            display_name="Tools",
-            type=DataType.TOOL,
-            description="Available tools for the agent",
-            required=False,
-            list=True
-        ),
-        PortSchema(
-            name="max_iterations",
-            display_name="Max Iterations",
-            type=DataType.NUMBER,
-            description="Maximum reasoning iterations",
-            default=5,
-            required=False
-        ),
-    ]
+    def get_schema(self) -> ComponentSchema:
+        return ComponentSchema(
+            name="react_agent",
+            display_name="ReAct Agent",
+            description="Agent that reasons and acts to solve tasks",
+            category="Agents",
+            icon="Bot",
+            inputs=[
+                PortSchema(
+                    name="task",
+                    display_name="Task",
+                    type=DataType.TEXT,
+                    description="Task for the agent to solve",
+                    required=True
+                ),
+                PortSchema(
+                    name="llm",
+                    display_name="Language Model",
+                    type=DataType.TEXT,
+                    description="LLM component to use for reasoning",
+                    default="openai_llm",
+                    options=list(LLM_COMPONENTS),
+                    required=False
+                ),
+                PortSchema(
+                    name="model",
+                    display_name="Model",
+                    type=DataType.TEXT,
+                    description="Model name passed to the LLM component",
+                    required=False
+                ),
+                PortSchema(
+                    name="temperature",
+                    display_name="Temperature",
+                    type=DataType.NUMBER,
+                    description="Sampling temperature passed to the LLM component",
+                    default=0.0,
+                    required=False,
+                    advanced=True
+                ),
+                PortSchema(
+                    name="api_key",
+                    display_name="API Key",
+                    type=DataType.TEXT,
+                    description="API key for the LLM (uses global if not provided)",
+                    required=False,
+                    advanced=True
+                ),
+                PortSchema(
+                    name="tools",
+                    display_name="Tools",
+                    type=DataType.TOOL,
+                    description="Tool components the agent may call",
+                    options=list(TOOL_COMPONENTS),
+                    required=False,
+                    multiple=True
+                ),
+                PortSchema(
+                    name="max_iterations",
+                    display_name="Max Iterations",
+                    type=DataType.NUMBER,
+                    description="Maximum reasoning iterations",
+                    default=5,
+                    required=False
+                ),
+                PortSchema(
+                    name="tool_timeout",
+                    display_name="Tool Timeout",
+                    type=DataType.NUMBER,
+                    description="Seconds to wait for a single tool call",
+                    default=30,
+                    required=False,
+                    advanced=True
+                ),
+                PortSchema(
+                    name="max_total_tokens",
+                    display_name="Max Total Tokens",
+                    type=DataType.NUMBER,
+                    description="Stop once the LLM calls have used this many tokens",
+                    default=20000,
+                    required=False,
+                    advanced=True
+                ),
+                PortSchema(
+                    name="max_execution_time",
+                    display_name="Max Execution Time",
+                    type=DataType.NUMBER,
+                    description="Wall-clock limit in seconds for the whole agent run",
+                    default=120,
+                    required=False,
+                    advanced=True
+                )
+            ],
+            outputs=[
+                PortSchema(
+                    name="result",
+                    display_name="Result",
+                    type=DataType.TEXT,
+                    description="Agent's final answer"
+                ),
+                PortSchema(
+                    name="thoughts",
+                    display_name="Thoughts",
+                    type=DataType.DATA,
+                    description="Agent's reasoning process"
+                )
+            ]
+        )
     
-    outputs = [
-        PortSchema(
-            name="result",
-            display_name="Result",
-            type=DataType.TEXT,
-            description="Agent's final answer"
-        ),
-        PortSchema(
-            name="thoughts",
-            display_name="Thoughts",
-            type=DataType.DATA,
-            description="Agent's reasoning process"
-        ),
-    ]
+    async def build(self) -> None:
+        """No build required"""
+        pass
     
-    async def build(self, **inputs: Any) -> Dict[str, Any]:
-        """Initialize the component"""
-        return inputs
-    
-    async def run(self, **inputs: Any) -> Dict[str, Any]:
-        """Run the component"""
-        task = inputs.get("task", "")
-        llm = inputs.get("llm")
-        tools = inputs.get("tools", [])
-        max_iterations = inputs.get("max_iterations", 5)
+    async def run(self) -> Dict[str, Any]:
+        """Run the ReAct loop against the selected LLM and tools"""
+        task = self.get_input("task") or ""
+        llm = self._resolve_llm(self.get_input("llm") or "openai_llm")
+        tools = self.get_input("tools") or []
+        max_iterations = int(self.get_input("max_iterations") or 5)
+        tool_timeout = float(self.get_input("tool_timeout") or 30)
+        max_total_tokens = int(self.get_input("max_total_tokens") or 20000)
+        max_execution_time = float(self.get_input("max_execution_time") or 120)
+        
+        if not isinstance(tools, list):
+            tools = [tools]
         
-        # Simple ReAct loop simulation
-        thoughts = []
+        tools_by_name = {}
+        for tool in tools:
+            tool = self._resolve_tool(tool)
+            tools_by_name[self._tool_name(tool)] = tool
+        deadline = time.monotonic() + max_execution_time
+        
+        thoughts: List[Dict[str, Any]] = []
+        scratchpad = ""
+        total_tokens = 0
+        result: Optional[str] = None
+        stop_reason = "max_iterations"
+        iterations = 0
         
         for i in range(max_iterations):
-            # Thought step
-            thought = f"Iteration {i+1}: Analyzing task '{task}'"
-            thoughts.append({"step": i+1, "thought": thought})
+            iterations = i + 1
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                stop_reason = "max_execution_time"
+                break
+            if total_tokens >= max_total_tokens:
+                stop_reason = "max_total_tokens"
+                break
             
-            # Action step (would use tools here)
-            if tools:
-                action = f"Using available tools: {len(tools)} tools"
-                thoughts.append({"step": i+1, "action": action})
+            prompt = REACT_PROMPT.format(
+                tool_descriptions=self._describe_tools(tools_by_name),
+                tool_names=", ".join(tools_by_name),
+                task=task,
+                scratchpad=scratchpad,
+            )
+            try:
+                text, used = await asyncio.wait_for(self._call_llm(llm, prompt), timeout=remaining)
+            except asyncio.TimeoutError:
+                stop_reason = "max_execution_time"
+                break
+            total_tokens += used
             
-            # Observation step
-            observation = "Gathered information from tools"
-            thoughts.append({"step": i+1, "observation": observation})
+            # The model may hallucinate its own observations; everything from the
+            # first "Observation:" on is ours to fill in.
+            text = text.split("\nObservation:")[0].strip()
+            thought = text.split("\nAction")[0].split("Final Answer")[0]
+            thoughts.append({"step": iterations, "thought": thought.replace("Thought:", "").strip()})
             
-            # Check if task is complete (simplified)
-            if i >= 2:  # Simple completion condition
+            final = FINAL_ANSWER_PATTERN.search(text)
+            actions = ACTION_PATTERN.findall(text)
+            if final and not actions:
+                result = final.group(1).strip()
+                stop_reason = "final_answer"
                 break
+            if not actions:
+                # No tool call and no final answer: treat the reply as the answer
+                result = text
+                stop_reason = "final_answer"
+                break
+            
+            observations = await self._run_actions(
+                actions,
+                tools_by_name,
+                timeout=min(tool_timeout, max(deadline - time.monotonic(), 0)),
+            )
+            
+            scratchpad += text + "\n"
+            for (tool_name, tool_input), observation in zip(actions, observations):
+                thoughts.append({
+                    "step": iterations,
+                    "action": tool_name.strip(),
+                    "action_input": tool_input.strip(),
+                    "observation": observation,
+                })
+                scratchpad += f"Observation: {observation}\n"
         
-        # Final answer
-        result = f"Based on my analysis of '{task}', here is the result after {len(thoughts)} steps of reasoning."
+        if result is None:
+            result = f"Agent stopped ({stop_reason}) before reaching a final answer."
         
         return {
             "result": result,
             "thoughts": thoughts,
-            "iterations_used": i + 1
+            "iterations_used": iterations,
+            "stop_reason": stop_reason,
+            "total_tokens": total_tokens
         }
+    
+    def _resolve_llm(self, llm: Any) -> Any:
+        """An LLM component class by type name; callables are used as they are"""
+        if isinstance(llm, str):
+            if llm not in LLM_COMPONENTS:
+                raise ValueError(f"Unknown language model component: {llm}")
+            return LLM_COMPONENTS[llm]
+        return llm
+    
+    def _resolve_tool(self, tool: Any) -> Any:
+        """A tool component class by type name; callables are used as they are"""
+        if isinstance(tool, str):
+            if tool not in TOOL_COMPONENTS:
+                raise ValueError(f"Unknown tool component: {tool}")
+            return TOOL_COMPONENTS[tool]
+        return tool
+    
+    async def _call_llm(self, llm: Any, prompt: str) -> Tuple[str, int]:
+        """Call the LLM and return (text, tokens used)"""
+        if isinstance(llm, type) and issubclass(llm, BaseComponent):
+            temperature = self.get_input("temperature")
+            inputs = {"prompt": prompt, "temperature": 0.0 if temperature is None else temperature}
+            for name in ("model", "api_key"):
+                if self.get_input(name):
+                    inputs[name] = self.get_input(name)
+            outputs = await self._execute_pooled(llm, inputs)
+        else:
+            outputs = llm(prompt)
+            if inspect.isawaitable(outputs):
+                outputs = await outputs
+        
+        if isinstance(outputs, str):
+            # No usage reported; estimate it so max_total_tokens still applies
+            return outputs, count_tokens(prompt) + count_tokens(outputs)
+        
+        text = outputs.get("response") or ""
+        usage = outputs.get("usage") or {}
+        tokens = usage.get("total_tokens") or sum(
+            usage.get(key, 0) for key in ("prompt_tokens", "completion_tokens", "input_tokens", "output_tokens")
+        )
+        return text, tokens or count_tokens(prompt) + count_tokens(text)
+    
+    async def _execute_pooled(self, component_class: Type[BaseComponent], inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a component on an instance checked out of the pool"""
+        pool = get_component_pool()
+        instance = pool.acquire(component_class, inputs, self._context)
+        try:
+            outputs = await instance.execute(inputs, self._context)
+        except BaseException:
+            pool.release(instance, reusable=False)
+            raise
+        pool.release(instance)
+        return outputs
+    
+    async def _run_actions(
+        self,
+        actions: List[Tuple[str, str]],
+        tools_by_name: Dict[str, Any],
+        timeout: float
+    ) -> List[str]:
+        """Run all tool calls of one step concurrently, each with its own timeout"""
+        async def run_one(tool_name: str, tool_input: str) -> str:
+            tool_name = tool_name.strip()
+            tool = tools_by_name.get(tool_name)
+            if tool is None:
+                return f"Unknown tool '{tool_name}'. Available tools: {', '.join(tools_by_name)}"
+            try:
+                output = await asyncio.wait_for(self._invoke_tool(tool, tool_input.strip()), timeout=timeout)
+            except asyncio.TimeoutError:
+                return f"Tool '{tool_name}' timed out after {timeout:.1f}s"
+            except Exception as e:
+                return f"Tool '{tool_name}' failed: {str(e)}"
+            return self._format_observation(output)
+        
+        return await asyncio.gather(*(run_one(name, arg) for name, arg in actions))
+    
+    async def _invoke_tool(self, tool: Any, tool_input: str) -> Any:
+        """Invoke a tool component or callable with a single text input"""
+        if isinstance(tool, type) and issubclass(tool, BaseComponent):
+            # Pooled instances keep per-run state, so parallel calls each check one out
+            inputs = tool.compiled_schema().schema.inputs
+            port = next((p.name for p in inputs if p.required), inputs[0].name)
+            return await self._execute_pooled(tool, {port: tool_input})
+        
+        output = tool(tool_input)
+        if inspect.isawaitable(output):
+            output = await output
+        return output
+    
+    def _tool_name(self, tool: Any) -> str:
+        if isinstance(tool, type) and issubclass(tool, BaseComponent):
+            return tool.compiled_schema().schema.name
+        return getattr(tool, "name", None) or tool.__name__
+    
+    def _describe_tools(self, tools_by_name: Dict[str, Any]) -> str:
+        if not tools_by_name:
+            return "(no tools available)"
+        lines = []
+        for name, tool in tools_by_name.items():
+            if isinstance(tool, type) and issubclass(tool, BaseComponent):
+                description = tool.compiled_schema().schema.description
+            else:
+                description = getattr(tool, "description", None) or (tool.__doc__ or "").strip()
+            lines.append(f"{name}: {description}")
+        return "\n".join(lines)
+    
+    def _format_observation(self, output: Any) -> str:
+        if isinstance(output, dict):
+            for key in ("summary", "result", "response", "text"):
+                if isinstance(output.get(key), str):
+                    return output[key]
+        return str(output)
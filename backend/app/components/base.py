@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, FrozenSet, Hashable, List, Optional, Tuple, Union
 from pydantic import BaseModel, Field
 from enum import Enum
+import time
 import uuid
 
 
@@ -21,6 +22,13 @@ class DataType(str, Enum):
     ANY = "Any"
 
 
+class ExecutionMode(str, Enum):
+    """Where the flow executor runs a component"""
+    ASYNC = "async"  # On the event loop; run() must not block
+    THREAD = "thread"  # Worker thread; for blocking I/O or state that must stay in this process
+    PROCESS = "process"  # Worker process; for CPU-bound work with picklable inputs and outputs
+
+
 class PortSchema(BaseModel):
     """Schema for component input/output ports"""
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -33,6 +41,19 @@ class PortSchema(BaseModel):
     default: Optional[Any] = None
     options: Optional[List[Any]] = None  # For select/dropdown inputs
     advanced: bool = False  # Hide in basic view
+    
+    class Config:
+        frozen = True  # Shared by every instance of a component class
+
+
+class ExecutionPolicy(BaseModel):
+    """Timeout, retry and hedging defaults for a component (overridable per node)"""
+    timeout: Optional[float] = None  # Seconds per attempt, None for no limit
+    max_retries: int = 0
+    backoff_base: float = 0.5  # Seconds, doubled on every retry
+    backoff_max: float = 10.0
+    idempotent: bool = False  # Safe to send the same request twice
+    hedge: bool = False  # Send a duplicate after the observed p95 latency (idempotent only)
 
 
 class ComponentSchema(BaseModel):
@@ -45,8 +66,10 @@ class ComponentSchema(BaseModel):
     version: str = "1.0.0"
     inputs: List[PortSchema] = []
     outputs: List[PortSchema] = []
+    execution: ExecutionPolicy = Field(default_factory=ExecutionPolicy)
     
     class Config:
+        frozen = True  # Shared by every instance of a component class
         json_schema_extra = {
             "example": {
                 "name": "openai_llm",
@@ -73,15 +96,72 @@ class ComponentSchema(BaseModel):
         }
 
 
+class CompiledSchema:
+    """A component class's schema plus the lookups input validation needs"""
+    __slots__ = ("schema", "input_names", "required_inputs")
+    
+    def __init__(self, schema: ComponentSchema):
+        self.schema = schema
+        self.input_names: FrozenSet[str] = frozenset(port.name for port in schema.inputs)
+        self.required_inputs: Tuple[str, ...] = tuple(port.name for port in schema.inputs if port.required)
+    
+    def check_names(self, names) -> None:
+        unknown = names - self.input_names
+        if unknown:
+            raise ValueError(f"Input '{sorted(unknown)[0]}' not found in component schema")
+    
+    def check_required(self, inputs: Dict[str, Any]) -> None:
+        for name in self.required_inputs:
+            if name not in inputs:
+                raise ValueError(f"Required input '{name}' is missing")
+
+
+def freeze_value(value: Any) -> Hashable:
+    """Hashable stand-in for an input value, for use in build keys and plan signatures"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze_value(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_value(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze_value(item) for item in value)
+    return value
+
+
+def context_variable(context: Dict[str, Any], name: str) -> Any:
+    """A user variable resolved for the run, else a top-level context key of that name"""
+    variables = context.get("variables") or {}
+    return variables[name] if name in variables else context.get(name)
+
+
 class BaseComponent(ABC):
     """Base class for all components"""
     
+    # Inputs build() depends on; instances built with equal values are reused.
+    # None means build() may read anything, so instances are never reused.
+    build_inputs: Optional[Tuple[str, ...]] = None
+    execution_mode: ExecutionMode = ExecutionMode.ASYNC
+    # Runs that change something outside the flow (writes, sends) are never
+    # merged with identical nodes of the same flow; see has_side_effects()
+    side_effects: bool = False
+    # build() creates clients tied to the event loop it runs on (async HTTP
+    # clients, ...). When False, execution_mode = "thread" builds are pooled too.
+    loop_bound_build: bool = True
+    
     def __init__(self):
-        self.schema = self.get_schema()
+        # get_schema() runs once per class; instances share the frozen result
+        compiled = type(self).__dict__.get("_compiled_schema")
+        if compiled is None:
+            compiled = CompiledSchema(self.get_schema())
+            type(self)._compiled_schema = compiled
+        self._compiled: CompiledSchema = compiled
+        self.schema = compiled.schema
         self._inputs: Dict[str, Any] = {}
         self._outputs: Dict[str, Any] = {}
         self._context: Dict[str, Any] = {}
-        
+        self._build_ns: Optional[tuple] = None  # (start, end) of the last build, for tracing
+        self._built = False
+        self.built_key: Optional[Hashable] = None  # build_key() of the current build
+    
     @abstractmethod
     def get_schema(self) -> ComponentSchema:
         """Return component schema with metadata"""
@@ -90,8 +170,7 @@ class BaseComponent(ABC):
     def set_input(self, name: str, value: Any) -> None:
         """Set input value"""
         # Validate input exists in schema
-        input_names = [port.name for port in self.schema.inputs]
-        if name not in input_names:
+        if name not in self._compiled.input_names:
             raise ValueError(f"Input '{name}' not found in component schema")
         self._inputs[name] = value
     
@@ -99,21 +178,64 @@ class BaseComponent(ABC):
         """Get input value"""
         return self._inputs.get(name)
     
+    def get_variable(self, name: str) -> Any:
+        """Get a user variable (e.g. an API key) from the execution context"""
+        return context_variable(self._context, name)
+    
     def set_context(self, context: Dict[str, Any]) -> None:
         """Set execution context (e.g., global variables, credentials)"""
         self._context = context
     
     def validate_inputs(self) -> None:
         """Validate all required inputs are present"""
-        for port in self.schema.inputs:
-            if port.required and port.name not in self._inputs:
-                raise ValueError(f"Required input '{port.name}' is missing")
+        self._compiled.check_required(self._inputs)
+    
+    @classmethod
+    def compiled_schema(cls) -> CompiledSchema:
+        """Return the class's compiled schema without keeping an instance around"""
+        compiled = cls.__dict__.get("_compiled_schema")
+        if compiled is None:
+            compiled = cls()._compiled  # First use; __init__ stores it on the class
+        return compiled
+    
+    @classmethod
+    def has_side_effects(cls, inputs: Dict[str, Any]) -> bool:
+        """Whether a run with these inputs changes something outside the flow.
+        
+        Inputs fed by edges are None here, since their values are not known yet.
+        """
+        return cls.side_effects
+    
+    @classmethod
+    def build_key(cls, inputs: Dict[str, Any], context: Dict[str, Any]) -> Optional[Hashable]:
+        """Identify what build() would create from these inputs, or None if not reusable"""
+        if cls.build_inputs is None:
+            return None
+        return tuple(freeze_value(inputs.get(name)) for name in cls.build_inputs)
     
     @abstractmethod
     async def build(self) -> None:
         """Build/initialize component (e.g., create clients, load models)"""
         pass
     
+    async def teardown(self) -> None:
+        """Release what build() created (e.g., close clients)"""
+        pass
+    
+    async def close(self) -> None:
+        """Tear down the current build, if any"""
+        if self._built:
+            self._built = False
+            self.built_key = None
+            await self.teardown()
+    
+    def reset(self) -> None:
+        """Clear per-run state, keeping what build() created"""
+        self._inputs = {}
+        self._outputs = {}
+        self._context = {}
+        self._build_ns = None
+    
     @abstractmethod
     async def run(self) -> Dict[str, Any]:
         """Execute component logic and return outputs"""
@@ -122,8 +244,8 @@ class BaseComponent(ABC):
     async def execute(self, inputs: Dict[str, Any], context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Main execution method called by the flow executor"""
         # Set inputs
-        for name, value in inputs.items():
-            self.set_input(name, value)
+        self._compiled.check_names(inputs.keys())
+        self._inputs.update(inputs)
         
         # Set context if provided
         if context:
@@ -132,8 +254,8 @@ class BaseComponent(ABC):
         # Validate inputs
         self.validate_inputs()
         
-        # Build component
-        await self.build()
+        # Build component, unless it is already built for these inputs
+        await self.ensure_built()
         
         # Run component
         outputs = await self.run()
@@ -142,6 +264,19 @@ class BaseComponent(ABC):
         self._outputs = outputs
         
         return outputs
+    
+    async def ensure_built(self) -> None:
+        """Run build() unless the current build matches the inputs that are set"""
+        key = self.build_key(self._inputs, self._context)
+        if self._built and key is not None and key == self.built_key:
+            self._build_ns = None
+            return
+        await self.close()
+        build_started = time.time_ns()
+        await self.build()
+        self._build_ns = (build_started, time.time_ns())
+        self._built = True
+        self.built_key = key
 
 
 class StreamableComponent(BaseComponent):
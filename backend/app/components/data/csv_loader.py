@@ -1,64 +1,83 @@
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, List
+import asyncio
 import csv
 import io
-from app.components.base import BaseComponent, PortSchema, DataType
+from app.components.base import BaseComponent, ComponentSchema, PortSchema, DataType, ExecutionMode
 
 
 class CSVLoaderComponent(BaseComponent):
     """CSV loader component for reading CSV data"""
     
-    name = "csv_loader"
-    display_name = "CSV Loader"
-    description = "Load data from CSV format"
-    category = "Data"
-    icon = "FileSpreadsheet"
-    version = "1.0.0"
+    build_inputs = ()
+    execution_mode = ExecutionMode.PROCESS  # CPU-bound parsing
     
-    inputs = [
-        PortSchema(
-            name="csv_data",
-            display_name="CSV Data",
-            type=DataType.TEXT,
-            description="CSV data as text",
-            required=True
-        ),
-        PortSchema(
-            name="has_header",
-            display_name="Has Header",
-            type=DataType.BOOLEAN,
-            description="First row contains column names",
-            default=True,
-            required=False
-        ),
-    ]
+    def get_schema(self) -> ComponentSchema:
+        return ComponentSchema(
+            name="csv_loader",
+            display_name="CSV Loader",
+            description="Load data from CSV format",
+            category="Data",
+            icon="FileSpreadsheet",
+            inputs=[
+                PortSchema(
+                    name="csv_data",
+                    display_name="CSV Data",
+                    type=DataType.TEXT,
+                    description="CSV data as text",
+                    required=True
+                ),
+                PortSchema(
+                    name="has_header",
+                    display_name="Has Header",
+                    type=DataType.BOOLEAN,
+                    description="First row contains column names",
+                    default=True,
+                    required=False
+                ),
+                PortSchema(
+                    name="batch_size",
+                    display_name="Batch Size",
+                    type=DataType.NUMBER,
+                    description="Rows per batch on a stream edge (0 = parse everything at once)",
+                    default=0,
+                    required=False,
+                    advanced=True
+                )
+            ],
+            outputs=[
+                PortSchema(
+                    name="data",
+                    display_name="Data",
+                    type=DataType.DATA,
+                    description="Parsed CSV data"
+                ),
+                PortSchema(
+                    name="columns",
+                    display_name="Columns",
+                    type=DataType.DATA,
+                    description="Column names"
+                )
+            ]
+        )
     
-    outputs = [
-        PortSchema(
-            name="data",
-            display_name="Data",
-            type=DataType.DATA,
-            description="Parsed CSV data"
-        ),
-        PortSchema(
-            name="columns",
-            display_name="Columns",
-            type=DataType.DATA,
-            description="Column names"
-        ),
-    ]
+    async def build(self) -> None:
+        """No build required"""
+        pass
     
-    async def build(self, **inputs: Any) -> Dict[str, Any]:
-        """Initialize the component"""
-        return inputs
-    
-    async def run(self, **inputs: Any) -> Dict[str, Any]:
+    async def run(self) -> Dict[str, Any]:
         """Run the component"""
-        csv_data = inputs.get("csv_data", "")
-        has_header = inputs.get("has_header", True)
+        csv_data = self.get_input("csv_data") or ""
+        has_header = self.get_input("has_header")
+        if has_header is None:
+            has_header = True
         
         if not csv_data:
             return {"data": [], "columns": []}
         
+        batch_size = int(self.get_input("batch_size") or 0)
+        if batch_size > 0:
+            return self._stream_rows(csv_data, has_header, batch_size)
+        
         # Parse CSV
         reader = csv.reader(io.StringIO(csv_data))
         rows = list(reader)
@@ -78,3 +97,28 @@ class CSVLoaderComponent(BaseComponent):
             "columns": columns,
             "row_count": len(data)
         }
+    
+    def _stream_rows(self, csv_data: str, has_header: bool, batch_size: int) -> Dict[str, Any]:
+        """Parse lazily, handing out batch_size rows at a time"""
+        reader = csv.reader(io.StringIO(csv_data))
+        first = next(reader, None)
+        if first is None:
+            return {"data": [], "columns": []}
+        columns = first if has_header else [f"column_{i}" for i in range(len(first))]
+        
+        async def batches() -> AsyncIterator[List[Dict[str, str]]]:
+            batch = [] if has_header else [dict(zip(columns, first))]
+            for row in reader:
+                batch.append(dict(zip(columns, row)))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+                    await asyncio.sleep(0)  # Let consumers run between batches
+            if batch:
+                yield batch
+        
+        return {
+            "data": batches(),
+            "columns": columns,
+            "row_count": None  # Unknown until the stream is consumed
+        }
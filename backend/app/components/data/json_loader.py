@@ -1,6 +1,6 @@
 from typing import Any, Dict
 import json
-from app.components.base import BaseComponent, PortSchema, DataType
+from app.components.base import BaseComponent, PortSchema, DataType, ExecutionMode
 
 
 class JSONLoaderComponent(BaseComponent):
@@ -12,6 +12,8 @@ class JSONLoaderComponent(BaseComponent):
     category = "Data"
     icon = "FileJson"
     version = "1.0.0"
+    build_inputs = ()
+    execution_mode = ExecutionMode.PROCESS  # CPU-bound parsing
     
     inputs = [
         PortSchema(
@@ -1,10 +1,15 @@
 from typing import Dict, Any, Optional
 from app.components.base import BaseComponent, ComponentSchema, PortSchema, DataType
+from app.core.config import settings
+from app.memory import get_memory_store, session_key
 
 
 class ChatInputComponent(BaseComponent):
     """Chat input component for conversational interfaces"""
     
+    build_inputs = ()  # Nothing is built
+    side_effects = True  # Appends to the session history
+    
     def get_schema(self) -> ComponentSchema:
         return ComponentSchema(
             name="chat_input",
@@ -34,6 +39,25 @@ class ChatInputComponent(BaseComponent):
                     description="Additional metadata",
                     required=False,
                     advanced=True
+                ),
+                PortSchema(
+                    name="history_token_budget",
+                    display_name="History Token Budget",
+                    type=DataType.NUMBER,
+                    description="Maximum tokens of stored history to return",
+                    default=settings.MEMORY_TOKEN_BUDGET,
+                    required=False,
+                    advanced=True
+                ),
+                PortSchema(
+                    name="history_mode",
+                    display_name="History Mode",
+                    type=DataType.TEXT,
+                    description="Return a recent window, or a window plus a summary of older turns",
+                    default="window",
+                    options=["window", "summary"],
+                    required=False,
+                    advanced=True
                 )
             ],
             outputs=[
@@ -42,6 +66,12 @@ class ChatInputComponent(BaseComponent):
                     display_name="Message",
                     type=DataType.MESSAGE,
                     description="Formatted chat message"
+                ),
+                PortSchema(
+                    name="history",
+                    display_name="History",
+                    type=DataType.MEMORY,
+                    description="Earlier messages of the session that fit the token budget"
                 )
             ]
         )
@@ -51,7 +81,7 @@ class ChatInputComponent(BaseComponent):
         pass
     
     async def run(self) -> Dict[str, Any]:
-        """Format input as chat message"""
+        """Format input as chat message and record it in the session history"""
         message_text = self.get_input("message")
         session_id = self.get_input("session_id")
         metadata = self.get_input("metadata") or {}
@@ -63,4 +93,14 @@ class ChatInputComponent(BaseComponent):
             "metadata": metadata
         }
         
-        return {"message": message}
+        history = []
+        if session_id:
+            store = get_memory_store()
+            # Sessions belong to the user running the flow; another user's session_id finds nothing
+            key = session_key(self._context.get("user_id"), session_id)
+            token_budget = self.get_input("history_token_budget") or settings.MEMORY_TOKEN_BUDGET
+            history_mode = self.get_input("history_mode") or "window"
+            history = await store.get_history(key, token_budget=token_budget, mode=history_mode)
+            await store.append(key, "user", message_text, metadata)
+        
+        return {"message": message, "history": history}
@@ -5,6 +5,8 @@ from app.components.base import BaseComponent, ComponentSchema, PortSchema, Data
 class TextInputComponent(BaseComponent):
     """Simple text input component"""
     
+    build_inputs = ()  # Nothing is built
+    
     def get_schema(self) -> ComponentSchema:
         return ComponentSchema(
             name="text_input",
@@ -1,6 +1,7 @@
-from typing import Any, Dict, List, Optional, AsyncIterator
+from typing import Any, Dict, Hashable, List, Optional, AsyncIterator
 import anthropic
-from app.components.base import StreamableComponent, PortSchema, DataType
+from app.components.base import StreamableComponent, ExecutionPolicy, PortSchema, DataType, context_variable
+from app.core.prompt_budget import fit_prompt
 
 
 class AnthropicLLMComponent(StreamableComponent):
@@ -12,6 +13,8 @@ class AnthropicLLMComponent(StreamableComponent):
     category = "Language Models"
     icon = "MessageSquare"
     version = "1.0.0"
+    build_inputs = ("api_key",)
+    execution = ExecutionPolicy(timeout=120, max_retries=2, idempotent=True)
     
     inputs = [
         PortSchema(
@@ -21,6 +24,13 @@ class AnthropicLLMComponent(StreamableComponent):
             description="Input prompt for the model",
             required=True
         ),
+        PortSchema(
+            name="context",
+            display_name="Context",
+            type=DataType.DATA,
+            description="Retrieved chunks, trimmed to fit the context window",
+            required=False
+        ),
         PortSchema(
             name="model",
             display_name="Model",
@@ -73,19 +83,34 @@ class AnthropicLLMComponent(StreamableComponent):
     
     async def build(self, **inputs: Any) -> Dict[str, Any]:
         """Initialize the Anthropic client"""
-        api_key = inputs.get("api_key") or self.context.get("ANTHROPIC_API_KEY")
+        api_key = inputs.get("api_key") or self.get_variable("ANTHROPIC_API_KEY")
         if not api_key:
             raise ValueError("Anthropic API key is required")
         
         self.client = anthropic.AsyncAnthropic(api_key=api_key)
         return inputs
     
+    @classmethod
+    def build_key(cls, inputs: Dict[str, Any], context: Dict[str, Any]) -> Optional[Hashable]:
+        # The client depends on the key build() resolves, which may come from the user's variables
+        return (inputs.get("api_key") or context_variable(context, "ANTHROPIC_API_KEY"),)
+    
+    async def teardown(self) -> None:
+        """Close the client's connection pool"""
+        await self.client.close()
+    
     async def run(self, **inputs: Any) -> Dict[str, Any]:
         """Run the component and generate text"""
-        prompt = inputs.get("prompt", "")
         model = inputs.get("model", "claude-3-opus-20240229")
         temperature = inputs.get("temperature", 0.7)
-        max_tokens = inputs.get("max_tokens", 1000)
+        budget = fit_prompt(
+            inputs.get("prompt", ""),
+            model=model,
+            chunks=inputs.get("context"),
+            max_tokens=inputs.get("max_tokens", 1000)
+        )
+        prompt = budget["prompt"]
+        max_tokens = budget["max_tokens"]
         
         try:
             response = await self.client.messages.create(
@@ -110,10 +135,16 @@ class AnthropicLLMComponent(StreamableComponent):
     
     async def stream(self, **inputs: Any) -> AsyncIterator[str]:
         """Stream the response token by token"""
-        prompt = inputs.get("prompt", "")
         model = inputs.get("model", "claude-3-opus-20240229")
         temperature = inputs.get("temperature", 0.7)
-        max_tokens = inputs.get("max_tokens", 1000)
+        budget = fit_prompt(
+            inputs.get("prompt", ""),
+            model=model,
+            chunks=inputs.get("context"),
+            max_tokens=inputs.get("max_tokens", 1000)
+        )
+        prompt = budget["prompt"]
+        max_tokens = budget["max_tokens"]
         
         try:
             async with self.client.messages.stream(
@@ -1,11 +1,14 @@
-from typing import Dict, Any, Optional, AsyncGenerator
+from typing import Dict, Any, Hashable, List, Optional, AsyncGenerator, Tuple
 import openai
-from app.components.base import StreamableComponent, ComponentSchema, PortSchema, DataType
+from app.components.base import StreamableComponent, ComponentSchema, ExecutionPolicy, PortSchema, DataType, context_variable
+from app.core.prompt_budget import fit_prompt
 
 
 class OpenAILLMComponent(StreamableComponent):
     """OpenAI language model component"""
     
+    build_inputs = ("api_key",)
+    
     def get_schema(self) -> ComponentSchema:
         return ComponentSchema(
             name="openai_llm",
@@ -47,6 +50,13 @@ class OpenAILLMComponent(StreamableComponent):
                     required=False,
                     advanced=True
                 ),
+                PortSchema(
+                    name="context",
+                    display_name="Context",
+                    type=DataType.DATA,
+                    description="Retrieved chunks, trimmed to fit the context window",
+                    required=False
+                ),
                 PortSchema(
                     name="system_message",
                     display_name="System Message",
@@ -77,29 +87,50 @@ class OpenAILLMComponent(StreamableComponent):
                     type=DataType.DATA,
                     description="Token usage information"
                 )
-            ]
+            ],
+            execution=ExecutionPolicy(timeout=120, max_retries=2, idempotent=True)
         )
     
     async def build(self) -> None:
         """Initialize OpenAI client"""
-        api_key = self.get_input("api_key") or self._context.get("OPENAI_API_KEY")
+        api_key = self.get_input("api_key") or self.get_variable("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OpenAI API key is required")
         
         self.client = openai.AsyncOpenAI(api_key=api_key)
     
+    @classmethod
+    def build_key(cls, inputs: Dict[str, Any], context: Dict[str, Any]) -> Optional[Hashable]:
+        # The client depends on the key build() resolves, which may come from the user's variables
+        return (inputs.get("api_key") or context_variable(context, "OPENAI_API_KEY"),)
+    
+    async def teardown(self) -> None:
+        """Close the client's connection pool"""
+        await self.client.close()
+    
+    def _prepare_messages(self) -> Tuple[List[Dict[str, str]], int]:
+        """Build chat messages that fit the model's context window"""
+        budget = fit_prompt(
+            self.get_input("prompt") or "",
+            model=self.get_input("model"),
+            system_message=self.get_input("system_message"),
+            chunks=self.get_input("context"),
+            max_tokens=self.get_input("max_tokens") or 1000
+        )
+        
+        messages = []
+        if budget["system_message"]:
+            messages.append({"role": "system", "content": budget["system_message"]})
+        messages.append({"role": "user", "content": budget["prompt"]})
+        return messages, budget["max_tokens"]
+    
     async def run(self) -> Dict[str, Any]:
         """Generate text using OpenAI"""
-        prompt = self.get_input("prompt")
         model = self.get_input("model")
-        temperature = self.get_input("temperature") or 0.7
-        max_tokens = self.get_input("max_tokens") or 1000
-        system_message = self.get_input("system_message")
-        
-        messages = []
-        if system_message:
-            messages.append({"role": "system", "content": system_message})
-        messages.append({"role": "user", "content": prompt})
+        temperature = self.get_input("temperature")
+        if temperature is None:
+            temperature = 0.7
+        messages, max_tokens = self._prepare_messages()
         
         response = await self.client.chat.completions.create(
             model=model,
@@ -119,16 +150,11 @@ class OpenAILLMComponent(StreamableComponent):
     
     async def stream(self) -> AsyncGenerator[str, None]:
         """Stream text generation"""
-        prompt = self.get_input("prompt")
         model = self.get_input("model")
-        temperature = self.get_input("temperature") or 0.7
-        max_tokens = self.get_input("max_tokens") or 1000
-        system_message = self.get_input("system_message")
-        
-        messages = []
-        if system_message:
-            messages.append({"role": "system", "content": system_message})
-        messages.append({"role": "user", "content": prompt})
+        temperature = self.get_input("temperature")
+        if temperature is None:
+            temperature = 0.7
+        messages, max_tokens = self._prepare_messages()
         
         stream = await self.client.chat.completions.create(
             model=model,
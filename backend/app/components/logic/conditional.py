@@ -11,6 +11,7 @@ class ConditionalComponent(BaseComponent):
     category = "Logic"
     icon = "GitBranch"
     version = "1.0.0"
+    build_inputs = ()
     
     inputs = [
         PortSchema(
@@ -11,6 +11,7 @@ class LoopComponent(BaseComponent):
     category = "Logic"
     icon = "Repeat"
     version = "1.0.0"
+    build_inputs = ()
     
     inputs = [
         PortSchema(
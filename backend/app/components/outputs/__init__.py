@@ -1,3 +1,4 @@
 from .text_output import TextOutputComponent
+from .chat_output import ChatOutputComponent
 
-__all__ = ["TextOutputComponent"]
+__all__ = ["TextOutputComponent", "ChatOutputComponent"]
@@ -0,0 +1,76 @@
+from typing import Any, Dict
+from app.components.base import BaseComponent, ComponentSchema, PortSchema, DataType
+from app.memory import get_memory_store, session_key
+
+
+class ChatOutputComponent(BaseComponent):
+    """Chat output component that records the assistant's reply in the session history"""
+    
+    build_inputs = ()  # Nothing is built
+    side_effects = True  # Appends to the session history
+    
+    def get_schema(self) -> ComponentSchema:
+        return ComponentSchema(
+            name="chat_output",
+            display_name="Chat Output",
+            description="Reply of a chat flow, stored as the assistant turn of the session",
+            category="Outputs",
+            icon="MessageSquare",
+            inputs=[
+                PortSchema(
+                    name="message",
+                    display_name="Message",
+                    type=DataType.TEXT,
+                    description="Assistant reply",
+                    required=True
+                ),
+                PortSchema(
+                    name="session_id",
+                    display_name="Session ID",
+                    type=DataType.TEXT,
+                    description="Session the reply belongs to (same as the Chat Input's)",
+                    required=False
+                ),
+                PortSchema(
+                    name="metadata",
+                    display_name="Metadata",
+                    type=DataType.DATA,
+                    description="Additional metadata",
+                    required=False,
+                    advanced=True
+                )
+            ],
+            outputs=[
+                PortSchema(
+                    name="message",
+                    display_name="Message",
+                    type=DataType.MESSAGE,
+                    description="Formatted chat message"
+                )
+            ]
+        )
+    
+    async def build(self) -> None:
+        """No build required"""
+        pass
+    
+    async def run(self) -> Dict[str, Any]:
+        """Format the reply as a chat message and record it in the session history"""
+        reply = self.get_input("message")
+        if isinstance(reply, dict):
+            reply = reply.get("content", "")  # A message from another chat component
+        session_id = self.get_input("session_id")
+        metadata = self.get_input("metadata") or {}
+        
+        if session_id:
+            key = session_key(self._context.get("user_id"), session_id)
+            await get_memory_store().append(key, "assistant", str(reply), metadata)
+        
+        return {
+            "message": {
+                "role": "assistant",
+                "content": reply,
+                "session_id": session_id,
+                "metadata": metadata
+            }
+        }
@@ -11,6 +11,7 @@ class TextOutputComponent(BaseComponent):
     category = "Outputs"
     icon = "FileText"
     version = "1.0.0"
+    build_inputs = ()
     
     inputs = [
         PortSchema(
@@ -0,0 +1,125 @@
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple, Type
+from collections import OrderedDict
+import asyncio
+import logging
+import time
+
+from app.components.base import BaseComponent
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PoolKey = Tuple[Type[BaseComponent], Hashable]
+
+
+class ComponentPool:
+    """Keeps built component instances for reuse, keyed by class and build inputs"""
+    
+    def __init__(self, max_idle: int, idle_ttl: float):
+        self.max_idle = max_idle
+        self.idle_ttl = idle_ttl
+        self._idle: Dict[PoolKey, List[BaseComponent]] = {}
+        # Every idle instance in release order, oldest first, for eviction
+        self._released: "OrderedDict[int, Tuple[PoolKey, BaseComponent, float]]" = OrderedDict()
+        self._sweep_timer: Optional[asyncio.TimerHandle] = None
+        self._teardowns: Set[asyncio.Task] = set()
+    
+    def __len__(self) -> int:
+        return len(self._released)
+    
+    def acquire(self, component_class: Type[BaseComponent], inputs: Dict[str, Any], context: Dict[str, Any]) -> BaseComponent:
+        """Check out an instance built for these inputs, or a new unbuilt one"""
+        build_key = component_class.build_key(inputs, context)
+        if build_key is not None:
+            idle = self._idle.get((component_class, build_key))
+            if idle:
+                instance = idle.pop()
+                del self._released[id(instance)]
+                metrics.COMPONENT_POOL_LOOKUPS.labels("hit").inc()
+                return instance
+        metrics.COMPONENT_POOL_LOOKUPS.labels("miss").inc()
+        return component_class()
+    
+    def release(self, instance: BaseComponent, reusable: bool = True) -> None:
+        """Return a checked-out instance; failed or unpoolable ones are torn down"""
+        build_key = instance.built_key
+        if not reusable or build_key is None or self.max_idle <= 0:
+            self._teardown(instance)
+            return
+        
+        instance.reset()
+        key = (type(instance), build_key)
+        self._idle.setdefault(key, []).append(instance)
+        self._released[id(instance)] = (key, instance, time.monotonic())
+        
+        while len(self._released) > self.max_idle:
+            self._evict_oldest()
+        if self._sweep_timer is None:
+            self._sweep_timer = asyncio.get_running_loop().call_later(self.idle_ttl, self.sweep)
+    
+    def sweep(self) -> None:
+        """Tear down instances idle for longer than idle_ttl"""
+        self._sweep_timer = None
+        deadline = time.monotonic() - self.idle_ttl
+        while self._released:
+            _, _, released_at = next(iter(self._released.values()))
+            if released_at > deadline:
+                break
+            self._evict_oldest()
+        if self._released:
+            _, _, released_at = next(iter(self._released.values()))
+            delay = max(released_at - deadline, 0.0)
+            self._sweep_timer = asyncio.get_running_loop().call_later(delay, self.sweep)
+    
+    def _evict_oldest(self) -> None:
+        _, (key, instance, _) = self._released.popitem(last=False)
+        idle = self._idle[key]
+        idle.remove(instance)
+        if not idle:
+            del self._idle[key]
+        self._teardown(instance)
+    
+    def _teardown(self, instance: BaseComponent) -> None:
+        if type(instance).teardown is BaseComponent.teardown:
+            return  # Nothing to release
+        # Runs in the background so a cancelled caller cannot interrupt it
+        task = asyncio.ensure_future(self._safe_teardown(instance))
+        self._teardowns.add(task)
+        task.add_done_callback(self._teardowns.discard)
+    
+    async def _safe_teardown(self, instance: BaseComponent) -> None:
+        try:
+            await instance.close()
+        except Exception as e:
+            logger.warning(f"Teardown of {type(instance).__name__} failed: {str(e)}")
+    
+    async def close(self) -> None:
+        """Tear down every idle instance and wait for pending teardowns"""
+        if self._sweep_timer is not None:
+            self._sweep_timer.cancel()
+            self._sweep_timer = None
+        while self._released:
+            self._evict_oldest()
+        if self._teardowns:
+            await asyncio.gather(*self._teardowns, return_exceptions=True)
+
+
+_pool: Optional[ComponentPool] = None
+
+
+def get_component_pool() -> ComponentPool:
+    """Return the process-wide component pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        _pool = ComponentPool(settings.COMPONENT_POOL_MAX_IDLE, settings.COMPONENT_POOL_IDLE_TTL)
+        metrics.COMPONENT_POOL_IDLE.set_function(lambda: len(_pool) if _pool else 0)
+    return _pool
+
+
+async def close_component_pool() -> None:
+    """Tear down pooled instances; called on shutdown"""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
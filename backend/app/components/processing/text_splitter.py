@@ -1,62 +1,104 @@
-from typing import Any, Dict, List
-from app.components.base import BaseComponent, PortSchema, DataType
+from typing import Any, AsyncIterator, Dict, List
+from app.components.base import BaseComponent, ComponentSchema, PortSchema, DataType, ExecutionMode
+from app.flows.streams import is_stream, iter_batches
 
 
 class TextSplitterComponent(BaseComponent):
     """Text splitter component for chunking text"""
     
-    name = "text_splitter"
-    display_name = "Text Splitter"
-    description = "Split text into chunks"
-    category = "Processing"
-    icon = "Split"
-    version = "1.0.0"
+    build_inputs = ()
+    execution_mode = ExecutionMode.PROCESS  # CPU-bound splitting
     
-    inputs = [
-        PortSchema(
-            name="text",
-            display_name="Text",
-            type=DataType.TEXT,
-            description="Text to split",
-            required=True
-        ),
-        PortSchema(
-            name="chunk_size",
-            display_name="Chunk Size",
-            type=DataType.NUMBER,
-            description="Size of each chunk",
-            default=1000,
-            required=False
-        ),
-        PortSchema(
-            name="chunk_overlap",
-            display_name="Chunk Overlap",
-            type=DataType.NUMBER,
-            description="Overlap between chunks",
-            default=200,
-            required=False
-        ),
-    ]
+    def get_schema(self) -> ComponentSchema:
+        return ComponentSchema(
+            name="text_splitter",
+            display_name="Text Splitter",
+            description="Split text into chunks",
+            category="Processing",
+            icon="Split",
+            inputs=[
+                PortSchema(
+                    name="text",
+                    display_name="Text",
+                    type=DataType.TEXT,
+                    description="Text to split, or a stream of records (strings or dicts)",
+                    required=True
+                ),
+                PortSchema(
+                    name="chunk_size",
+                    display_name="Chunk Size",
+                    type=DataType.NUMBER,
+                    description="Size of each chunk",
+                    default=1000,
+                    required=False
+                ),
+                PortSchema(
+                    name="chunk_overlap",
+                    display_name="Chunk Overlap",
+                    type=DataType.NUMBER,
+                    description="Overlap between chunks",
+                    default=200,
+                    required=False
+                ),
+                PortSchema(
+                    name="text_key",
+                    display_name="Text Field",
+                    type=DataType.TEXT,
+                    description="Field holding the text when records are dicts (e.g. CSV rows)",
+                    default="text",
+                    required=False,
+                    advanced=True
+                ),
+                PortSchema(
+                    name="batch_size",
+                    display_name="Batch Size",
+                    type=DataType.NUMBER,
+                    description="Chunks per batch on a stream edge (0 = split everything at once)",
+                    default=0,
+                    required=False,
+                    advanced=True
+                )
+            ],
+            outputs=[
+                PortSchema(
+                    name="chunks",
+                    display_name="Chunks",
+                    type=DataType.DATA,
+                    description="Text chunks"
+                )
+            ]
+        )
     
-    outputs = [
-        PortSchema(
-            name="chunks",
-            display_name="Chunks",
-            type=DataType.DATA,
-            description="Text chunks"
-        ),
-    ]
+    async def build(self) -> None:
+        """No build required"""
+        pass
     
-    async def build(self, **inputs: Any) -> Dict[str, Any]:
-        """Initialize the component"""
-        return inputs
-    
-    async def run(self, **inputs: Any) -> Dict[str, Any]:
+    async def run(self) -> Dict[str, Any]:
         """Run the component"""
-        text = inputs.get("text", "")
-        chunk_size = inputs.get("chunk_size", 1000)
-        chunk_overlap = inputs.get("chunk_overlap", 200)
+        text = self.get_input("text") or ""
+        chunk_size = int(self.get_input("chunk_size") or 1000)
+        chunk_overlap = self.get_input("chunk_overlap")
+        chunk_overlap = int(chunk_overlap if chunk_overlap is not None else 200)
+        text_key = self.get_input("text_key") or "text"
+        batch_size = int(self.get_input("batch_size") or 0)
+        
+        if is_stream(text) or batch_size > 0:
+            return {
+                "chunks": self._stream_chunks(text, chunk_size, chunk_overlap, text_key, batch_size),
+                "total_chunks": None  # Unknown until the stream is consumed
+            }
         
+        if isinstance(text, list):
+            chunks = self._split_records(text, chunk_size, chunk_overlap, text_key)
+        else:
+            chunks = self._split(text, chunk_size, chunk_overlap)
+        
+        return {
+            "chunks": chunks,
+            "total_chunks": len(chunks)
+        }
+    
+    def _split(self, text: str, chunk_size: int, chunk_overlap: int) -> List[Dict[str, Any]]:
         # Simple text splitting logic
         chunks = []
         start = 0
@@ -71,7 +113,43 @@ class TextSplitterComponent(BaseComponent):
             })
             start = end - chunk_overlap
         
-        return {
-            "chunks": chunks,
-            "total_chunks": len(chunks)
-        }
+        return chunks
+    
+    def _split_records(self, records: List[Any], chunk_size: int, chunk_overlap: int, text_key: str) -> List[Dict[str, Any]]:
+        """Split each record; the other fields of dict records become the chunk metadata"""
+        chunks = []
+        for record in records:
+            if isinstance(record, dict):
+                text = record.get(text_key)
+                if text is None:
+                    text = " ".join(str(value) for value in record.values())
+                metadata = {key: value for key, value in record.items() if key != text_key}
+            else:
+                text, metadata = str(record), None
+            
+            for chunk in self._split(text, chunk_size, chunk_overlap):
+                if metadata:
+                    chunk["metadata"] = metadata
+                chunks.append(chunk)
+        return chunks
+    
+    async def _stream_chunks(
+        self,
+        text: Any,
+        chunk_size: int,
+        chunk_overlap: int,
+        text_key: str,
+        batch_size: int
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Split each incoming batch of records and pass its chunks on"""
+        records = text if is_stream(text) or isinstance(text, list) else [text]
+        pending: List[Dict[str, Any]] = []
+        async for batch in iter_batches(records, batch_size):
+            pending.extend(self._split_records(batch, chunk_size, chunk_overlap, text_key))
+            # Without a batch size, each incoming batch becomes one outgoing batch
+            size = batch_size if batch_size > 0 else max(len(pending), 1)
+            while len(pending) >= size:
+                yield pending[:size]
+                pending = pending[size:]
+        if pending:
+            yield pending
@@ -12,6 +12,7 @@ class PromptTemplateComponent(BaseComponent):
     category = "Prompts"
     icon = "FileText"
     version = "1.0.0"
+    build_inputs = ()
     
     inputs = [
         PortSchema(
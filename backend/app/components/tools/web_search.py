@@ -1,78 +1,90 @@
 from typing import Any, Dict, List, Optional
-import httpx
-from app.components.base import BaseComponent, PortSchema, DataType
+from app.components.base import BaseComponent, ComponentSchema, ExecutionPolicy, PortSchema, DataType
+from app.core.cache import SingleFlight, TTLCache
+from app.core.config import settings
+from app.core.http import get_http_client
+from app.core.metrics import register_cache
+
+# Shared across instances: identical queries within the TTL are served from
+# memory, and concurrent identical queries share one upstream request.
+_result_cache = TTLCache(maxsize=settings.WEB_SEARCH_CACHE_SIZE, ttl=settings.WEB_SEARCH_CACHE_TTL)
+_inflight = SingleFlight()
+register_cache("web_search", _result_cache)
 
 
 class WebSearchComponent(BaseComponent):
     """Web search tool component"""
     
-    name = "web_search"
-    display_name = "Web Search"
-    description = "Search the web for information"
-    category = "Tools"
-    icon = "Search"
-    version = "1.0.0"
-    
-    inputs = [
-        PortSchema(
-            name="query",
-            display_name="Query",
-            type=DataType.TEXT,
-            description="Search query",
-            required=True
-        ),
-        PortSchema(
-            name="num_results",
-            display_name="Number of Results",
-            type=DataType.NUMBER,
-            description="Number of results to return",
-            default=5,
-            required=False
-        ),
-        PortSchema(
-            name="search_engine",
-            display_name="Search Engine",
-            type=DataType.TEXT,
-            description="Search engine to use",
-            default="duckduckgo",
-            options=["duckduckgo", "google", "bing"],
-            required=False
-        ),
-        PortSchema(
-            name="api_key",
-            display_name="API Key",
-            type=DataType.TEXT,
-            description="API key for search engine (if required)",
-            required=False,
-            advanced=True
-        ),
-    ]
+    build_inputs = ()
     
-    outputs = [
-        PortSchema(
-            name="results",
-            display_name="Results",
-            type=DataType.DATA,
-            description="Search results"
-        ),
-        PortSchema(
-            name="summary",
-            display_name="Summary",
-            type=DataType.TEXT,
-            description="Summary of search results"
-        ),
-    ]
+    def get_schema(self) -> ComponentSchema:
+        return ComponentSchema(
+            name="web_search",
+            display_name="Web Search",
+            description="Search the web for information",
+            category="Tools",
+            icon="Search",
+            inputs=[
+                PortSchema(
+                    name="query",
+                    display_name="Query",
+                    type=DataType.TEXT,
+                    description="Search query",
+                    required=True
+                ),
+                PortSchema(
+                    name="num_results",
+                    display_name="Number of Results",
+                    type=DataType.NUMBER,
+                    description="Number of results to return",
+                    default=5,
+                    required=False
+                ),
+                PortSchema(
+                    name="search_engine",
+                    display_name="Search Engine",
+                    type=DataType.TEXT,
+                    description="Search engine to use",
+                    default="duckduckgo",
+                    options=["duckduckgo", "google", "bing"],
+                    required=False
+                ),
+                PortSchema(
+                    name="api_key",
+                    display_name="API Key",
+                    type=DataType.TEXT,
+                    description="API key for search engine (if required)",
+                    required=False,
+                    advanced=True
+                )
+            ],
+            outputs=[
+                PortSchema(
+                    name="results",
+                    display_name="Results",
+                    type=DataType.DATA,
+                    description="Search results"
+                ),
+                PortSchema(
+                    name="summary",
+                    display_name="Summary",
+                    type=DataType.TEXT,
+                    description="Summary of search results"
+                )
+            ],
+            # No hedging: a duplicate would join the in-flight request for the same query
+            execution=ExecutionPolicy(timeout=15, max_retries=2, idempotent=True)
+        )
     
-    async def build(self, **inputs: Any) -> Dict[str, Any]:
-        """Initialize the search client"""
-        self.client = httpx.AsyncClient()
-        return inputs
+    async def build(self) -> None:
+        """Attach the shared pooled HTTP client"""
+        self.client = get_http_client()
     
-    async def run(self, **inputs: Any) -> Dict[str, Any]:
+    async def run(self) -> Dict[str, Any]:
         """Execute the web search"""
-        query = inputs.get("query", "")
-        num_results = inputs.get("num_results", 5)
-        search_engine = inputs.get("search_engine", "duckduckgo")
+        query = self.get_input("query") or ""
+        num_results = self.get_input("num_results") or 5
+        search_engine = self.get_input("search_engine") or "duckduckgo"
         
         if not query:
             return {
@@ -80,31 +92,42 @@ class WebSearchComponent(BaseComponent):
                 "summary": "No query provided"
             }
         
-        try:
-            if search_engine == "duckduckgo":
-                results = await self._search_duckduckgo(query, num_results)
-            else:
-                # For other search engines, we'd need API keys
-                results = []
-                summary = f"{search_engine} search not implemented yet"
-            
-            # Create summary
-            if results:
-                summary = f"Found {len(results)} results for '{query}':\n"
-                for i, result in enumerate(results[:3], 1):
-                    summary += f"{i}. {result.get('title', 'No title')}\n"
-            else:
-                summary = f"No results found for '{query}'"
-            
-            return {
-                "results": results,
-                "summary": summary
-            }
-        except Exception as e:
+        if search_engine != "duckduckgo":
+            # For other search engines, we'd need API keys
             return {
                 "results": [],
-                "summary": f"Search error: {str(e)}"
+                "summary": f"{search_engine} search not implemented yet"
             }
+        
+        # Transport errors propagate so the execution policy can retry them
+        results = await self._cached_search(search_engine, query, num_results)
+        
+        # Create summary
+        if results:
+            summary = f"Found {len(results)} results for '{query}':\n"
+            for i, result in enumerate(results[:3], 1):
+                summary += f"{i}. {result.get('title', 'No title')}\n"
+        else:
+            summary = f"No results found for '{query}'"
+        
+        return {
+            "results": results,
+            "summary": summary
+        }
+    
+    async def _cached_search(self, search_engine: str, query: str, num_results: int) -> List[Dict[str, Any]]:
+        """Serve results from the TTL cache, de-duplicating concurrent misses"""
+        key = (search_engine, " ".join(query.lower().split()), num_results)
+        results = _result_cache.get(key)
+        if results is not None:
+            return results
+        
+        async def fetch() -> List[Dict[str, Any]]:
+            results = await self._search_duckduckgo(query, num_results)
+            _result_cache.set(key, results)
+            return results
+        
+        return await _inflight.do(key, fetch)
     
     async def _search_duckduckgo(self, query: str, num_results: int) -> List[Dict[str, Any]]:
         """Search using DuckDuckGo (no API key required)"""
@@ -119,6 +142,7 @@ class WebSearchComponent(BaseComponent):
         
         try:
             response = await self.client.get(url, params=params)
+            response.raise_for_status()
             data = response.json()
             
             results = []
@@ -1,91 +1,102 @@
 from typing import Any, Dict, List, Optional
 import chromadb
 from chromadb.utils import embedding_functions
-from app.components.base import BaseComponent, PortSchema, DataType
+from app.components.base import BaseComponent, ComponentSchema, PortSchema, DataType, ExecutionMode
+from app.flows.streams import is_stream, iter_batches
 
 
 class ChromaDBComponent(BaseComponent):
     """ChromaDB vector store component for semantic search"""
     
-    name = "chromadb"
-    display_name = "ChromaDB"
-    description = "Store and search embeddings using ChromaDB"
-    category = "Vector Stores"
-    icon = "Database"
-    version = "1.0.0"
+    build_inputs = ("collection_name", "embeddings_model")
+    execution_mode = ExecutionMode.THREAD  # Embedding blocks, and the client must stay in this process
+    side_effects = True  # Adds and deletes documents; searches only read (see has_side_effects)
+    loop_bound_build = False  # The client and embedding model are synchronous, so builds are reused
     
-    inputs = [
-        PortSchema(
-            name="operation",
-            display_name="Operation",
-            type=DataType.TEXT,
-            description="Operation to perform",
-            default="search",
-            options=["add", "search", "delete"],
-            required=True
-        ),
-        PortSchema(
-            name="collection_name",
-            display_name="Collection Name",
-            type=DataType.TEXT,
-            description="Name of the collection",
-            default="default",
-            required=True
-        ),
-        PortSchema(
-            name="documents",
-            display_name="Documents",
-            type=DataType.DATA,
-            description="Documents to add (for add operation)",
-            required=False
-        ),
-        PortSchema(
-            name="query",
-            display_name="Query",
-            type=DataType.TEXT,
-            description="Query text (for search operation)",
-            required=False
-        ),
-        PortSchema(
-            name="n_results",
-            display_name="Number of Results",
-            type=DataType.NUMBER,
-            description="Number of results to return",
-            default=5,
-            required=False
-        ),
-        PortSchema(
-            name="embeddings_model",
-            display_name="Embeddings Model",
-            type=DataType.TEXT,
-            description="Model to use for embeddings",
-            default="all-MiniLM-L6-v2",
-            required=False
-        ),
-    ]
+    def get_schema(self) -> ComponentSchema:
+        return ComponentSchema(
+            name="chromadb",
+            display_name="ChromaDB",
+            description="Store and search embeddings using ChromaDB",
+            category="Vector Stores",
+            icon="Database",
+            inputs=[
+                PortSchema(
+                    name="operation",
+                    display_name="Operation",
+                    type=DataType.TEXT,
+                    description="Operation to perform",
+                    default="search",
+                    options=["add", "search", "delete"],
+                    required=True
+                ),
+                PortSchema(
+                    name="collection_name",
+                    display_name="Collection Name",
+                    type=DataType.TEXT,
+                    description="Name of the collection",
+                    default="default",
+                    required=True
+                ),
+                PortSchema(
+                    name="documents",
+                    display_name="Documents",
+                    type=DataType.DATA,
+                    description="Documents to add (for add operation)",
+                    required=False
+                ),
+                PortSchema(
+                    name="query",
+                    display_name="Query",
+                    type=DataType.TEXT,
+                    description="Query text (for search operation)",
+                    required=False
+                ),
+                PortSchema(
+                    name="n_results",
+                    display_name="Number of Results",
+                    type=DataType.NUMBER,
+                    description="Number of results to return",
+                    default=5,
+                    required=False
+                ),
+                PortSchema(
+                    name="embeddings_model",
+                    display_name="Embeddings Model",
+                    type=DataType.TEXT,
+                    description="Model to use for embeddings",
+                    default="all-MiniLM-L6-v2",
+                    required=False
+                )
+            ],
+            outputs=[
+                PortSchema(
+                    name="results",
+                    display_name="Results",
+                    type=DataType.DATA,
+                    description="Operation results"
+                ),
+                PortSchema(
+                    name="status",
+                    display_name="Status",
+                    type=DataType.TEXT,
+                    description="Operation status"
+                )
+            ]
+        )
     
-    outputs = [
-        PortSchema(
-            name="results",
-            display_name="Results",
-            type=DataType.DATA,
-            description="Operation results"
-        ),
-        PortSchema(
-            name="status",
-            display_name="Status",
-            type=DataType.TEXT,
-            description="Operation status"
-        ),
-    ]
+    @classmethod
+    def has_side_effects(cls, inputs: Dict[str, Any]) -> bool:
+        # Identical searches can share one run; an operation set by an edge is unknown (None)
+        return inputs.get("operation", "search") != "search"
     
-    async def build(self, **inputs: Any) -> Dict[str, Any]:
+    async def build(self) -> None:
         """Initialize ChromaDB client"""
         self.client = chromadb.Client()
         
         # Get or create collection
-        collection_name = inputs.get("collection_name", "default")
-        embeddings_model = inputs.get("embeddings_model", "all-MiniLM-L6-v2")
+        collection_name = self.get_input("collection_name") or "default"
+        embeddings_model = self.get_input("embeddings_model") or "all-MiniLM-L6-v2"
         
         # Use sentence transformers for embeddings
         embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
@@ -96,59 +107,65 @@ class ChromaDBComponent(BaseComponent):
             name=collection_name,
             embedding_function=embedding_function
         )
-        
-        return inputs
     
-    async def run(self, **inputs: Any) -> Dict[str, Any]:
+    async def run(self) -> Dict[str, Any]:
         """Execute the vector store operation"""
-        operation = inputs.get("operation", "search")
+        operation = self.get_input("operation") or "search"
         
         if operation == "add":
-            return await self._add_documents(inputs)
+            return await self._add_documents()
         elif operation == "search":
-            return await self._search_documents(inputs)
+            return await self._search_documents()
         elif operation == "delete":
-            return await self._delete_documents(inputs)
+            return await self._delete_documents()
         else:
             raise ValueError(f"Unknown operation: {operation}")
     
-    async def _add_documents(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
-        """Add documents to the collection"""
-        documents = inputs.get("documents", [])
+    async def _add_documents(self) -> Dict[str, Any]:
+        """Add documents to the collection, batch by batch when they arrive as a stream"""
+        documents = self.get_input("documents") or []
         if not documents:
             return {
                 "results": [],
                 "status": "No documents provided"
             }
         
-        # Extract texts and metadata
-        if isinstance(documents, list) and all(isinstance(doc, str) for doc in documents):
-            texts = documents
-            metadatas = [{"index": i} for i in range(len(documents))]
-            ids = [f"doc_{i}" for i in range(len(documents))]
-        elif isinstance(documents, list) and all(isinstance(doc, dict) for doc in documents):
-            texts = [doc.get("text", "") for doc in documents]
-            metadatas = [doc.get("metadata", {}) for doc in documents]
-            ids = [doc.get("id", f"doc_{i}") for i, doc in enumerate(documents)]
-        else:
+        if not isinstance(documents, list) and not is_stream(documents):
             raise ValueError("Documents must be a list of strings or dicts")
         
-        # Add to collection
-        self.collection.add(
-            documents=texts,
-            metadatas=metadatas,
-            ids=ids
-        )
+        added = 0
+        async for batch in iter_batches(documents, 0):
+            # Extract texts and metadata; default ids continue across batches
+            if all(isinstance(doc, str) for doc in batch):
+                texts = batch
+                metadatas = [{"index": added + i} for i in range(len(batch))]
+                ids = [f"doc_{added + i}" for i in range(len(batch))]
+            elif all(isinstance(doc, dict) for doc in batch):
+                texts = [doc.get("text", "") for doc in batch]
+                metadatas = [doc.get("metadata", {}) for doc in batch]
+                ids = [doc.get("id", f"doc_{added + i}") for i, doc in enumerate(batch)]
+            else:
+                raise ValueError("Documents must be a list of strings or dicts")
+            
+            if not texts:
+                continue
+            # Add to collection
+            self.collection.add(
+                documents=texts,
+                metadatas=metadatas,
+                ids=ids
+            )
+            added += len(texts)
         
         return {
-            "results": {"added": len(texts)},
-            "status": f"Added {len(texts)} documents"
+            "results": {"added": added},
+            "status": f"Added {added} documents"
         }
     
-    async def _search_documents(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    async def _search_documents(self) -> Dict[str, Any]:
         """Search for similar documents"""
-        query = inputs.get("query", "")
-        n_results = inputs.get("n_results", 5)
+        query = self.get_input("query") or ""
+        n_results = self.get_input("n_results") or 5
         
         if not query:
             return {
@@ -178,10 +195,10 @@ class ChromaDBComponent(BaseComponent):
             "status": f"Found {len(formatted_results)} results"
         }
     
-    async def _delete_documents(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    async def _delete_documents(self) -> Dict[str, Any]:
         """Delete documents from the collection"""
         # For now, we'll delete the entire collection
-        collection_name = inputs.get("collection_name", "default")
+        collection_name = self.get_input("collection_name") or "default"
         self.client.delete_collection(name=collection_name)
         
         return {
@@ -0,0 +1,110 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from collections import OrderedDict
+import asyncio
+import time
+
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries expire after a time-to-live"""
+    
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0, timer: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value, or default if missing or expired"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        
+        expires_at, value = entry
+        if expires_at <= self.timer():
+            del self._data[key]
+            self.misses += 1
+            return default
+        
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entry when full"""
+        expires_at = self.timer() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+    
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry"""
+        self._data.pop(key, None)
+    
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Drop every entry whose key matches the predicate"""
+        for key in [key for key in self._data if predicate(key)]:
+            del self._data[key]
+    
+    def clear(self) -> None:
+        """Drop all entries"""
+        self._data.clear()
+    
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+    
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[0] > self.timer()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class _Call:
+    __slots__ = ("task", "waiters", "abandoned")
+    
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+        self.abandoned = False  # Cancelled for lack of callers; new callers start over
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into a single execution.
+    
+    The call runs in its own task, so a cancelled caller does not cancel it
+    for the others; it is cancelled only when every caller has gone.
+    """
+    
+    def __init__(self):
+        self._inflight: Dict[Hashable, _Call] = {}
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn for key, or wait for the call already in flight for key"""
+        call = self._inflight.get(key)
+        if call is None or call.abandoned:
+            call = self._inflight[key] = _Call(asyncio.ensure_future(fn()))
+            call.task.add_done_callback(lambda task: self._finished(key, call))
+        
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                call.abandoned = True
+                call.task.cancel()  # Nobody is left to use the result
+            raise
+        finally:
+            call.waiters -= 1
+    
+    def _finished(self, key: Hashable, call: _Call) -> None:
+        if self._inflight.get(key) is call:
+            del self._inflight[key]
+        if not call.task.cancelled():
+            call.task.exception()  # Mark it retrieved when every caller had gone
@@ -16,6 +16,18 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./langflow.db")
+    DB_ECHO: bool = False  # Log every SQL statement (independent of DEBUG)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a pooled connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 500  # asyncpg prepared statements per connection; 0 behind pgbouncer
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
     
     # Redis
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
@@ -40,13 +52,62 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "your-jwt-secret-key")
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_USER_CACHE_TTL: int = 60  # Seconds a user record is served without a DB query
+    AUTH_CLAIMS_CACHE_TTL: int = 300  # Capped by the token's own expiry
+    AUTH_CACHE_SIZE: int = 10000
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64  # Further logins get a 503 instead of queueing
     
     # File Upload
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
     
+    # Response compression (brotli when brotli-asgi is installed, else gzip)
+    RESPONSE_COMPRESSION: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # Bytes; smaller responses are sent as-is
+    COMPRESSION_LEVEL: int = 5
+    
+    # Flow autosave: JSON-Patch saves within this window become one DB write (0 = next tick)
+    FLOW_AUTOSAVE_WINDOW_MS: int = 2000
+    
+    # Flow version history
+    FLOW_HISTORY_SNAPSHOT_INTERVAL: int = 20  # Max deltas replayed to rebuild a version
+    FLOW_HISTORY_CACHE_SIZE: int = 256  # Rebuilt versions kept in memory
+    
     # Execution
     FLOW_EXECUTION_TIMEOUT: int = 300  # 5 minutes
     MAX_CONCURRENT_EXECUTIONS: int = 10
+    COMPONENT_POOL_MAX_IDLE: int = 64  # Built instances kept for reuse (0 disables pooling)
+    COMPONENT_POOL_IDLE_TTL: int = 300  # Seconds before an unused instance is torn down
+    OFFLOAD_THREAD_WORKERS: int = 8  # Threads for execution_mode = "thread" components
+    OFFLOAD_PROCESS_WORKERS: Optional[int] = None  # Processes for "process" components (None = one per CPU)
+    OFFLOAD_START_METHOD: str = "spawn"  # Forking a process with a running event loop is unsafe
+    OFFLOAD_SHM_THRESHOLD: int = 1024 * 1024  # Bytes; larger str/bytes inputs go through shared memory
+    RESULT_MEMORY_BUDGET: int = 256 * 1024 * 1024  # Bytes of node outputs held in memory per run
+    RESULT_SPILL_MIN_SIZE: int = 64 * 1024  # Smaller outputs are never spilled to disk
+    RESULT_SPILL_DIR: Optional[str] = None  # None = the system temp directory
+    STREAM_BUFFER_BATCHES: int = 8  # Batches buffered per stream edge before the producer waits
+    STREAM_BATCH_SIZE: int = 256  # Records per batch when a list is replayed onto a stream edge
+    FLOW_MERGE_DUPLICATES: bool = True  # Run identical nodes (same type, inputs and sources) once per flow
+    
+    # Variables (decrypted values are cached per user for a short time)
+    VARIABLE_CACHE_TTL: int = 30
+    VARIABLE_CACHE_SIZE: int = 1024
+    
+    # Outbound HTTP (shared connection pool)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_TIMEOUT: float = 10.0
+    
+    # Web search
+    WEB_SEARCH_CACHE_TTL: int = 300  # 5 minutes
+    WEB_SEARCH_CACHE_SIZE: int = 1024
+    
+    # Conversation memory
+    MEMORY_DB_PATH: str = os.getenv("MEMORY_DB_PATH", "./chat_memory.db")
+    MEMORY_HOT_SESSIONS: int = 1024
+    MEMORY_HOT_MESSAGES: int = 50
+    MEMORY_TOKEN_BUDGET: int = 2000
     
     class Config:
         case_sensitive = True
@@ -0,0 +1,78 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from passlib.context import CryptContext
+import asyncio
+import time
+
+from app.core.config import settings
+from app.core import metrics
+
+# Use a simpler hashing for now to avoid bcrypt issues
+pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+
+
+class HashingOverloadedError(Exception):
+    """Raised when too many hash operations are already queued"""
+    pass
+
+
+class PasswordHasher:
+    """Runs password hashing on a bounded thread pool off the event loop"""
+    
+    def __init__(self, context: CryptContext, max_workers: int, max_pending: int):
+        self.context = context
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+    
+    async def hash(self, password: str) -> str:
+        return await self._submit("hash", self.context.hash, password)
+    
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._submit("verify", self.context.verify, password, hashed_password)
+    
+    async def _submit(self, operation: str, fn: Callable[..., Any], *args: Any) -> Any:
+        # pending counts queued and running jobs; it is only touched from the
+        # event loop, so the check and increment need no lock
+        if self.pending >= self.max_pending:
+            metrics.PASSWORD_HASH_OPERATIONS.labels(operation, "rejected").inc()
+            raise HashingOverloadedError(f"{self.pending} password hash operations already pending")
+        
+        self.pending += 1
+        start = time.perf_counter()
+        status = "error"
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, fn, *args)
+            status = "ok"
+            return result
+        finally:
+            self.pending -= 1
+            metrics.PASSWORD_HASH_OPERATIONS.labels(operation, status).inc()
+            metrics.PASSWORD_HASH_DURATION.labels(operation).observe(time.perf_counter() - start)
+    
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_hasher: Optional[PasswordHasher] = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Return the process-wide password hasher, creating it on first use"""
+    global _hasher
+    if _hasher is None:
+        _hasher = PasswordHasher(
+            pwd_context,
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+        )
+        metrics.PASSWORD_HASH_PENDING.set_function(lambda: _hasher.pending if _hasher else 0)
+    return _hasher
+
+
+def close_password_hasher() -> None:
+    global _hasher
+    if _hasher is not None:
+        _hasher.shutdown()
+        _hasher = None
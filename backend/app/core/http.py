@@ -0,0 +1,46 @@
+from typing import Optional
+import httpx
+
+from app.core.config import settings
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_client: Optional[httpx.AsyncClient] = None
+_transport: Optional[httpx.AsyncBaseTransport] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide pooled HTTP client, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        )
+        _client = httpx.AsyncClient(
+            limits=limits,
+            timeout=settings.HTTP_TIMEOUT,
+            http2=HTTP2_AVAILABLE and _transport is None,
+            transport=_transport,
+        )
+    return _client
+
+
+async def set_http_transport(transport: Optional[httpx.AsyncBaseTransport]) -> None:
+    """Swap the transport used by the shared client (e.g. a stub server in tests)"""
+    global _transport
+    _transport = transport
+    await close_http_client()
+
+
+async def close_http_client() -> None:
+    """Close the shared client and its pooled connections"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,268 @@
+"""
+Lightweight Prometheus-style metrics
+"""
+
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+from bisect import bisect_left
+import math
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    # No locks: collectors are updated from the event loop thread, so recording
+    # costs a dict lookup and an addition. Values that already live elsewhere
+    # (pool sizes, cache counters) are read by callbacks at scrape time.
+    kind = ""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+    
+    def _new_child(self):
+        raise NotImplementedError
+    
+    def labels(self, *values: str):
+        """Return the child for a label combination, creating it on first use"""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[key] = self._new_child()
+        return child
+    
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+    
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _Value:
+    __slots__ = ("value",)
+    
+    def __init__(self):
+        self.value = 0.0
+    
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+    
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+    
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+    
+    def _new_child(self):
+        return _Value()
+    
+    def inc(self, amount: float = 1.0) -> None:
+        self._children[()].inc(amount)
+    
+    def set_function(self, fn: Callable[[], float], *labelvalues: str) -> None:
+        """Read the value from fn at scrape time instead of tracking it"""
+        self._functions[tuple(str(v) for v in labelvalues)] = fn
+    
+    def _samples(self) -> Iterable[str]:
+        for key, fn in self._functions.items():
+            try:
+                value = float(fn())
+            except Exception:
+                continue
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+        for key, child in self._children.items():
+            if key not in self._functions:
+                yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+    
+    def dec(self, amount: float = 1.0) -> None:
+        self._children[()].dec(amount)
+    
+    def set(self, value: float) -> None:
+        self._children[()].set(value)
+
+
+class _HistogramValue:
+    __slots__ = ("upper_bounds", "counts", "sum", "count")
+    
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+    
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+    
+    def observe(self, value: float) -> None:
+        self._children[()].observe(value)
+    
+    def _samples(self) -> Iterable[str]:
+        for key, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), child.counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {child.count}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+    
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+    
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+    
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+    
+    def render(self) -> str:
+        """Prometheus text exposition format 0.0.4"""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Flow executor
+FLOW_RUN_DURATION = REGISTRY.histogram(
+    "flow_run_duration_seconds", "Wall time of complete flow runs", ["flow_id", "status"]
+)
+NODE_DURATION = REGISTRY.histogram(
+    "flow_node_duration_seconds", "Wall time of single node executions", ["component_type", "status"]
+)
+FLOW_RUNS_IN_FLIGHT = REGISTRY.gauge("flow_runs_in_flight", "Flow runs currently executing")
+FLOW_QUEUE_DEPTH = REGISTRY.gauge("flow_executor_queue_depth", "Nodes of running flows still waiting to execute")
+FLOW_PLAN_NODES = REGISTRY.counter(
+    "flow_plan_nodes_total", "Nodes of planned flow runs, by whether they run, were pruned or were merged", ["result"]
+)
+COMPONENT_POOL_LOOKUPS = REGISTRY.counter(
+    "component_pool_lookups_total", "Component instances checked out of the pool", ["result"]
+)
+COMPONENT_POOL_IDLE = REGISTRY.gauge("component_pool_idle", "Built component instances waiting for reuse")
+COMPONENT_OFFLOADS = REGISTRY.counter(
+    "component_offloads_total", "Component runs dispatched off the event loop", ["mode"]
+)
+
+# LLM
+LLM_TOKENS = REGISTRY.counter("llm_tokens_total", "Tokens reported by LLM components", ["component_type", "kind"])
+LLM_TOKENS_PER_SECOND = REGISTRY.histogram(
+    "llm_output_tokens_per_second",
+    "Generated tokens per second of run time for LLM calls",
+    ["component_type"],
+    buckets=(1, 5, 10, 20, 40, 60, 80, 100, 150, 200, 400),
+)
+
+# Caches
+CACHE_HITS = REGISTRY.counter("cache_hits_total", "Lookups served from an in-process cache", ["cache"])
+CACHE_MISSES = REGISTRY.counter("cache_misses_total", "Lookups that missed an in-process cache", ["cache"])
+CACHE_HIT_RATIO = REGISTRY.gauge("cache_hit_ratio", "Hit ratio of an in-process cache", ["cache"])
+CACHE_SIZE = REGISTRY.gauge("cache_entries", "Entries held by an in-process cache", ["cache"])
+
+# Password hashing
+PASSWORD_HASH_OPERATIONS = REGISTRY.counter(
+    "password_hash_operations_total", "Password hash and verify calls by outcome", ["operation", "status"]
+)
+PASSWORD_HASH_DURATION = REGISTRY.histogram(
+    "password_hash_duration_seconds", "Queue plus compute time of password hash operations", ["operation"]
+)
+PASSWORD_HASH_PENDING = REGISTRY.gauge("password_hash_pending", "Password hash operations queued or running")
+
+# Database
+DB_POOL_SIZE = REGISTRY.gauge("db_pool_size", "Configured size of the DB connection pool")
+DB_POOL_CHECKED_OUT = REGISTRY.gauge("db_pool_checked_out", "DB connections currently in use")
+DB_POOL_OVERFLOW = REGISTRY.gauge("db_pool_overflow", "DB connections open beyond the pool size")
+
+# WebSocket
+WEBSOCKET_CONNECTIONS = REGISTRY.gauge("websocket_connections", "Open WebSocket connections")
+
+
+def register_cache(name: str, cache) -> None:
+    """Expose a TTLCache's counters, read at scrape time"""
+    CACHE_HITS.set_function(lambda: cache.hits, name)
+    CACHE_MISSES.set_function(lambda: cache.misses, name)
+    CACHE_HIT_RATIO.set_function(lambda: cache.hit_ratio, name)
+    CACHE_SIZE.set_function(lambda: len(cache), name)
+
+
+def register_db_pool(pool) -> None:
+    """Expose SQLAlchemy pool utilization, read at scrape time"""
+    for gauge, attr in ((DB_POOL_SIZE, "size"), (DB_POOL_CHECKED_OUT, "checkedout"), (DB_POOL_OVERFLOW, "overflow")):
+        if hasattr(pool, attr):
+            gauge.set_function(getattr(pool, attr))
+
+
+def record_usage(component_type: str, usage: Optional[Dict[str, float]], run_seconds: float) -> None:
+    """Count LLM tokens from a component's usage output"""
+    if not isinstance(usage, dict):
+        return
+    input_tokens = usage.get("prompt_tokens", usage.get("input_tokens")) or 0
+    output_tokens = usage.get("completion_tokens", usage.get("output_tokens")) or 0
+    if input_tokens:
+        LLM_TOKENS.labels(component_type, "input").inc(input_tokens)
+    if output_tokens:
+        LLM_TOKENS.labels(component_type, "output").inc(output_tokens)
+        if run_seconds > 0:
+            LLM_TOKENS_PER_SECOND.labels(component_type).observe(output_tokens / run_seconds)
@@ -0,0 +1,195 @@
+from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from functools import lru_cache
+import hashlib
+import math
+import re
+import threading
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+DEFAULT_MODEL = "gpt-4"
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Context window sizes in tokens; prefixes match dated model variants
+CONTEXT_WINDOWS = {
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4-32k": 32768,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo-16k": 16385,
+    "gpt-3.5-turbo": 16385,
+    "claude-3": 200000,
+}
+
+# Per-message framing the chat APIs add on top of the content
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+# Token counts keyed by (digest of the text, model), so cached prompts are not kept alive
+_TOKEN_CACHE_SIZE = 8192
+_token_cache: "OrderedDict[Tuple[bytes, str], int]" = OrderedDict()
+_token_cache_lock = threading.Lock()  # Thread-mode components count tokens too
+
+
+def context_window(model: Optional[str]) -> int:
+    """Return the context window size for a model"""
+    model = model or DEFAULT_MODEL
+    for prefix, size in CONTEXT_WINDOWS.items():
+        if model.startswith(prefix):
+            return size
+    return DEFAULT_CONTEXT_WINDOW
+
+
+@lru_cache(maxsize=32)
+def _encoding_for(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # Non-OpenAI models (e.g. Claude): cl100k is a close enough estimate
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model: str = DEFAULT_MODEL) -> int:
+    """Count tokens in text with the model's local tokenizer (cached)"""
+    if not text:
+        return 0
+    key = (hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest(), model)
+    with _token_cache_lock:
+        tokens = _token_cache.get(key)
+        if tokens is not None:
+            _token_cache.move_to_end(key)
+            return tokens
+    
+    encoding = _encoding_for(model)
+    if encoding is None:
+        tokens = math.ceil(len(text) / 4)
+    else:
+        tokens = len(encoding.encode(text, disallowed_special=()))
+    
+    with _token_cache_lock:
+        _token_cache[key] = tokens
+        if len(_token_cache) > _TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return tokens
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = DEFAULT_MODEL) -> str:
+    """Cut text down to at most max_tokens tokens, keeping the beginning"""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    encoding = _encoding_for(model)
+    if encoding is None:
+        return text[:max_tokens * 4]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+
+
+def chunk_text(chunk: Any) -> str:
+    """Extract the text of a retrieved chunk (string or result dict)"""
+    if isinstance(chunk, dict):
+        for key in ("document", "text", "content", "snippet"):
+            if isinstance(chunk.get(key), str):
+                return chunk[key]
+    return str(chunk)
+
+
+def rank_chunks(chunks: List[Any], query: Optional[str] = None) -> List[Any]:
+    """Order chunks best-first.
+    
+    Vector store distances/scores are used when present, otherwise chunks are
+    ranked by word overlap with the query, otherwise original order is kept.
+    """
+    if all(isinstance(c, dict) and c.get("distance") is not None for c in chunks):
+        return sorted(chunks, key=lambda c: c["distance"])
+    if all(isinstance(c, dict) and c.get("score") is not None for c in chunks):
+        return sorted(chunks, key=lambda c: c["score"], reverse=True)
+    if query:
+        query_words = set(_WORD_PATTERN.findall(query.lower()))
+        
+        def overlap(chunk: Any) -> int:
+            return len(query_words & set(_WORD_PATTERN.findall(chunk_text(chunk).lower())))
+        
+        return sorted(chunks, key=overlap, reverse=True)
+    return list(chunks)
+
+
+def fit_prompt(
+    prompt: str,
+    model: Optional[str] = None,
+    system_message: Optional[str] = None,
+    chunks: Optional[List[Any]] = None,
+    max_tokens: int = 1000,
+    query: Optional[str] = None
+) -> Dict[str, Any]:
+    """Fit a prompt and retrieved chunks into the model's context window.
+    
+    Output tokens are reserved first, up to half the window. The system
+    message and prompt are kept whole when possible; the best-ranked chunks
+    that still fit are included, either in place of a "{context}" placeholder
+    or ahead of the prompt. If the system message and prompt are too large
+    together, each is truncated to its share. The returned max_tokens is the
+    requested one, lowered when the input leaves less room than that.
+    """
+    model = model or DEFAULT_MODEL
+    window = context_window(model)
+    requested = int(max_tokens) if max_tokens else window // 4
+    available = window - min(requested, window // 2)
+    if chunks is None:
+        chunks = []
+    elif not isinstance(chunks, list):
+        chunks = [chunks]  # A single retrieved text or result, not a sequence of characters
+    
+    system_tokens = count_tokens(system_message, model) + MESSAGE_OVERHEAD_TOKENS if system_message else 0
+    prompt_tokens = count_tokens(prompt, model) + MESSAGE_OVERHEAD_TOKENS
+    
+    truncated = False
+    if system_tokens + prompt_tokens > available:
+        # The system message may use whatever the prompt leaves, but at least half
+        system_budget = max(available - prompt_tokens, available // 2)
+        if system_tokens > system_budget:
+            system_message = truncate_to_tokens(system_message, system_budget - MESSAGE_OVERHEAD_TOKENS, model)
+            system_tokens = count_tokens(system_message, model) + MESSAGE_OVERHEAD_TOKENS
+        if system_tokens + prompt_tokens > available:
+            prompt = truncate_to_tokens(prompt, available - system_tokens - MESSAGE_OVERHEAD_TOKENS, model)
+            prompt_tokens = count_tokens(prompt, model) + MESSAGE_OVERHEAD_TOKENS
+        truncated = True
+    
+    remaining = available - system_tokens - prompt_tokens
+    included: List[str] = []
+    dropped = 0
+    for chunk in rank_chunks(chunks, query or prompt):
+        text = chunk_text(chunk)
+        tokens = count_tokens(text, model) + 1  # separator
+        if tokens > remaining:
+            dropped += 1
+            continue
+        included.append(text)
+        remaining -= tokens
+    
+    if included:
+        context = "\n\n".join(included)
+        if "{context}" in prompt:
+            prompt = prompt.replace("{context}", context)
+        else:
+            prompt = f"Context:\n{context}\n\n{prompt}"
+    else:
+        prompt = prompt.replace("{context}", "")
+    
+    input_tokens = available - remaining
+    return {
+        "prompt": prompt,
+        "system_message": system_message,
+        "max_tokens": min(requested, window - input_tokens),
+        "input_tokens": input_tokens,
+        "chunks_included": len(included),
+        "chunks_dropped": dropped,
+        "truncated": truncated,
+    }
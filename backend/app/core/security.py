@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from typing import Any, Union, Optional
+from typing import Any, List, Union, Optional
 from jose import jwt
 from passlib.context import CryptContext
 from cryptography.fernet import Fernet
@@ -64,3 +64,18 @@ def decrypt_value(encrypted_value: str) -> str:
         # If decryption fails, return the original value
         # This handles cases where the value might not be encrypted
         return encrypted_value
+
+
+def decrypt_values(encrypted_values: List[str]) -> List[str]:
+    """Decrypt many values in one pass, with the same fallback as decrypt_value"""
+    decrypt = fernet.decrypt
+    decrypted = []
+    for encrypted_value in encrypted_values:
+        if not encrypted_value:
+            decrypted.append(encrypted_value)
+            continue
+        try:
+            decrypted.append(decrypt(base64.b64decode(encrypted_value)).decode())
+        except Exception:
+            decrypted.append(encrypted_value)
+    return decrypted
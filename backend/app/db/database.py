@@ -1,22 +1,80 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Union
+import logging
+from sqlalchemy import bindparam, event, select, update
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 
-# Convert sync database URL to async
-if settings.DATABASE_URL.startswith("sqlite"):
-    ASYNC_DATABASE_URL = settings.DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://")
-elif settings.DATABASE_URL.startswith("postgresql"):
-    ASYNC_DATABASE_URL = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
-else:
-    ASYNC_DATABASE_URL = settings.DATABASE_URL
-
-engine = create_async_engine(
-    ASYNC_DATABASE_URL,
-    echo=settings.DEBUG,
-    future=True
-)
+logger = logging.getLogger(__name__)
+
+
+def async_url(url: str) -> str:
+    """Convert sync database URL to async"""
+    if url.startswith("sqlite"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://")
+    elif url.startswith("postgresql"):
+        return url.replace("postgresql://", "postgresql+asyncpg://")
+    return url
+
+
+def engine_options(url: Union[str, URL]) -> Dict[str, Any]:
+    """Pool and driver settings for the database behind url"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        # Writers serialize on the file lock anyway; waiting beats failing with
+        # "database is locked"
+        return {"connect_args": {"timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000}}
+    
+    options: Dict[str, Any] = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+    return options
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Per-connection SQLite tuning: WAL lets readers run alongside one writer"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA cache_size={-int(settings.SQLITE_CACHE_SIZE_KB)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def create_engine(url: str, tuned: bool = True, echo: Optional[bool] = None) -> AsyncEngine:
+    """Create an async engine; tuned=False gives driver defaults (used by benchmarks)"""
+    url = make_url(async_url(url))
+    options = engine_options(url) if tuned else {}
+    if tuned and url.get_driver_name() == "asyncpg":
+        # SQLAlchemy keeps its own prepared statement LRU on top of asyncpg's
+        url = url.update_query_dict({"prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)})
+    engine = create_async_engine(
+        url,
+        echo=settings.DB_ECHO if echo is None else echo,
+        future=True,
+        **options
+    )
+    if tuned and engine.dialect.name == "sqlite":
+        event.listen(engine.sync_engine, "connect", apply_sqlite_pragmas)
+    return engine
+
+
+ASYNC_DATABASE_URL = async_url(settings.DATABASE_URL)
+
+engine = create_engine(settings.DATABASE_URL)
 
 AsyncSessionLocal = sessionmaker(
     engine,
@@ -27,6 +85,35 @@ AsyncSessionLocal = sessionmaker(
 Base = declarative_base()
 
 
+def upgrade_schema(connection) -> None:
+    """Bring tables made by older versions up to date (create_all only adds missing tables).
+    
+    Run with AsyncConnection.run_sync after create_all; every step is idempotent.
+    """
+    # Indexes added to existing tables
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+    
+    # updated_at used to be set only on update; the flow list pages on it. Values
+    # are bound from Python so SQLite stores them in the same text format as new
+    # rows (a copied server default would not compare correctly with cursors).
+    flows = Base.metadata.tables.get("flows")
+    if flows is not None:
+        rows = connection.execute(
+            select(flows.c.id, flows.c.created_at).where(flows.c.updated_at.is_(None))
+        ).all()
+        if rows:
+            now = datetime.now(timezone.utc)
+            connection.execute(
+                update(flows)
+                .where(flows.c.id == bindparam("flow_id"))
+                .values(updated_at=bindparam("backfill", type_=flows.c.updated_at.type)),
+                [{"flow_id": row.id, "backfill": row.created_at or now} for row in rows]
+            )
+            logger.info(f"Backfilled updated_at on {len(rows)} flows")
+
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         try:
@@ -0,0 +1,172 @@
+from typing import Any, Callable, Dict, List, Optional, Set
+from dataclasses import dataclass, field
+import asyncio
+import logging
+import uuid
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.flows.history import record_version
+from app.flows.jsonpatch import apply_patch
+from app.models.models import Flow
+
+logger = logging.getLogger(__name__)
+
+
+class VersionConflictError(Exception):
+    """Raised when a patch was made against an outdated flow version"""
+    
+    def __init__(self, current_version: int, dropped_version: Optional[int] = None):
+        super().__init__(f"Flow is at version {current_version}")
+        self.current_version = current_version
+        self.dropped_version = dropped_version  # Set when buffered patches were lost
+
+
+@dataclass
+class PendingFlow:
+    """Unsaved graph of one flow, ahead of the database by one or more patches"""
+    user_id: uuid.UUID
+    data: Dict[str, Any]
+    version: int
+    persisted_version: int
+    persisted_data: Dict[str, Any]
+    timer: Optional[asyncio.TimerHandle] = None
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class AutosaveBuffer:
+    """Coalesces rapid JSON-Patch saves of a flow into one write per time window"""
+    
+    def __init__(self, window_ms: int, session_factory: Callable = AsyncSessionLocal):
+        self.window = window_ms / 1000
+        self.session_factory = session_factory
+        self._pending: Dict[uuid.UUID, PendingFlow] = {}
+        self._flushes: Set[asyncio.Task] = set()
+        # Version reached by buffered patches that could not be written, until the client hears of it
+        self._conflicts: Dict[uuid.UUID, int] = {}
+    
+    def pending(self, flow_id: uuid.UUID) -> Optional[PendingFlow]:
+        """Buffered state of a flow, which is newer than its database row"""
+        return self._pending.get(flow_id)
+    
+    def take_conflict(self, flow_id: uuid.UUID) -> Optional[int]:
+        """Version of a dropped autosave of the flow not yet reported to the client"""
+        return self._conflicts.pop(flow_id, None)
+    
+    def apply(
+        self,
+        flow_id: uuid.UUID,
+        base_version: int,
+        operations: List[Dict[str, Any]],
+        flow: Optional[Flow] = None
+    ) -> PendingFlow:
+        """Patch the latest known graph of a flow; the loaded row is needed unless it is buffered"""
+        # No awaits in here, so check-and-set is atomic on the event loop
+        entry = self._pending.get(flow_id)
+        if entry is None and flow is None:
+            raise ValueError(f"Flow {flow_id} is not buffered and was not loaded")
+        current_version = entry.version if entry else flow.version
+        dropped_version = self.take_conflict(flow_id)
+        if dropped_version is not None:
+            # The client's base may match a version the row reached through another write
+            raise VersionConflictError(current_version, dropped_version)
+        if base_version != current_version:
+            raise VersionConflictError(current_version)
+        
+        data = apply_patch(entry.data if entry else flow.data, operations)
+        if entry is None:
+            entry = self._pending[flow_id] = PendingFlow(
+                user_id=flow.user_id,
+                data=data,
+                version=flow.version + 1,
+                persisted_version=flow.version,
+                persisted_data=flow.data,
+            )
+        else:
+            entry.data = data
+            entry.version += 1
+        
+        if entry.timer is None:
+            loop = asyncio.get_running_loop()
+            entry.timer = loop.call_later(self.window, self._schedule_flush, flow_id)
+        return entry
+    
+    def _schedule_flush(self, flow_id: uuid.UUID) -> None:
+        task = asyncio.ensure_future(self.flush(flow_id))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+    
+    async def flush(self, flow_id: uuid.UUID) -> None:
+        """Write a flow's buffered graph now, if it has one"""
+        entry = self._pending.get(flow_id)
+        if entry is None:
+            return
+        
+        async with entry.lock:
+            if entry.version == entry.persisted_version:
+                return  # Written by a flush we were waiting on
+            if entry.timer is not None:
+                entry.timer.cancel()
+                entry.timer = None
+            # Patches that arrive during the write stay buffered for the next flush
+            data, version = entry.data, entry.version
+            
+            async with self.session_factory() as db:
+                # Guard against a concurrent PUT (or another worker) having saved meanwhile
+                result = await db.execute(
+                    update(Flow)
+                    .where(Flow.id == flow_id, Flow.version == entry.persisted_version)
+                    .values(data=data, version=version)
+                )
+                if result.rowcount:
+                    await record_version(db, flow_id, version, data, entry.persisted_version, entry.persisted_data)
+                await db.commit()
+            
+            if result.rowcount == 0:
+                logger.warning(
+                    f"Dropped autosave of flow {flow_id} (v{entry.version}): "
+                    f"row is no longer at version {entry.persisted_version}"
+                )
+                self.discard(flow_id)
+                self._conflicts[flow_id] = entry.version
+                return
+            
+            entry.persisted_version, entry.persisted_data = version, data
+            if entry.version == version and self._pending.get(flow_id) is entry:
+                del self._pending[flow_id]
+    
+    def discard(self, flow_id: uuid.UUID) -> None:
+        """Forget a flow's buffered graph without writing it"""
+        self._conflicts.pop(flow_id, None)
+        entry = self._pending.pop(flow_id, None)
+        if entry is not None and entry.timer is not None:
+            entry.timer.cancel()
+    
+    async def flush_all(self) -> None:
+        for flow_id in list(self._pending):
+            try:
+                await self.flush(flow_id)
+            except Exception as e:
+                logger.error(f"Failed to flush autosave of flow {flow_id}: {str(e)}")
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+
+_buffer: Optional[AutosaveBuffer] = None
+
+
+def get_autosave_buffer() -> AutosaveBuffer:
+    """Return the process-wide autosave buffer, creating it on first use"""
+    global _buffer
+    if _buffer is None:
+        _buffer = AutosaveBuffer(settings.FLOW_AUTOSAVE_WINDOW_MS)
+    return _buffer
+
+
+async def close_autosave_buffer() -> None:
+    """Write out everything still buffered; called on shutdown"""
+    global _buffer
+    if _buffer is not None:
+        await _buffer.flush_all()
+        _buffer = None
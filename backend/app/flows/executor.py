@@ -1,15 +1,24 @@
-from typing import Dict, List, Any, Optional, Set, AsyncGenerator
+from typing import Dict, List, Any, Optional, Set, AsyncGenerator, Type
 from collections import defaultdict, deque
 import asyncio
+import time
 import uuid
 from datetime import datetime
 import logging
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.components.base import BaseComponent, StreamableComponent
+from app.components.base import BaseComponent, ExecutionMode, StreamableComponent
+from app.components.pool import get_component_pool
 from app.flows.graph import FlowGraph, Node, Edge
-from app.models.models import Variable
-from app.core.security import decrypt_value
+from app.flows.offload import get_offloader
+from app.flows.plan import ExecutionPlan, compile_plan
+from app.flows.results import ResultStore, SpilledValue
+from app.flows.streams import STREAM, VALUE, RecordStream, collect, is_stream, pump
+from app.flows.resilience import resolve_policy, run_with_policy
+from app.flows.tracing import FlowTrace
+from app.core import metrics
+from app.core.config import settings
+from app.flows.variables import resolve_variables
 
 logger = logging.getLogger(__name__)
 
@@ -17,21 +26,39 @@ logger = logging.getLogger(__name__)
 class FlowExecutor:
     """Executes flows by building a DAG and running components in topological order"""
     
-    def __init__(self, flow_data: Dict[str, Any], context: Optional[Dict[str, Any]] = None, db: Optional[Session] = None, user_id: Optional[str] = None):
+    def __init__(self, flow_data: Dict[str, Any], context: Optional[Dict[str, Any]] = None, db: Optional[AsyncSession] = None, user_id: Optional[str] = None, trace: bool = False, components: Optional[Dict[str, Type[BaseComponent]]] = None, outputs: Optional[List[str]] = None):
         self.flow_data = flow_data
         self.context = context or {}
         self.graph = FlowGraph()
-        self.results: Dict[str, Any] = {}
+        self.results = ResultStore({}, (), settings.RESULT_MEMORY_BUDGET, settings.RESULT_SPILL_MIN_SIZE)
         self.execution_id = str(uuid.uuid4())
         self.status = "pending"
         self.error = None
         self.db = db
         self.user_id = user_id
-        
-        # Load variables into context if db and user_id provided
-        if db and user_id:
-            self._load_variables_to_context()
-        
+        self.components = components or {}  # Component classes by type, checked before the registry
+        self.requested_outputs = outputs  # "node_id" or "node_id.port"; None runs to the flow's output nodes
+        self.plan: Optional[ExecutionPlan] = None
+        self.trace = FlowTrace(self.execution_id, self.context.get("flow_id")) if trace else None
+        self._finished_ns: Dict[str, int] = {}
+        self._variables_loaded = False
+        self._sources: Dict[str, tuple] = {}  # Upstream nodes of each node, set by _prepare_results
+        self._incoming: Dict[str, List[Edge]] = defaultdict(list)  # Edges by target, set by _prepare_results
+        self._outgoing: Dict[tuple, List[Edge]] = defaultdict(list)  # Edges by (source, source_handle), set by _prepare_results
+        self._duplicates: Dict[str, List[str]] = defaultdict(list)  # Merged nodes by the node that runs for them
+        self._streams: Dict[str, RecordStream] = {}  # Open streams by edge id
+        self._pumps: Set[asyncio.Task] = set()
+        self._streaming_nodes: Set[str] = set()  # Nodes on either end of a stream edge
+    
+    async def _load_variables_to_context(self) -> None:
+        """Expose the user's variables to components as context["variables"] (see get_variable)"""
+        if self._variables_loaded or not (self.db and self.user_id):
+            return
+        variables = await resolve_variables(self.user_id, self.context.get("project_id"))
+        # Variables passed in with the request take precedence
+        self.context["variables"] = {**variables, **(self.context.get("variables") or {})}
+        self._variables_loaded = True
+    
     def build_graph(self) -> None:
         """Build execution graph from flow data"""
         nodes = self.flow_data.get("nodes", [])
@@ -54,10 +81,92 @@ class FlowExecutor:
                 source=edge_data["source"],
                 target=edge_data["target"],
                 source_handle=edge_data.get("sourceHandle"),
-                target_handle=edge_data.get("targetHandle")
+                target_handle=edge_data.get("targetHandle"),
+                kind=edge_data.get("kind", VALUE)
             )
             self.graph.add_edge(edge)
     
+    def compile_plan(self) -> ExecutionPlan:
+        """Drop the nodes that none of the requested outputs depend on and merge duplicate nodes"""
+        component_class = self.get_component_class if settings.FLOW_MERGE_DUPLICATES else None
+        self.plan = compile_plan(self.graph, self.requested_outputs, component_class)
+        if self.plan.aliases:
+            # Consumers of a duplicate read from the node that runs in its place
+            self.graph.merge_nodes(self.plan.aliases)
+            for duplicate, node_id in self.plan.aliases.items():
+                self._duplicates[node_id].append(duplicate)
+            logger.info(f"Merged {len(self.plan.aliases)} duplicate nodes in flow {self.context.get('flow_id', '')}")
+        if self.plan.pruned:
+            self.graph.retain(self.plan.nodes)
+            logger.info(f"Pruned {len(self.plan.pruned)} unused nodes from flow {self.context.get('flow_id', '')}")
+        metrics.FLOW_PLAN_NODES.labels("run").inc(len(self.plan.nodes))
+        metrics.FLOW_PLAN_NODES.labels("pruned").inc(len(self.plan.pruned))
+        metrics.FLOW_PLAN_NODES.labels("merged").inc(len(self.plan.aliases))
+        return self.plan
+    
+    def _prepare_results(self) -> None:
+        """Index the graph for a run: consumers of each node's outputs and stream edge endpoints"""
+        sources = defaultdict(set)
+        for edge in self.graph.edges.values():
+            sources[edge.target].add(edge.source)
+            self._incoming[edge.target].append(edge)
+            self._outgoing[(edge.source, edge.source_handle)].append(edge)
+            if edge.kind == STREAM:
+                self._streaming_nodes.update((edge.source, edge.target))
+        self._sources = {target: tuple(upstream) for target, upstream in sources.items()}
+        consumers: Dict[str, int] = defaultdict(int)
+        for upstream in self._sources.values():
+            for source in upstream:
+                consumers[source] += 1
+        self.results = ResultStore(
+            consumers,
+            self.plan.kept(),
+            budget=settings.RESULT_MEMORY_BUDGET,
+            spill_min_size=settings.RESULT_SPILL_MIN_SIZE,
+            spill_dir=settings.RESULT_SPILL_DIR
+        )
+    
+    async def _route_streams(self, node_id: str, outputs: Any) -> Any:
+        """Start pumping streamed outputs into their stream edges; collect the rest"""
+        if not isinstance(outputs, dict):
+            return outputs
+        routed = outputs
+        for port, value in outputs.items():
+            if not is_stream(value):
+                continue
+            edges = self._outgoing.get((node_id, port), [])
+            # Nodes run one at a time, so a stream read by several nodes would stall on the
+            # first one's full buffer; those are collected once and replayed to each reader
+            if len(edges) == 1 and edges[0].kind == STREAM and node_id not in self.results.keep:
+                streams = [RecordStream() for _ in edges]
+                for edge, stream in zip(edges, streams):
+                    self._streams[edge.id] = stream
+                # Runs alongside the downstream nodes; bounded buffers pace it to the slowest reader
+                task = asyncio.ensure_future(pump(value, streams))
+                self._pumps.add(task)
+                task.add_done_callback(self._pump_done)
+                routed = {**routed, port: None}
+            else:
+                # A value edge, several readers or the response need everything at once
+                routed = {**routed, port: await collect(value)}
+        return routed
+    
+    def _pump_done(self, task: asyncio.Task) -> None:
+        self._pumps.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            # Also raised to the consumer through the stream
+            logger.error(f"Stream producer failed: {task.exception()}")
+    
+    def _stop_pumps(self) -> None:
+        """Cancel producers whose consumers never drained them"""
+        for task in list(self._pumps):
+            task.cancel()
+        self._streams.clear()
+    
+    def _release_inputs(self, node_id: str) -> None:
+        """Let the store free upstream outputs this node was the last to read"""
+        self.results.release(self._sources.get(node_id, ()))
+    
     def topological_sort(self) -> List[str]:
         """Get topological ordering of nodes for execution"""
         # Calculate in-degree for each node
@@ -92,25 +201,31 @@ class FlowExecutor:
         
         return sorted_nodes
     
-    def get_node_inputs(self, node_id: str) -> Dict[str, Any]:
-        """Get inputs for a node from connected nodes' outputs"""
+    def get_node_inputs(self, node_id: str, by_reference: bool = False) -> Dict[str, Any]:
+        """Get inputs for a node from connected nodes' outputs.
+        
+        Spilled outputs are loaded back unless by_reference, in which case the
+        SpilledValue is passed on (worker processes load it themselves).
+        """
         inputs = {}
         node = self.graph.nodes[node_id]
         
-        # Get incoming edges
-        incoming_edges = [
-            edge for edge in self.graph.edges.values()
-            if edge.target == node_id
-        ]
-        
-        for edge in incoming_edges:
+        for edge in self._incoming.get(node_id, ()):
             source_node = self.graph.nodes[edge.source]
-            source_results = self.results.get(edge.source, {})
+            source_results = self.results.get(edge.source)
             
             # Map output from source to input of target
-            if edge.source_handle and edge.target_handle:
+            if edge.kind == STREAM and edge.id in self._streams:
+                inputs[edge.target_handle] = self._streams.pop(edge.id)
+            elif edge.source_handle and edge.target_handle:
                 if edge.source_handle in source_results:
-                    inputs[edge.target_handle] = source_results[edge.source_handle]
+                    value = source_results[edge.source_handle]
+                    if isinstance(value, SpilledValue) and not (by_reference and edge.kind == VALUE):
+                        value = value.load()
+                    if edge.kind == STREAM:
+                        # The producer returned a finished list; replay it in batches
+                        value = RecordStream.from_records(value if isinstance(value, list) else [value])
+                    inputs[edge.target_handle] = value
         
         # Add any static inputs from node data
         if "inputs" in node.data:
@@ -118,6 +233,15 @@ class FlowExecutor:
         
         return inputs
     
+    def _ready_ns(self, node_id: str) -> Optional[int]:
+        """Time at which the last upstream node of node_id finished"""
+        finished = [
+            self._finished_ns[edge.source]
+            for edge in self.graph.get_incoming_edges(node_id)
+            if edge.source in self._finished_ns
+        ]
+        return max(finished) if finished else None
+    
     async def execute_node(self, node_id: str) -> Dict[str, Any]:
         """Execute a single node"""
         node = self.graph.nodes[node_id]
@@ -127,24 +251,110 @@ class FlowExecutor:
         if not component_class:
             raise ValueError(f"Unknown component type: {node.type}")
         
-        # Create component instance
-        component = component_class()
+        span = self.trace.start_span(node_id, node.type, self._ready_ns(node_id)) if self.trace else None
+        
+        mode = component_class.execution_mode
+        streaming = node_id in self._streaming_nodes
+        if streaming and mode == ExecutionMode.PROCESS:
+            mode = ExecutionMode.THREAD  # Streams cannot cross a process boundary
         
         # Get inputs
-        inputs = self.get_node_inputs(node_id)
+        inputs = self.get_node_inputs(node_id, by_reference=mode == ExecutionMode.PROCESS)
+        
+        # Reuse an instance already built for these inputs when the pool has one. Worker
+        # processes keep their own builds, and a thread's build is pooled only when it
+        # does not depend on the thread's short-lived event loop.
+        pool = get_component_pool()
+        pooled = mode == ExecutionMode.ASYNC or (mode == ExecutionMode.THREAD and not component_class.loop_bound_build)
+        component = pool.acquire(component_class, inputs, self.context) if pooled else component_class()
+        
+        # Schema defaults, overridden by the node's "execution" settings
+        policy = resolve_policy(
+            getattr(component.schema, "execution", None) or getattr(component_class, "execution", None),
+            node.data.get("execution")
+        )
+        if streaming:
+            # A stream can be read only once, so a failed attempt cannot be repeated
+            policy = policy.model_copy(update={"max_retries": 0, "hedge": False})
+        
+        # Retries and hedged duplicates each check out their own instance
+        unused = [component] if pooled else []
+        instances = []
+        builds = []
+        
+        async def attempt():
+            if mode == ExecutionMode.PROCESS:
+                # Worker processes keep their own built instances
+                instances.append(None)
+                return await get_offloader().run_in_process(component_class, inputs, self.context)
+            
+            if mode == ExecutionMode.THREAD and not pooled:
+                # Built, run and torn down on the worker thread
+                instance = component_class()
+                instances.append(instance)
+                outputs = await get_offloader().run_in_thread(instance, inputs, self.context)
+                if instance._build_ns:
+                    builds.append(instance._build_ns)
+                return outputs
+            
+            instance = unused.pop() if unused else pool.acquire(component_class, inputs, self.context)
+            if mode == ExecutionMode.THREAD:
+                instances.append(instance)
+                # Returned to the pool by the thread once its streams are drained
+                outputs = await get_offloader().run_in_thread(
+                    instance, inputs, self.context, done=lambda ok: pool.release(instance, reusable=ok)
+                )
+                if instance._build_ns:
+                    builds.append(instance._build_ns)
+                return outputs
+            
+            instances.append(instance)
+            try:
+                outputs = await instance.execute(inputs, self.context)
+            except BaseException:
+                # Failed or cancelled (hedge loser): its build may be broken, don't reuse it
+                pool.release(instance, reusable=False)
+                raise
+            if instance._build_ns:
+                builds.append(instance._build_ns)
+            pool.release(instance)
+            return outputs
         
         # Execute component
+        started = time.perf_counter()
         try:
             logger.info(f"Executing node {node_id} ({node.type})")
-            outputs = await component.execute(inputs, self.context)
-            self.results[node_id] = outputs
-            return outputs
+            outputs = await run_with_policy(attempt, policy, node.type)
+            outputs = await self._route_streams(node_id, outputs)
         except Exception as e:
+            metrics.NODE_DURATION.labels(node.type, "failed").observe(time.perf_counter() - started)
             logger.error(f"Error executing node {node_id}: {str(e)}")
+            if span:
+                span.attempts = len(instances)
+                self.trace.finish_span(span, inputs, error=e)
             raise
+        finally:
+            self._release_inputs(node_id)
+        # After the release, so inputs this node consumed are not spilled needlessly
+        self.results.put(node_id, outputs)
+        
+        elapsed = time.perf_counter() - started
+        metrics.NODE_DURATION.labels(node.type, "completed").observe(elapsed)
+        if isinstance(outputs, dict):
+            metrics.record_usage(node.type, outputs.get("usage"), elapsed)
+        
+        self._finished_ns[node_id] = time.time_ns()
+        if span:
+            span.attempts = len(instances)
+            if builds:
+                span.build_start_ns, span.build_end_ns = builds[-1]
+            self.trace.finish_span(span, inputs, outputs)
+        return outputs
     
     def get_component_class(self, component_type: str):
         """Get component class by type"""
+        if component_type in self.components:
+            return self.components[component_type]
         # from app.components.registry import ComponentRegistry
         # try:
         #     return ComponentRegistry.get(component_type)
@@ -154,38 +364,66 @@ class FlowExecutor:
     
     async def execute(self) -> Dict[str, Any]:
         """Execute the entire flow"""
+        started = time.perf_counter()
+        queued = 0
+        metrics.FLOW_RUNS_IN_FLIGHT.inc()
         try:
             self.status = "running"
             
-            # Build graph
+            # Load variables if db and user_id provided
+            await self._load_variables_to_context()
+            
+            # Build graph and keep only what the requested outputs need
             self.build_graph()
+            self.compile_plan()
             
             # Get execution order
             execution_order = self.topological_sort()
+            self._prepare_results()
+            queued = len(execution_order)
+            metrics.FLOW_QUEUE_DEPTH.inc(queued)
             
             # Execute nodes in order
             for node_id in execution_order:
                 await self.execute_node(node_id)
+                queued -= 1
+                metrics.FLOW_QUEUE_DEPTH.dec()
             
             self.status = "completed"
-            return self.results
-            
+            # Only the output nodes are returned; everything else was freed as it was consumed
+            return self.plan.select(self.results.outputs())
+        
         except Exception as e:
             self.status = "failed"
             self.error = str(e)
             logger.error(f"Flow execution failed: {str(e)}")
             raise
+        finally:
+            self._stop_pumps()
+            self.results.close()
+            metrics.FLOW_QUEUE_DEPTH.dec(queued)
+            metrics.FLOW_RUNS_IN_FLIGHT.dec()
+            metrics.FLOW_RUN_DURATION.labels(self.context.get("flow_id", ""), self.status).observe(
+                time.perf_counter() - started
+            )
+            if self.trace:
+                self.trace.finish()
     
     async def execute_stream(self) -> AsyncGenerator[Dict[str, Any], None]:
         """Execute flow with streaming support"""
         try:
             self.status = "running"
             
-            # Build graph
+            # Load variables if db and user_id provided
+            await self._load_variables_to_context()
+            
+            # Build graph and keep only what the requested outputs need
             self.build_graph()
+            self.compile_plan()
             
             # Get execution order
             execution_order = self.topological_sort()
+            self._prepare_results()
             
             # Execute nodes in order
             for node_id in execution_order:
@@ -195,46 +433,67 @@ class FlowExecutor:
                 if not component_class:
                     raise ValueError(f"Unknown component type: {node.type}")
                 
-                component = component_class()
-                inputs = self.get_node_inputs(node_id)
-                
                 # Check if component supports streaming
-                if isinstance(component, StreamableComponent) and hasattr(component, 'stream'):
-                    # Set up component
-                    for name, value in inputs.items():
-                        component.set_input(name, value)
-                    component.set_context(self.context)
-                    component.validate_inputs()
-                    await component.build()
-                    
-                    # Stream results
-                    async for chunk in component.stream():
-                        yield {
-                            "event": "token",
-                            "node_id": node_id,
-                            "data": chunk
-                        }
+                if issubclass(component_class, StreamableComponent) and hasattr(component_class, 'stream'):
+                    span = self.trace.start_span(node_id, node.type, self._ready_ns(node_id)) if self.trace else None
+                    inputs = self.get_node_inputs(node_id)
+                    pool = get_component_pool()
+                    component = pool.acquire(component_class, inputs, self.context)
                     
-                    # Get final results
-                    outputs = await component.run()
-                    self.results[node_id] = outputs
+                    try:
+                        # Set up component
+                        for name, value in inputs.items():
+                            component.set_input(name, value)
+                        component.set_context(self.context)
+                        component.validate_inputs()
+                        await component.ensure_built()
+                        if span and component._build_ns:
+                            span.build_start_ns, span.build_end_ns = component._build_ns
+                        
+                        # Stream results
+                        async for chunk in component.stream():
+                            if span and span.first_token_ns is None:
+                                span.first_token_ns = time.time_ns()
+                            yield {
+                                "event": "token",
+                                "node_id": node_id,
+                                "data": chunk
+                            }
+                        
+                        # Get final results
+                        outputs = await component.run()
+                    except BaseException:
+                        pool.release(component, reusable=False)
+                        raise
+                    finally:
+                        self._release_inputs(node_id)
+                    pool.release(component)
+                    outputs = await self._route_streams(node_id, outputs)
+                    self.results.put(node_id, outputs)
+                    self._finished_ns[node_id] = time.time_ns()
+                    if span:
+                        span.attempts = 1
+                        self.trace.finish_span(span, inputs, outputs)
                 else:
                     # Non-streaming execution
-                    outputs = await component.execute(inputs, self.context)
-                    self.results[node_id] = outputs
+                    outputs = await self.execute_node(node_id)
                     
-                    yield {
-                        "event": "node_complete",
-                        "node_id": node_id,
-                        "data": outputs
-                    }
+                    for completed in (node_id, *self._duplicates.get(node_id, ())):
+                        yield {
+                            "event": "node_complete",
+                            "node_id": completed,
+                            "data": outputs
+                        }
             
             self.status = "completed"
+            if self.trace:
+                self.trace.finish()
             yield {
                 "event": "flow_complete",
-                "data": self.results
+                "data": self.plan.select(self.results.outputs()),
+                **({"trace": self.trace.to_dict()} if self.trace else {})
             }
-            
+        
         except Exception as e:
             self.status = "failed"
             self.error = str(e)
@@ -244,3 +503,6 @@ class FlowExecutor:
                 "error": str(e)
             }
             raise
+        finally:
+            self._stop_pumps()
+            self.results.close()
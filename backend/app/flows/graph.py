@@ -1,4 +1,4 @@
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Set
 from pydantic import BaseModel, Field
 import uuid
 
@@ -18,6 +18,7 @@ class Edge(BaseModel):
     target: str
     source_handle: Optional[str] = None
     target_handle: Optional[str] = None
+    kind: str = "value"  # "value" passes the finished output, "stream" passes record batches as produced
 
 
 class FlowGraph:
@@ -54,6 +55,24 @@ class FlowGraph:
             for edge_id in edges_to_remove:
                 del self.edges[edge_id]
     
+    def retain(self, node_ids: Set[str]) -> None:
+        """Remove every node not in node_ids, with its connected edges"""
+        self.nodes = {node_id: node for node_id, node in self.nodes.items() if node_id in node_ids}
+        self.edges = {
+            edge_id: edge for edge_id, edge in self.edges.items()
+            if edge.source in node_ids and edge.target in node_ids
+        }
+    
+    def merge_nodes(self, aliases: Dict[str, str]) -> None:
+        """Replace each node in aliases by the node it maps to, which takes over its outgoing edges"""
+        for edge_id, edge in list(self.edges.items()):
+            if edge.target in aliases:
+                del self.edges[edge_id]
+            elif edge.source in aliases:
+                edge.source = aliases[edge.source]
+        for node_id in aliases:
+            self.nodes.pop(node_id, None)
+    
     def remove_edge(self, edge_id: str) -> None:
         """Remove an edge"""
         if edge_id in self.edges:
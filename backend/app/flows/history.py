@@ -0,0 +1,140 @@
+from typing import Any, Dict, List, Optional
+import logging
+import uuid
+import zlib
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import register_cache
+from app.flows.jsonpatch import apply_patch, make_patch
+from app.models.models import FlowVersion
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT = "snapshot"
+DELTA = "delta"
+
+# Versions never change once written, so rebuilt graphs can be kept until evicted
+_versions = TTLCache(maxsize=settings.FLOW_HISTORY_CACHE_SIZE, ttl=float("inf"))
+register_cache("flow_versions", _versions)
+
+
+def _pack(value: Any) -> bytes:
+    return zlib.compress(orjson.dumps(value))
+
+
+def _unpack(payload: bytes) -> Any:
+    return orjson.loads(zlib.decompress(payload))
+
+
+def _needs_snapshot(recent: List[Any], base_version: Optional[int], delta_size: int) -> bool:
+    """Decide from the newest history rows whether the next entry should be a full copy"""
+    if base_version is None or not recent or recent[0].version != base_version:
+        return True  # No unbroken chain to attach a delta to
+    replay_bytes = delta_size
+    for row in recent:
+        if row.kind == SNAPSHOT:
+            # Once replaying deltas reads more than a snapshot would, start a new one
+            return replay_bytes > row.size
+        replay_bytes += row.size
+    return True  # FLOW_HISTORY_SNAPSHOT_INTERVAL deltas since the last snapshot
+
+
+async def record_version(
+    db: AsyncSession,
+    flow_id: uuid.UUID,
+    version: int,
+    data: Dict[str, Any],
+    base_version: Optional[int] = None,
+    base_data: Optional[Dict[str, Any]] = None
+) -> FlowVersion:
+    """Add a history entry for a new flow version; the caller commits"""
+    delta = None
+    if base_version is not None and base_data is not None:
+        delta = _pack(make_patch(base_data, data))
+    
+    recent = []
+    if delta is not None:
+        query = (
+            select(FlowVersion.version, FlowVersion.kind, FlowVersion.size)
+            .where(FlowVersion.flow_id == flow_id)
+            .order_by(FlowVersion.version.desc())
+            .limit(settings.FLOW_HISTORY_SNAPSHOT_INTERVAL)
+        )
+        recent = (await db.execute(query)).all()
+    
+    if delta is None or _needs_snapshot(recent, base_version, len(delta)):
+        payload = _pack(data)
+        entry = FlowVersion(flow_id=flow_id, version=version, kind=SNAPSHOT, payload=payload, size=len(payload))
+    else:
+        entry = FlowVersion(
+            flow_id=flow_id,
+            version=version,
+            kind=DELTA,
+            base_version=base_version,
+            payload=delta,
+            size=len(delta),
+        )
+    
+    db.add(entry)
+    return entry
+
+
+async def load_version(db: AsyncSession, flow_id: uuid.UUID, version: int) -> Optional[Dict[str, Any]]:
+    """Rebuild a flow graph as of a version by replaying deltas from the nearest snapshot"""
+    cached = _versions.get((flow_id, version))
+    if cached is not None:
+        return cached
+    
+    snapshot_query = (
+        select(FlowVersion.version)
+        .where(
+            FlowVersion.flow_id == flow_id,
+            FlowVersion.version <= version,
+            FlowVersion.kind == SNAPSHOT
+        )
+        .order_by(FlowVersion.version.desc())
+        .limit(1)
+    )
+    snapshot_version = (await db.execute(snapshot_query)).scalar_one_or_none()
+    if snapshot_version is None:
+        return None
+    
+    query = (
+        select(FlowVersion.version, FlowVersion.kind, FlowVersion.payload)
+        .where(
+            FlowVersion.flow_id == flow_id,
+            FlowVersion.version >= snapshot_version,
+            FlowVersion.version <= version
+        )
+        .order_by(FlowVersion.version)
+    )
+    rows = (await db.execute(query)).all()
+    if not rows or rows[-1].version != version:
+        return None  # That version was never recorded (e.g. coalesced autosaves)
+    
+    # Every payload is freshly decoded, so patching in place is safe
+    data = _unpack(rows[0].payload)
+    for row in rows[1:]:
+        data = apply_patch(data, _unpack(row.payload), in_place=True)
+    
+    _versions.set((flow_id, version), data)
+    return data
+
+
+async def list_versions(db: AsyncSession, flow_id: uuid.UUID) -> List[Dict[str, Any]]:
+    query = (
+        select(FlowVersion.version, FlowVersion.kind, FlowVersion.size, FlowVersion.created_at)
+        .where(FlowVersion.flow_id == flow_id)
+        .order_by(FlowVersion.version.desc())
+    )
+    rows = (await db.execute(query)).all()
+    return [row._asdict() for row in rows]
+
+
+def forget_flow(flow_id: uuid.UUID) -> None:
+    """Drop cached versions of a deleted flow"""
+    _versions.invalidate_where(lambda key: key[0] == flow_id)
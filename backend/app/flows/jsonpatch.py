@@ -0,0 +1,180 @@
+"""
+Minimal RFC 6902 JSON Patch support for flow graphs
+"""
+
+from typing import Any, Dict, List, Tuple
+import copy
+
+
+class JsonPatchError(ValueError):
+    """Raised when a patch is malformed or does not apply to the document"""
+    pass
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    """Split an RFC 6901 JSON Pointer into unescaped reference tokens"""
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer '{pointer}'")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _array_index(container: list, token: str, allow_end: bool) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index '{token}'")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise JsonPatchError(f"Array index {index} out of range")
+    return index
+
+
+def _resolve_parent(document: Any, tokens: List[str]) -> Tuple[Any, str]:
+    """Walk to the container holding the last token"""
+    if not tokens:
+        raise JsonPatchError("Operation cannot target the document root")
+    current = document
+    for token in tokens[:-1]:
+        if isinstance(current, dict):
+            if token not in current:
+                raise JsonPatchError(f"Path segment '{token}' not found")
+            current = current[token]
+        elif isinstance(current, list):
+            current = current[_array_index(current, token, allow_end=False)]
+        else:
+            raise JsonPatchError(f"Cannot descend into scalar at '{token}'")
+    return current, tokens[-1]
+
+
+def _get(document: Any, pointer: str) -> Any:
+    current = document
+    for token in parse_pointer(pointer):
+        if isinstance(current, dict):
+            if token not in current:
+                raise JsonPatchError(f"Path '{pointer}' not found")
+            current = current[token]
+        elif isinstance(current, list):
+            current = current[_array_index(current, token, allow_end=False)]
+        else:
+            raise JsonPatchError(f"Path '{pointer}' not found")
+    return current
+
+
+def _add(document: Any, pointer: str, value: Any) -> None:
+    parent, key = _resolve_parent(document, parse_pointer(pointer))
+    if isinstance(parent, dict):
+        parent[key] = value
+    elif isinstance(parent, list):
+        parent.insert(_array_index(parent, key, allow_end=True), value)
+    else:
+        raise JsonPatchError(f"Cannot add to scalar at '{pointer}'")
+
+
+def _remove(document: Any, pointer: str) -> Any:
+    parent, key = _resolve_parent(document, parse_pointer(pointer))
+    if isinstance(parent, dict):
+        if key not in parent:
+            raise JsonPatchError(f"Path '{pointer}' not found")
+        return parent.pop(key)
+    if isinstance(parent, list):
+        return parent.pop(_array_index(parent, key, allow_end=False))
+    raise JsonPatchError(f"Cannot remove from scalar at '{pointer}'")
+
+
+def _replace(document: Any, pointer: str, value: Any) -> None:
+    parent, key = _resolve_parent(document, parse_pointer(pointer))
+    if isinstance(parent, dict):
+        if key not in parent:
+            raise JsonPatchError(f"Path '{pointer}' not found")
+        parent[key] = value
+    elif isinstance(parent, list):
+        parent[_array_index(parent, key, allow_end=False)] = value
+    else:
+        raise JsonPatchError(f"Cannot replace in scalar at '{pointer}'")
+
+
+def apply_patch(document: Dict[str, Any], operations: List[Dict[str, Any]], in_place: bool = False) -> Dict[str, Any]:
+    """Apply a list of patch operations; unless in_place, the input is left untouched"""
+    if not in_place:
+        document = copy.deepcopy(document)
+    for operation in operations:
+        op = operation.get("op")
+        path = operation.get("path")
+        if not isinstance(path, str):
+            raise JsonPatchError(f"Operation {op!r} is missing 'path'")
+        
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise JsonPatchError(f"Operation '{op}' requires 'value'")
+        if op in ("move", "copy") and not isinstance(operation.get("from"), str):
+            raise JsonPatchError(f"Operation '{op}' requires 'from'")
+        
+        if op == "add":
+            _add(document, path, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            _remove(document, path)
+        elif op == "replace":
+            _replace(document, path, copy.deepcopy(operation["value"]))
+        elif op == "move":
+            source = operation["from"]
+            if path.startswith(source + "/"):
+                raise JsonPatchError(f"Cannot move '{source}' into its own child")
+            _add(document, path, _remove(document, source))
+        elif op == "copy":
+            _add(document, path, copy.deepcopy(_get(document, operation["from"])))
+        elif op == "test":
+            if _get(document, path) != operation["value"]:
+                raise JsonPatchError(f"Test failed at '{path}'")
+        else:
+            raise JsonPatchError(f"Unknown operation {op!r}")
+    return document
+
+
+def _pointer_token(key: Any) -> str:
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def make_patch(source: Any, target: Any, path: str = "") -> List[Dict[str, Any]]:
+    """Compute operations that turn source into target, diffing dicts and lists structurally"""
+    if source == target:
+        return []
+    if path == "" and not (isinstance(source, dict) and isinstance(target, dict)):
+        raise JsonPatchError("Only documents with an object root can be diffed")
+    
+    if isinstance(source, dict) and isinstance(target, dict):
+        operations = []
+        for key in source:
+            if key not in target:
+                operations.append({"op": "remove", "path": f"{path}/{_pointer_token(key)}"})
+        for key, value in target.items():
+            child = f"{path}/{_pointer_token(key)}"
+            if key not in source:
+                operations.append({"op": "add", "path": child, "value": value})
+            else:
+                operations.extend(make_patch(source[key], value, child))
+        return operations
+    
+    if isinstance(source, list) and isinstance(target, list):
+        # Trim the common prefix and suffix so an insert or delete in the
+        # middle of a long node list stays a single operation
+        start = 0
+        while start < min(len(source), len(target)) and source[start] == target[start]:
+            start += 1
+        end_source, end_target = len(source), len(target)
+        while end_source > start and end_target > start and source[end_source - 1] == target[end_target - 1]:
+            end_source -= 1
+            end_target -= 1
+        
+        operations = []
+        common = min(end_source, end_target) - start
+        for i in range(start, start + common):
+            operations.extend(make_patch(source[i], target[i], f"{path}/{i}"))
+        # Remove from the back so earlier indices stay valid
+        for i in range(end_source - 1, start + common - 1, -1):
+            operations.append({"op": "remove", "path": f"{path}/{i}"})
+        for i in range(start + common, end_target):
+            operations.append({"op": "add", "path": f"{path}/{i}", "value": target[i]})
+        return operations
+    
+    return [{"op": "replace", "path": path, "value": target}]
@@ -0,0 +1,247 @@
+"""
+Runs blocking and CPU-bound components off the event loop
+"""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections import OrderedDict
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Type
+import asyncio
+import logging
+import multiprocessing
+
+from app.components.base import BaseComponent
+from app.core import metrics
+from app.core.config import settings
+from app.flows.results import SpilledValue
+from app.flows.streams import RecordStream, collect, is_stream, pump
+
+logger = logging.getLogger(__name__)
+
+# Built instances kept inside each worker process, keyed by class and build key
+WORKER_INSTANCES = 16
+
+_PORTABLE_TYPES = (str, int, float, bool, type(None), dict, list, tuple)
+
+
+@dataclass(frozen=True)
+class SharedValue:
+    """Handle to a large str/bytes input placed in shared memory for a worker process"""
+    name: str
+    size: int
+    is_text: bool
+
+
+def _share_inputs(inputs: Dict[str, Any]) -> Tuple[Dict[str, Any], list]:
+    """Move large str/bytes inputs into shared memory; returns the inputs to send and the blocks"""
+    shared, blocks = {}, []
+    for name, value in inputs.items():
+        is_text = isinstance(value, str)
+        if (is_text or isinstance(value, (bytes, bytearray))) and len(value) >= settings.OFFLOAD_SHM_THRESHOLD:
+            data = value.encode("utf-8") if is_text else value
+            block = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+            block.buf[:len(data)] = data
+            blocks.append(block)
+            value = SharedValue(block.name, len(data), is_text)
+        shared[name] = value
+    return shared, blocks
+
+
+def _unshare_inputs(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    resolved = {}
+    for name, value in inputs.items():
+        if isinstance(value, SharedValue):
+            # Workers report to the parent's resource tracker, so attaching takes no ownership
+            block = shared_memory.SharedMemory(name=value.name)
+            view = block.buf[:value.size]
+            try:
+                # Decode straight from the mapping; bytes() is the single copy otherwise
+                value = str(view, "utf-8") if value.is_text else bytes(view)
+            finally:
+                view.release()
+                block.close()
+        elif isinstance(value, SpilledValue):
+            value = value.load()  # Spilled outputs are passed by path, not copied through the pipe
+        resolved[name] = value
+    return resolved
+
+
+async def _execute_collected(instance: BaseComponent, inputs: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+    outputs = await instance.execute(inputs, context)
+    if isinstance(outputs, dict):
+        # Generators cannot be pickled back to the parent; return their records
+        outputs = {port: await collect(value) if is_stream(value) else value for port, value in outputs.items()}
+    return outputs
+
+
+_worker_instances: "OrderedDict[Tuple[type, Hashable], BaseComponent]" = OrderedDict()
+
+
+def _run_in_worker(component_class: Type[BaseComponent], inputs: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+    """Entry point inside a worker process"""
+    inputs = _unshare_inputs(inputs)
+    build_key = component_class.build_key(inputs, context)
+    instance = _worker_instances.pop((component_class, build_key), None) if build_key is not None else None
+    if instance is None:
+        instance = component_class()
+    
+    outputs = asyncio.run(_execute_collected(instance, inputs, context))
+    
+    # Keep the build for the next call with the same build inputs
+    if instance.built_key is not None:
+        instance.reset()
+        _worker_instances[(component_class, instance.built_key)] = instance
+        while len(_worker_instances) > WORKER_INSTANCES:
+            _, evicted = _worker_instances.popitem(last=False)
+            asyncio.run(evicted.close())
+    return outputs
+
+
+def _settle(ready: asyncio.Future, outputs: Any, error: Optional[BaseException]) -> None:
+    """Hand a thread's result to the waiting caller, on the caller's loop"""
+    if ready.cancelled():
+        # Nobody will read these streams; stop their producers
+        for value in outputs.values() if isinstance(outputs, dict) else ():
+            if isinstance(value, RecordStream):
+                value.abandon()
+    elif error is not None:
+        ready.set_exception(error)
+    else:
+        ready.set_result(outputs)
+
+
+async def _execute_in_thread(
+    instance: BaseComponent,
+    inputs: Dict[str, Any],
+    context: Dict[str, Any],
+    loop: asyncio.AbstractEventLoop,
+    ready: asyncio.Future,
+    done: Optional[Callable[[bool], None]]
+) -> None:
+    succeeded = False
+    try:
+        try:
+            outputs = await instance.execute(inputs, context)
+        except BaseException as e:
+            loop.call_soon_threadsafe(_settle, ready, None, e)
+            return
+        succeeded = True
+        producers = {port: value for port, value in outputs.items() if is_stream(value)} if isinstance(outputs, dict) else {}
+        streams = {port: RecordStream(loop=loop) for port in producers}
+        loop.call_soon_threadsafe(_settle, ready, {**outputs, **streams} if streams else outputs, None)
+        # Keep iterating the producers here, so their batches are built on this
+        # thread and only handed to the caller's loop
+        await asyncio.gather(*(pump(producers[port], [streams[port]]) for port in producers), return_exceptions=True)
+    finally:
+        if done is not None:
+            loop.call_soon_threadsafe(done, succeeded)
+        else:
+            # Clients made by build() are bound to this loop, which ends with the call
+            await instance.close()
+
+
+def _run_in_thread(
+    instance: BaseComponent,
+    inputs: Dict[str, Any],
+    context: Dict[str, Any],
+    loop: asyncio.AbstractEventLoop,
+    ready: asyncio.Future,
+    done: Optional[Callable[[bool], None]]
+) -> None:
+    # A private event loop, so blocking calls inside run() stall only this thread
+    asyncio.run(_execute_in_thread(instance, inputs, context, loop, ready, done))
+
+
+class Offloader:
+    """Managed thread and process pools for components that would block the event loop"""
+    
+    def __init__(self, thread_workers: int, process_workers: Optional[int], start_method: str):
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers
+        self.start_method = start_method
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+    
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=self.thread_workers, thread_name_prefix="component")
+        return self._threads
+    
+    def _process_pool(self) -> ProcessPoolExecutor:
+        if self._processes is None:
+            self._processes = ProcessPoolExecutor(
+                max_workers=self.process_workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+            )
+        return self._processes
+    
+    async def run_in_thread(
+        self,
+        instance: BaseComponent,
+        inputs: Dict[str, Any],
+        context: Dict[str, Any],
+        done: Optional[Callable[[bool], None]] = None
+    ) -> Dict[str, Any]:
+        """Execute a component instance on the thread pool.
+        
+        Returns once run() does; streamed outputs come back as RecordStreams
+        that the worker thread keeps filling. When done is given, the instance
+        is left built and done(succeeded) is called on this loop once the thread
+        is finished with it; otherwise it is torn down on the thread.
+        """
+        metrics.COMPONENT_OFFLOADS.labels("thread").inc()
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        loop.run_in_executor(self._thread_pool(), _run_in_thread, instance, inputs, context, loop, ready, done)
+        return await ready
+    
+    async def run_in_process(
+        self,
+        component_class: Type[BaseComponent],
+        inputs: Dict[str, Any],
+        context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Execute a component on the process pool; inputs and outputs must be picklable"""
+        metrics.COMPONENT_OFFLOADS.labels("process").inc()
+        # Only plain values cross the process boundary (no sessions, clients or callbacks)
+        context = {key: value for key, value in context.items() if isinstance(value, _PORTABLE_TYPES)}
+        shared, blocks = _share_inputs(inputs)
+        try:
+            future = self._process_pool().submit(_run_in_worker, component_class, shared, context)
+            return await asyncio.wrap_future(future)
+        finally:
+            # A cancelled call may still be reading; unlinking only removes the name
+            for block in blocks:
+                block.close()
+                block.unlink()
+    
+    def shutdown(self) -> None:
+        if self._threads is not None:
+            self._threads.shutdown(wait=False, cancel_futures=True)
+            self._threads = None
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+            self._processes = None
+
+
+_offloader: Optional[Offloader] = None
+
+
+def get_offloader() -> Offloader:
+    """Return the process-wide offloader, creating it on first use"""
+    global _offloader
+    if _offloader is None:
+        _offloader = Offloader(
+            thread_workers=settings.OFFLOAD_THREAD_WORKERS,
+            process_workers=settings.OFFLOAD_PROCESS_WORKERS,
+            start_method=settings.OFFLOAD_START_METHOD,
+        )
+    return _offloader
+
+
+def close_offloader() -> None:
+    global _offloader
+    if _offloader is not None:
+        _offloader.shutdown()
+        _offloader = None
@@ -0,0 +1,172 @@
+"""
+Execution plans: the part of a flow graph a run actually needs
+"""
+
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, List, Optional, Set, Type
+
+from app.components.base import BaseComponent, freeze_value
+from app.flows.graph import Edge, FlowGraph, Node
+from app.flows.results import output_nodes
+
+
+class PlanError(ValueError):
+    """Raised when a requested output does not exist in the flow"""
+    pass
+
+
+@dataclass
+class ExecutionPlan:
+    """Nodes to run and the outputs to return.
+
+    outputs maps each returned node to the ports requested from it (None for
+    all of them). pruned lists the nodes that no output depends on; aliases
+    maps each merged duplicate to the node that runs in its place.
+    """
+    nodes: Set[str]
+    outputs: Dict[str, Optional[FrozenSet[str]]]
+    pruned: Set[str] = field(default_factory=set)
+    aliases: Dict[str, str] = field(default_factory=dict)
+    
+    def kept(self) -> Set[str]:
+        """Executed nodes whose outputs are returned"""
+        return {self.aliases.get(node_id, node_id) for node_id in self.outputs}
+    
+    def select(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        """Outputs of the requested nodes, narrowed to the requested ports"""
+        selected = {}
+        for node_id, ports in self.outputs.items():
+            source = self.aliases.get(node_id, node_id)
+            if source not in results:
+                continue
+            outputs = results[source]
+            if ports is not None and isinstance(outputs, dict):
+                outputs = {port: value for port, value in outputs.items() if port in ports}
+            selected[node_id] = outputs
+        return selected
+
+
+def parse_targets(graph: FlowGraph, targets: Iterable[str]) -> Dict[str, Optional[FrozenSet[str]]]:
+    """Resolve "node_id" and "node_id.port" targets; a whole node wins over a port"""
+    ports: Dict[str, Optional[Set[str]]] = {}
+    for target in targets:
+        if target in graph.nodes:
+            ports[target] = None
+            continue
+        node_id, _, port = target.rpartition(".")
+        if node_id not in graph.nodes:
+            raise PlanError(f"Output node {target} not found")
+        if node_id not in ports:
+            ports[node_id] = set()
+        if ports[node_id] is not None:
+            ports[node_id].add(port)
+    return {node_id: frozenset(selected) if selected is not None else None for node_id, selected in ports.items()}
+
+
+def ancestors(graph: FlowGraph, node_ids: Iterable[str]) -> Set[str]:
+    """The given nodes and every node they depend on"""
+    sources: Dict[str, List[str]] = {}
+    for edge in graph.edges.values():
+        sources.setdefault(edge.target, []).append(edge.source)
+    
+    required = set(node_ids)
+    pending = list(required)
+    while pending:
+        for source in sources.get(pending.pop(), ()):
+            if source not in required:
+                required.add(source)
+                pending.append(source)
+    return required
+
+
+def _signature(
+    node: Node,
+    incoming: List[Edge],
+    aliases: Dict[str, str],
+    component_class: Callable[[str], Optional[Type[BaseComponent]]]
+) -> Optional[Hashable]:
+    """What determines a node's outputs: type, static inputs and upstream sources"""
+    cls = component_class(node.type)
+    static_inputs = node.data.get("inputs") or {}
+    # Static inputs override edge values, which are unknown until the node runs
+    inputs = {**{edge.target_handle: None for edge in incoming}, **static_inputs}
+    if cls is None or cls.has_side_effects(inputs):
+        return None
+    sources = sorted(
+        ((aliases.get(edge.source, edge.source), edge.source_handle, edge.target_handle, edge.kind) for edge in incoming),
+        key=str
+    )
+    signature = (
+        node.type,
+        freeze_value(static_inputs),
+        freeze_value(node.data.get("execution") or {}),
+        tuple(sources)
+    )
+    try:
+        hash(signature)
+    except TypeError:
+        return None  # Inputs that cannot be compared; run the node on its own
+    return signature
+
+
+def find_duplicates(
+    graph: FlowGraph,
+    nodes: Set[str],
+    component_class: Callable[[str], Optional[Type[BaseComponent]]]
+) -> Dict[str, str]:
+    """Map each node that repeats an earlier one's work to that earlier node.
+    
+    Nodes are visited in topological order with sources already replaced by
+    their aliases, so whole duplicated branches collapse, not just their roots.
+    """
+    incoming: Dict[str, List[Edge]] = defaultdict(list)
+    targets: Dict[str, List[str]] = defaultdict(list)
+    in_degree: Dict[str, int] = defaultdict(int)
+    for edge in graph.edges.values():
+        if edge.source in nodes and edge.target in nodes:
+            incoming[edge.target].append(edge)
+            targets[edge.source].append(edge.target)
+            in_degree[edge.target] += 1
+    
+    aliases: Dict[str, str] = {}
+    first: Dict[Hashable, str] = {}
+    queue = deque(node_id for node_id in graph.nodes if node_id in nodes and in_degree[node_id] == 0)
+    while queue:
+        node_id = queue.popleft()
+        signature = _signature(graph.nodes[node_id], incoming[node_id], aliases, component_class)
+        if signature is not None:
+            canonical = first.setdefault(signature, node_id)
+            if canonical != node_id:
+                aliases[node_id] = canonical
+        for target in targets[node_id]:
+            in_degree[target] -= 1
+            if in_degree[target] == 0:
+                queue.append(target)
+    return aliases
+
+
+def compile_plan(
+    graph: FlowGraph,
+    targets: Optional[Iterable[str]] = None,
+    component_class: Optional[Callable[[str], Optional[Type[BaseComponent]]]] = None
+) -> ExecutionPlan:
+    """Plan a run producing targets, or the flow's output nodes when none are given.
+    
+    With component_class (a lookup from node type to class), nodes that would
+    repeat another node's work are merged into it.
+    """
+    if targets:
+        outputs = parse_targets(graph, targets)
+    else:
+        sources = {edge.source for edge in graph.edges.values()}
+        outputs = {node_id: None for node_id in output_nodes(graph.nodes, sources)}
+    
+    required = ancestors(graph, outputs)
+    aliases = find_duplicates(graph, required, component_class) if component_class else {}
+    return ExecutionPlan(
+        nodes=required - set(aliases),
+        outputs=outputs,
+        pruned={node_id for node_id in graph.nodes if node_id not in required},
+        aliases=aliases
+    )
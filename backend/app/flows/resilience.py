@@ -0,0 +1,128 @@
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+from collections import deque
+import asyncio
+import logging
+import math
+import random
+
+from app.components.base import ExecutionPolicy
+
+logger = logging.getLogger(__name__)
+
+# Errors that retrying cannot fix (bad configuration or inputs)
+NON_RETRYABLE_ERRORS = (ValueError, TypeError, KeyError, NotImplementedError)
+
+HEDGE_MIN_SAMPLES = 20
+
+
+class LatencyTracker:
+    """Rolling window of successful attempt latencies for one component type"""
+    
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+    
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """Return the q-th percentile, or None until enough samples exist"""
+        if len(self.samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+_latency: Dict[str, LatencyTracker] = {}
+
+
+def get_latency_tracker(key: str) -> LatencyTracker:
+    tracker = _latency.get(key)
+    if tracker is None:
+        tracker = _latency[key] = LatencyTracker()
+    return tracker
+
+
+def resolve_policy(default: Optional[ExecutionPolicy], overrides: Optional[Dict[str, Any]]) -> ExecutionPolicy:
+    """Apply per-node overrides on top of the component's schema defaults"""
+    policy = default or ExecutionPolicy()
+    if overrides:
+        policy = ExecutionPolicy(**{**policy.model_dump(), **overrides})
+    return policy
+
+
+def backoff_delay(policy: ExecutionPolicy, attempt: int) -> float:
+    """Full-jitter exponential backoff for the given retry number (0-based)"""
+    return random.uniform(0, min(policy.backoff_max, policy.backoff_base * 2 ** attempt))
+
+
+async def run_with_policy(
+    attempt: Callable[[], Awaitable[Any]],
+    policy: ExecutionPolicy,
+    latency_key: str
+) -> Any:
+    """Run attempt() under the policy's timeout, retry and hedging rules.
+    
+    attempt must start from scratch on every call (fresh component instance),
+    since retries and hedged duplicates may run it more than once.
+    """
+    tracker = get_latency_tracker(latency_key)
+    retries = 0
+    while True:
+        try:
+            if policy.hedge and policy.idempotent:
+                return await _hedged(attempt, policy, tracker)
+            return await _timed(attempt, policy, tracker)
+        except NON_RETRYABLE_ERRORS:
+            raise
+        except Exception as e:
+            if retries >= policy.max_retries:
+                raise
+            delay = backoff_delay(policy, retries)
+            retries += 1
+            logger.warning(
+                f"Attempt {retries} for {latency_key} failed ({type(e).__name__}: {e}); "
+                f"retrying in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+
+
+async def _timed(attempt: Callable[[], Awaitable[Any]], policy: ExecutionPolicy, tracker: LatencyTracker) -> Any:
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    try:
+        result = await asyncio.wait_for(attempt(), timeout=policy.timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"Timed out after {policy.timeout}s")
+    tracker.record(loop.time() - started)
+    return result
+
+
+async def _hedged(attempt: Callable[[], Awaitable[Any]], policy: ExecutionPolicy, tracker: LatencyTracker) -> Any:
+    """Send a duplicate attempt once the primary exceeds the p95 latency"""
+    hedge_after = tracker.percentile(95)
+    if hedge_after is None or (policy.timeout is not None and hedge_after >= policy.timeout):
+        return await _timed(attempt, policy, tracker)
+    
+    tasks = {asyncio.ensure_future(_timed(attempt, policy, tracker))}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done:
+            logger.info(f"Hedging request after {hedge_after:.3f}s")
+            tasks.add(asyncio.ensure_future(_timed(attempt, policy, tracker)))
+        
+        error: Optional[BaseException] = None
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.cancelled():
+                    # Cancelled from elsewhere; exception() would raise CancelledError at us
+                    error = error or RuntimeError("Attempt was cancelled")
+                    continue
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
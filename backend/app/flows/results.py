@@ -0,0 +1,196 @@
+"""
+Intermediate node outputs of a flow run, freed once every consumer has read them
+"""
+
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+import logging
+import mmap
+import os
+import pickle
+import sys
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+RAW, TEXT, PICKLE = "raw", "text", "pickle"
+
+
+@dataclass(frozen=True)
+class SpilledValue:
+    """Reference to an output written to a temp file; load() maps it back in"""
+    path: str
+    size: int
+    kind: str
+    
+    def load(self) -> Any:
+        if self.size == 0:
+            return {RAW: b"", TEXT: ""}.get(self.kind)
+        with open(self.path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    if self.kind == TEXT:
+                        return str(view, "utf-8")
+                    if self.kind == RAW:
+                        return bytes(view)
+                    return pickle.loads(view)
+                finally:
+                    view.release()
+
+
+def resolve(value: Any) -> Any:
+    """The value itself, loading it from disk if it was spilled"""
+    return value.load() if isinstance(value, SpilledValue) else value
+
+
+# Containers longer than this are sized from a sample (evenly spaced for sequences)
+SIZE_SAMPLE = 16
+SPILL_CHUNK = 1024 * 1024  # Characters encoded per write when spilling text
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate bytes held by an output value, in time bounded by its nesting, not its length"""
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        # Skipping through a dict costs a step per entry, so sample its first entries
+        items = list(islice(value.items(), SIZE_SAMPLE))
+        sampled = sum(estimate_size(k) + estimate_size(v) for k, v in items)
+        return sys.getsizeof(value) + sampled * len(value) // max(len(items), 1)
+    if isinstance(value, (list, tuple)):
+        items = value if len(value) <= SIZE_SAMPLE else value[::len(value) // SIZE_SAMPLE]
+        sampled = sum(estimate_size(item) for item in items)
+        return sys.getsizeof(value) + sampled * len(value) // max(len(items), 1)
+    return sys.getsizeof(value)
+
+
+class ResultStore:
+    """Holds node outputs until every downstream node has read them.
+
+    consumers counts, per node, the nodes that read its outputs; keep names
+    the nodes whose outputs are returned at the end. Once the resident outputs
+    exceed budget bytes, values of at least spill_min_size bytes are written to
+    memory-mapped temp files, oldest first, and handed out by reference.
+    """
+    
+    def __init__(
+        self,
+        consumers: Dict[str, int],
+        keep: Iterable[str],
+        budget: int,
+        spill_min_size: int,
+        spill_dir: Optional[str] = None
+    ):
+        self.consumers = dict(consumers)
+        self.keep: Set[str] = set(keep)
+        self.budget = budget
+        self.spill_min_size = spill_min_size
+        self.spill_dir = spill_dir
+        self.resident = 0
+        self.peak_resident = 0
+        self.spilled_bytes = 0
+        self._outputs: Dict[str, Dict[str, Any]] = {}
+        self._sizes: Dict[Tuple[str, str], int] = {}
+    
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self._outputs
+    
+    def get(self, node_id: str) -> Dict[str, Any]:
+        """A node's outputs; spilled values stay SpilledValue references"""
+        return self._outputs.get(node_id, {})
+    
+    def put(self, node_id: str, outputs: Any) -> None:
+        if not self.consumers.get(node_id) and node_id not in self.keep:
+            return  # Nobody will read it
+        self._outputs[node_id] = outputs
+        if isinstance(outputs, dict):
+            for port, value in outputs.items():
+                size = estimate_size(value)
+                self._sizes[(node_id, port)] = size
+                self.resident += size
+        self.peak_resident = max(self.peak_resident, self.resident)
+        if self.resident > self.budget:
+            self._spill(exclude=node_id)
+    
+    def release(self, node_ids: Iterable[str]) -> None:
+        """Record that a consumer has finished with these nodes' outputs"""
+        for node_id in node_ids:
+            remaining = self.consumers.get(node_id, 0) - 1
+            self.consumers[node_id] = remaining
+            if remaining <= 0 and node_id not in self.keep:
+                self._drop(node_id)
+    
+    def outputs(self) -> Dict[str, Any]:
+        """Outputs of the kept nodes, with spilled values loaded back"""
+        results = {}
+        for node_id in self.keep:
+            if node_id not in self._outputs:
+                continue
+            outputs = self._outputs[node_id]
+            if isinstance(outputs, dict):
+                outputs = {port: resolve(value) for port, value in outputs.items()}
+            results[node_id] = outputs
+        return results
+    
+    def close(self) -> None:
+        """Free everything, deleting spill files"""
+        for node_id in list(self._outputs):
+            self._drop(node_id)
+    
+    def _drop(self, node_id: str) -> None:
+        outputs = self._outputs.pop(node_id, None)
+        if not isinstance(outputs, dict):
+            return
+        for port, value in outputs.items():
+            self.resident -= self._sizes.pop((node_id, port), 0)
+            if isinstance(value, SpilledValue):
+                try:
+                    os.unlink(value.path)
+                except OSError:
+                    pass
+    
+    def _spill(self, exclude: str) -> None:
+        # Oldest outputs first: they have waited longest for their consumers. The
+        # newest (exclude) is usually read next and would just be loaded straight back
+        for (node_id, port), size in list(self._sizes.items()):
+            if self.resident <= self.budget:
+                break
+            if size < self.spill_min_size or node_id == exclude:
+                continue
+            spilled = self._write(self._outputs[node_id][port])
+            if spilled is None:
+                continue
+            # Copy so a component holding the original dict does not see the reference
+            self._outputs[node_id] = {**self._outputs[node_id], port: spilled}
+            self.resident -= size
+            self.spilled_bytes += spilled.size
+            self._sizes[(node_id, port)] = 0
+    
+    def _write(self, value: Any) -> Optional[SpilledValue]:
+        # Exact types only: subclasses and everything else are pickled, so load() returns the same types
+        if type(value) is str:
+            kind = TEXT
+            # Encode piecewise so spilling does not briefly double the value
+            chunks = (value[i:i + SPILL_CHUNK].encode("utf-8") for i in range(0, len(value), SPILL_CHUNK))
+        elif type(value) is bytes:
+            kind, chunks = RAW, (value,)
+        else:
+            try:
+                kind, chunks = PICKLE, (pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),)
+            except (pickle.PicklingError, TypeError, AttributeError):
+                return None  # Not picklable (clients, models, ...); keep it in memory
+        
+        fd, path = tempfile.mkstemp(prefix="flow-result-", dir=self.spill_dir)
+        size = 0
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                size += f.write(chunk)
+        return SpilledValue(path, size, kind)
+
+
+def output_nodes(nodes: Dict[str, Any], sources: Set[str]) -> Set[str]:
+    """Nodes flagged "output" in their data, else every node without outgoing edges"""
+    flagged = {node_id for node_id, node in nodes.items() if node.data.get("output")}
+    return flagged or {node_id for node_id in nodes if node_id not in sources}
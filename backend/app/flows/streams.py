@@ -0,0 +1,148 @@
+"""
+Record streams: batches of records passed along "stream" edges with bounded buffering
+"""
+
+from typing import Any, AsyncIterator, Awaitable, List, Optional, Sequence
+import asyncio
+
+from app.core.config import settings
+
+STREAM = "stream"
+VALUE = "value"
+
+
+class _End:
+    pass
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_END = _End()
+
+
+class RecordStream:
+    """An async iterator of record batches with a bounded buffer between producer and consumer.
+
+    The producer blocks in put() while max_batches batches are waiting, so a
+    fast loader cannot run ahead of a slow embedder. Each stream has a single
+    consumer and is read once. It may be written or read from a worker
+    thread's event loop (execution_mode = "thread"); the queue itself stays on
+    the stream's loop. If the consumer stops early, the stream is abandoned and
+    further put() calls raise, so the producer stops too.
+    """
+    
+    def __init__(
+        self,
+        max_batches: Optional[int] = None,
+        records: Optional[Sequence[Any]] = None,
+        batch_size: Optional[int] = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None
+    ):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_batches or settings.STREAM_BUFFER_BATCHES)
+        self._loop = loop or asyncio.get_running_loop()
+        self._records = records
+        self._batch_size = batch_size or settings.STREAM_BATCH_SIZE
+        self._abandoned = False
+    
+    @classmethod
+    def from_records(cls, records: Sequence[Any], batch_size: Optional[int] = None) -> "RecordStream":
+        """Replay an already materialized list as a stream"""
+        return cls(records=records, batch_size=batch_size)
+    
+    async def put(self, batch: List[Any]) -> None:
+        if self._abandoned:
+            raise RuntimeError("Stream consumer stopped reading")
+        await self._on_loop(self._queue.put(batch))
+    
+    async def close(self, error: Optional[BaseException] = None) -> None:
+        """Mark the end of the stream; the consumer re-raises error if one is given"""
+        if not self._abandoned:
+            await self._on_loop(self._queue.put(_Failure(error) if error else _END))
+    
+    def abandon(self) -> None:
+        """Drop buffered batches and refuse new ones; runs on the stream's loop"""
+        self._abandoned = True
+        while not self._queue.empty():
+            self._queue.get_nowait()  # Wakes a producer blocked in put()
+    
+    async def _on_loop(self, operation: Awaitable[Any]) -> Any:
+        if asyncio.get_running_loop() is self._loop:
+            return await operation
+        # Called from another thread's loop
+        future = asyncio.run_coroutine_threadsafe(operation, self._loop)
+        return await asyncio.wrap_future(future)
+    
+    async def __aiter__(self) -> AsyncIterator[List[Any]]:
+        if self._records is not None:
+            for start in range(0, len(self._records), self._batch_size):
+                yield list(self._records[start:start + self._batch_size])
+            return
+        finished = False
+        try:
+            while True:
+                item = await self._on_loop(self._queue.get())
+                if item is _END:
+                    finished = True
+                    return
+                if isinstance(item, _Failure):
+                    finished = True
+                    raise item.error
+                yield item
+        finally:
+            if not finished:
+                # Closed or cancelled before the end: release the producer
+                if asyncio.get_running_loop() is self._loop:
+                    self.abandon()
+                else:
+                    self._loop.call_soon_threadsafe(self.abandon)
+    
+    async def collect(self) -> List[Any]:
+        """Read the whole stream into one list"""
+        return await collect(self)
+
+
+def is_stream(value: Any) -> bool:
+    """Whether a value is a batch stream rather than a materialized value"""
+    return hasattr(value, "__aiter__")
+
+
+async def collect(batches: Any) -> List[Any]:
+    """Flatten an async iterator of batches into one list"""
+    records: List[Any] = []
+    async for batch in batches:
+        records.extend(batch)
+    return records
+
+
+async def iter_batches(value: Any, batch_size: int) -> AsyncIterator[List[Any]]:
+    """Batches of a stream, or of a plain list cut into batch_size pieces"""
+    if is_stream(value):
+        async for batch in value:
+            yield batch
+        return
+    records = value if isinstance(value, list) else [value]
+    size = batch_size if batch_size > 0 else max(len(records), 1)
+    for start in range(0, len(records), size):
+        yield records[start:start + size]
+
+
+async def pump(source: Any, streams: List[RecordStream]) -> None:
+    """Copy batches from a producer into every consuming stream, then close them"""
+    batches = source.__aiter__()
+    try:
+        async for batch in batches:
+            for stream in streams:
+                await stream.put(batch)
+    except asyncio.CancelledError:
+        if hasattr(batches, "aclose"):
+            await batches.aclose()  # Let the producer clean up (or stop, for a RecordStream)
+        raise
+    except Exception as e:
+        for stream in streams:
+            await stream.close(e)
+        raise
+    for stream in streams:
+        await stream.close()
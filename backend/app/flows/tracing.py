@@ -0,0 +1,245 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+import json
+import os
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SERVICE_NAME = "ai-agent-builder"
+
+
+def payload_size(value: Any) -> int:
+    """Approximate serialized size of a value in bytes"""
+    try:
+        if orjson is not None:
+            return len(orjson.dumps(value, default=str))
+        return len(json.dumps(value, default=str).encode())
+    except (TypeError, ValueError):
+        return 0
+
+
+class NodeSpan(BaseModel):
+    """Timing and size information for one node execution (times in ns since epoch)"""
+    span_id: str = Field(default_factory=lambda: os.urandom(8).hex())
+    node_id: str
+    component_type: str
+    ready_ns: int  # All upstream nodes finished
+    start_ns: int = 0
+    build_start_ns: Optional[int] = None
+    build_end_ns: Optional[int] = None
+    first_token_ns: Optional[int] = None
+    end_ns: int = 0
+    attempts: int = 0
+    input_bytes: int = 0
+    output_bytes: int = 0
+    usage: Optional[Dict[str, Any]] = None
+    status: str = "running"
+    error: Optional[str] = None
+    
+    @property
+    def queue_wait_ms(self) -> float:
+        return (self.start_ns - self.ready_ns) / 1e6
+    
+    @property
+    def build_ms(self) -> Optional[float]:
+        if self.build_start_ns is None or self.build_end_ns is None:
+            return None
+        return (self.build_end_ns - self.build_start_ns) / 1e6
+    
+    @property
+    def run_ms(self) -> float:
+        return (self.end_ns - (self.build_end_ns or self.start_ns)) / 1e6
+    
+    @property
+    def ttft_ms(self) -> Optional[float]:
+        if self.first_token_ns is None:
+            return None
+        return (self.first_token_ns - (self.build_end_ns or self.start_ns)) / 1e6
+    
+    @property
+    def total_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "node_id": self.node_id,
+            "component_type": self.component_type,
+            "status": self.status,
+            "error": self.error,
+            "attempts": self.attempts,
+            "queue_wait_ms": round(self.queue_wait_ms, 3),
+            "build_ms": round(self.build_ms, 3) if self.build_ms is not None else None,
+            "run_ms": round(self.run_ms, 3),
+            "ttft_ms": round(self.ttft_ms, 3) if self.ttft_ms is not None else None,
+            "total_ms": round(self.total_ms, 3),
+            "input_bytes": self.input_bytes,
+            "output_bytes": self.output_bytes,
+            "usage": self.usage,
+        }
+
+
+class FlowTrace:
+    """Per-node spans collected during one flow run"""
+    
+    def __init__(self, execution_id: str, flow_id: Optional[str] = None):
+        self.trace_id = os.urandom(16).hex()
+        self.root_span_id = os.urandom(8).hex()
+        self.execution_id = execution_id
+        self.flow_id = flow_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.spans: Dict[str, NodeSpan] = {}
+    
+    def start_span(self, node_id: str, component_type: str, ready_ns: Optional[int] = None) -> NodeSpan:
+        now = time.time_ns()
+        span = NodeSpan(
+            node_id=node_id,
+            component_type=component_type,
+            ready_ns=ready_ns or self.start_ns,
+            start_ns=now,
+        )
+        self.spans[node_id] = span
+        return span
+    
+    def finish_span(
+        self,
+        span: NodeSpan,
+        inputs: Optional[Dict[str, Any]] = None,
+        outputs: Optional[Dict[str, Any]] = None,
+        error: Optional[BaseException] = None
+    ) -> None:
+        span.end_ns = time.time_ns()
+        span.status = "failed" if error else "completed"
+        span.error = str(error) if error else None
+        if inputs is not None:
+            span.input_bytes = payload_size(inputs)
+        if outputs is not None:
+            span.output_bytes = payload_size(outputs)
+            usage = outputs.get("usage") if isinstance(outputs, dict) else None
+            span.usage = usage if isinstance(usage, dict) else None
+    
+    def finish(self) -> None:
+        self.end_ns = time.time_ns()
+    
+    def export(self, fmt: str = "json") -> Dict[str, Any]:
+        """Export as "json" (summary), "otel" (OTLP/JSON) or "chrome" (trace events)"""
+        if fmt == "otel":
+            return self.to_otel()
+        if fmt == "chrome":
+            return self.to_chrome_trace()
+        if fmt != "json":
+            raise ValueError(f"Unknown trace format: {fmt}")
+        return self.to_dict()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        end_ns = self.end_ns or time.time_ns()
+        return {
+            "trace_id": self.trace_id,
+            "execution_id": self.execution_id,
+            "flow_id": self.flow_id,
+            "total_ms": round((end_ns - self.start_ns) / 1e6, 3),
+            "nodes": [span.summary() for span in self.spans.values()],
+        }
+    
+    def to_otel(self) -> Dict[str, Any]:
+        """OpenTelemetry OTLP/JSON: a root span for the run, one child per node
+        and grandchildren for the build and run phases."""
+        def attr(key: str, value: Any) -> Dict[str, Any]:
+            if isinstance(value, bool):
+                return {"key": key, "value": {"boolValue": value}}
+            if isinstance(value, int):
+                return {"key": key, "value": {"intValue": str(value)}}
+            if isinstance(value, float):
+                return {"key": key, "value": {"doubleValue": value}}
+            return {"key": key, "value": {"stringValue": str(value)}}
+        
+        def otel_span(span_id, parent_id, name, start_ns, end_ns, attributes, error=None):
+            return {
+                "traceId": self.trace_id,
+                "spanId": span_id,
+                "parentSpanId": parent_id or "",
+                "name": name,
+                "kind": 1,
+                "startTimeUnixNano": str(start_ns),
+                "endTimeUnixNano": str(end_ns),
+                "attributes": [attr(k, v) for k, v in attributes.items() if v is not None],
+                "status": {"code": 2, "message": error} if error else {"code": 1},
+            }
+        
+        end_ns = self.end_ns or time.time_ns()
+        spans = [otel_span(
+            self.root_span_id, None, "flow.run", self.start_ns, end_ns,
+            {"flow.id": self.flow_id, "flow.execution_id": self.execution_id},
+        )]
+        for span in self.spans.values():
+            attributes = {
+                "node.id": span.node_id,
+                "component.type": span.component_type,
+                "node.attempts": span.attempts,
+                "node.queue_wait_ms": span.queue_wait_ms,
+                "node.ttft_ms": span.ttft_ms,
+                "node.input_bytes": span.input_bytes,
+                "node.output_bytes": span.output_bytes,
+            }
+            for key, value in (span.usage or {}).items():
+                if isinstance(value, (int, float)):
+                    attributes[f"llm.usage.{key}"] = value
+            spans.append(otel_span(
+                span.span_id, self.root_span_id, f"node {span.node_id}",
+                span.start_ns, span.end_ns, attributes, span.error,
+            ))
+            if span.build_start_ns is not None and span.build_end_ns is not None:
+                spans.append(otel_span(
+                    os.urandom(8).hex(), span.span_id, "build",
+                    span.build_start_ns, span.build_end_ns, {},
+                ))
+            spans.append(otel_span(
+                os.urandom(8).hex(), span.span_id, "run",
+                span.build_end_ns or span.start_ns, span.end_ns, {},
+            ))
+        
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [attr("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{"scope": {"name": "app.flows.executor"}, "spans": spans}],
+            }]
+        }
+    
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Chrome trace-event format (load in chrome://tracing or Perfetto)"""
+        def us(ns: int) -> float:
+            return (ns - self.start_ns) / 1e3
+        
+        events: List[Dict[str, Any]] = []
+        for tid, span in enumerate(self.spans.values(), start=1):
+            events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": span.node_id}})
+            if span.start_ns > span.ready_ns:
+                events.append({
+                    "name": "queue", "cat": "wait", "ph": "X", "pid": 1, "tid": tid,
+                    "ts": us(span.ready_ns), "dur": (span.start_ns - span.ready_ns) / 1e3,
+                })
+            if span.build_start_ns is not None and span.build_end_ns is not None:
+                events.append({
+                    "name": "build", "cat": span.component_type, "ph": "X", "pid": 1, "tid": tid,
+                    "ts": us(span.build_start_ns), "dur": (span.build_end_ns - span.build_start_ns) / 1e3,
+                })
+            run_start = span.build_end_ns or span.start_ns
+            events.append({
+                "name": "run", "cat": span.component_type, "ph": "X", "pid": 1, "tid": tid,
+                "ts": us(run_start), "dur": (span.end_ns - run_start) / 1e3,
+                "args": span.summary(),
+            })
+            if span.first_token_ns is not None:
+                events.append({
+                    "name": "first_token", "ph": "i", "s": "t", "pid": 1, "tid": tid,
+                    "ts": us(span.first_token_ns),
+                })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+    
+    def write_chrome_trace(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
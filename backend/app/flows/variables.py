@@ -0,0 +1,76 @@
+from typing import Any, Dict, Optional, Tuple
+import uuid
+import logging
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache, SingleFlight
+from app.core.config import settings
+from app.core.metrics import register_cache
+from app.core.security import decrypt_values
+from app.db.database import AsyncSessionLocal
+from app.models.models import Variable
+
+logger = logging.getLogger(__name__)
+
+# Later scopes override earlier ones when names collide
+SCOPE_PRECEDENCE = {"global": 0, "user": 1, "project": 2}
+
+# Plaintext variables by (user_id, project_id); kept short-lived since they hold secrets
+_cache = TTLCache(maxsize=settings.VARIABLE_CACHE_SIZE, ttl=settings.VARIABLE_CACHE_TTL)
+_inflight = SingleFlight()
+_generations: Dict[str, int] = {}
+register_cache("variables", _cache)
+
+
+def _as_uuid(value: Any) -> uuid.UUID:
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+
+async def resolve_variables(user_id: Any, project_id: Optional[Any] = None) -> Dict[str, str]:
+    """Return a user's variables (plus the project's, if given) as name -> plaintext value"""
+    key: Tuple[str, Optional[str]] = (str(user_id), str(project_id) if project_id else None)
+    variables = _cache.get(key)
+    if variables is not None:
+        return variables
+    
+    async def load() -> Dict[str, str]:
+        generation = _generations.get(key[0], 0)
+        # Its own session: the load is shared, so it may outlive the request that started it
+        async with AsyncSessionLocal() as db:
+            loaded = await _load_variables(db, user_id, project_id)
+        # An invalidation while we were loading means the rows may be stale
+        if _generations.get(key[0], 0) == generation:
+            _cache.set(key, loaded)
+        return loaded
+    
+    return await _inflight.do(key, load)
+
+
+async def _load_variables(db: AsyncSession, user_id: Any, project_id: Optional[Any]) -> Dict[str, str]:
+    """Fetch all visible variables in one query and decrypt them in one pass"""
+    query = select(
+        Variable.name, Variable.value, Variable.is_encrypted, Variable.scope, Variable.project_id
+    ).where(Variable.user_id == _as_uuid(user_id))
+    if project_id:
+        query = query.where(or_(Variable.project_id.is_(None), Variable.project_id == _as_uuid(project_id)))
+    else:
+        query = query.where(Variable.project_id.is_(None))
+    
+    rows = (await db.execute(query)).all()
+    rows.sort(key=lambda row: SCOPE_PRECEDENCE.get(row.scope, 0) + (3 if row.project_id else 0))
+    
+    encrypted = [i for i, row in enumerate(rows) if row.is_encrypted]
+    values = [row.value for row in rows]
+    for i, plaintext in zip(encrypted, decrypt_values([values[i] for i in encrypted])):
+        values[i] = plaintext
+    
+    logger.debug(f"Loaded {len(rows)} variables for user {user_id}")
+    return {row.name: value for row, value in zip(rows, values)}
+
+
+def invalidate_variables(user_id: Any) -> None:
+    """Forget cached variables of a user after any create, update or delete"""
+    user_key = str(user_id)
+    _generations[user_key] = _generations.get(user_key, 0) + 1
+    _cache.invalidate_where(lambda key: key[0] == user_key)
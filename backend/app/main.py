@@ -1,12 +1,26 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 
 from app.core.config import settings
 from app.api import auth, flows, components, projects, variables, websocket
-from app.db.database import engine, Base
+from app.db.database import engine, Base, upgrade_schema
+from app.components.pool import close_component_pool
+from app.core.http import close_http_client
+from app.core.hashing import close_password_hasher
+from app.flows.autosave import close_autosave_buffer
+from app.flows.offload import close_offloader
+from app.memory import close_memory_store
+from app.core import metrics
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
 
 
 @asynccontextmanager
@@ -14,8 +28,15 @@ async def lifespan(app: FastAPI):
     # Startup
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
     yield
     # Shutdown
+    await close_autosave_buffer()
+    await close_component_pool()
+    await close_http_client()
+    await close_memory_store()
+    close_password_hasher()
+    close_offloader()
     await engine.dispose()
 
 
@@ -34,6 +55,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses such as flow documents
+if settings.RESPONSE_COMPRESSION:
+    if BrotliMiddleware is not None:
+        app.add_middleware(
+            BrotliMiddleware,
+            minimum_size=settings.COMPRESSION_MIN_SIZE,
+            quality=settings.COMPRESSION_LEVEL,
+            gzip_fallback=True,
+        )
+    else:
+        app.add_middleware(
+            GZipMiddleware,
+            minimum_size=settings.COMPRESSION_MIN_SIZE,
+            compresslevel=settings.COMPRESSION_LEVEL,
+        )
+
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(flows.router, prefix="/api/v1/flows", tags=["flows"])
@@ -42,12 +79,20 @@ app.include_router(projects.router, prefix="/api/v1/projects", tags=["projects"]
 app.include_router(variables.router, prefix="/api/v1/variables", tags=["variables"])
 app.include_router(websocket.router, prefix="/ws", tags=["websocket"])
 
+metrics.register_db_pool(engine.sync_engine.pool)
+
 # Health check
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "version": settings.APP_VERSION}
 
 
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
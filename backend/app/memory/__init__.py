@@ -0,0 +1,3 @@
+from .store import SessionMemoryStore, get_memory_store, close_memory_store, session_key
+
+__all__ = ["SessionMemoryStore", "get_memory_store", "close_memory_store", "session_key"]
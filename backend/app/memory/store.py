@@ -0,0 +1,286 @@
+from typing import Any, Callable, Deque, Dict, List, Optional
+from collections import OrderedDict, deque
+import asyncio
+import json
+import logging
+import time
+import weakref
+import aiosqlite
+
+from app.core.config import settings
+from app.core.prompt_budget import count_tokens
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chat_messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    metadata TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (session_id, seq)
+)
+"""
+
+# The next seq is taken inside the INSERT, so workers sharing the file cannot collide
+INSERT_MESSAGE = """
+INSERT INTO chat_messages (session_id, seq, role, content, metadata, created_at)
+SELECT ?, COALESCE(MAX(seq) + 1, 0), ?, ?, ?, ? FROM chat_messages WHERE session_id = ?
+RETURNING seq
+"""
+
+
+def session_key(user_id: Optional[Any], session_id: str) -> str:
+    """Storage key of a session; a session id is only meaningful within one user's sessions"""
+    return f"{user_id or ''}:{session_id}"
+
+
+class _HotSession:
+    """Most recent messages of one session, kept in memory"""
+    
+    def __init__(self, maxlen: int, next_seq: int):
+        self.messages: Deque[Dict[str, Any]] = deque(maxlen=maxlen)
+        self.next_seq = next_seq
+    
+    @property
+    def complete(self) -> bool:
+        """True when the cache holds the session's whole history"""
+        return not self.messages or self.messages[0]["seq"] == 0
+
+
+class SessionMemoryStore:
+    """Append-only conversation log with a bounded in-memory hot tier over SQLite"""
+    
+    def __init__(
+        self,
+        db_path: str,
+        hot_sessions: int = 1024,
+        hot_messages: int = 50,
+        token_counter: Callable[[str], int] = count_tokens
+    ):
+        self.db_path = db_path
+        self.hot_sessions = hot_sessions
+        self.hot_messages = hot_messages
+        self.token_counter = token_counter
+        self._hot: "OrderedDict[str, _HotSession]" = OrderedDict()
+        self._db: Optional[aiosqlite.Connection] = None
+        self._connect_lock = asyncio.Lock()
+        # The connection is shared, so a commit must not land while another cursor is open
+        self._db_lock = asyncio.Lock()
+        # One lock per session, dropped once nobody holds or waits on it
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+    
+    def _lock(self, session_id: str) -> asyncio.Lock:
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = self._locks[session_id] = asyncio.Lock()
+        return lock
+    
+    async def _connection(self) -> aiosqlite.Connection:
+        if self._db is None:
+            async with self._connect_lock:
+                if self._db is None:
+                    db = await aiosqlite.connect(self.db_path)
+                    await db.execute("PRAGMA journal_mode=WAL")
+                    await db.execute("PRAGMA synchronous=NORMAL")
+                    await db.execute("PRAGMA busy_timeout=5000")  # Other workers may be writing
+                    await db.execute(SCHEMA)
+                    await db.commit()
+                    self._db = db
+        return self._db
+    
+    async def _hot_session(self, session_id: str) -> _HotSession:
+        """Return the hot entry for a session, warming it from SQLite on a miss"""
+        hot = self._hot.get(session_id)
+        if hot is not None:
+            self._hot.move_to_end(session_id)
+            return hot
+        
+        db = await self._connection()
+        async with self._db_lock, db.execute(
+            "SELECT seq, role, content, metadata, created_at FROM chat_messages "
+            "WHERE session_id = ? ORDER BY seq DESC LIMIT ?",
+            (session_id, self.hot_messages),
+        ) as cursor:
+            rows = await cursor.fetchall()
+        
+        hot = _HotSession(self.hot_messages, rows[0][0] + 1 if rows else 0)
+        hot.messages.extend(self._row_to_message(row) for row in reversed(rows))
+        
+        self._hot[session_id] = hot
+        while len(self._hot) > self.hot_sessions:
+            self._hot.popitem(last=False)
+        return hot
+    
+    async def append(
+        self,
+        session_id: str,
+        role: str,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Append a message to the session log"""
+        async with self._lock(session_id):
+            hot = await self._hot_session(session_id)
+            message = {
+                "seq": None,
+                "role": role,
+                "content": content,
+                "metadata": metadata or {},
+                "created_at": time.time(),
+            }
+            db = await self._connection()
+            async with self._db_lock:
+                async with db.execute(
+                    INSERT_MESSAGE,
+                    (session_id, role, content, json.dumps(message["metadata"]), message["created_at"], session_id),
+                ) as cursor:
+                    message["seq"] = (await cursor.fetchone())[0]
+                await db.commit()
+            if message["seq"] == hot.next_seq:
+                hot.messages.append(message)
+                hot.next_seq += 1
+            elif self._hot.get(session_id) is hot:
+                # Another worker appended meanwhile; reload from the database on next use
+                del self._hot[session_id]
+        return message
+    
+    async def get_history(
+        self,
+        session_id: str,
+        token_budget: Optional[int] = None,
+        mode: str = "window",
+        summary_ratio: float = 0.25
+    ) -> List[Dict[str, Any]]:
+        """Return the most recent messages that fit in token_budget, oldest first.
+        
+        In "summary" mode, part of the budget is used for a condensed system
+        message covering the older turns that did not fit.
+        """
+        if mode not in ("window", "summary"):
+            raise ValueError(f"Unknown history mode: {mode}")
+        
+        async with self._lock(session_id):
+            hot = await self._hot_session(session_id)
+            candidates = list(hot.messages)
+            complete = hot.complete
+        
+        budget = token_budget if token_budget is not None else float("inf")
+        window_budget = budget * (1 - summary_ratio) if mode == "summary" else budget
+        
+        window: List[Dict[str, Any]] = []
+        used = 0
+        overflow = False
+        while True:
+            for message in reversed(candidates):
+                tokens = self.token_counter(message["content"])
+                if used + tokens > window_budget:
+                    overflow = True
+                    break
+                window.append(message)
+                used += tokens
+            if overflow or complete or not candidates:
+                break
+            # The hot tier is exhausted but the budget is not: page in older turns
+            candidates, complete = await self._load_before(session_id, candidates[0]["seq"])
+        window.reverse()
+        
+        if mode == "summary" and overflow:
+            oldest_kept = window[0]["seq"] if window else None
+            summary = await self._summarize(session_id, oldest_kept, budget - used)
+            if summary:
+                window.insert(0, summary)
+        
+        return window
+    
+    async def _load_before(self, session_id: str, seq: int, limit: Optional[int] = None) -> tuple:
+        """Load a page of messages older than seq, returning (messages, reached_start)"""
+        limit = limit or self.hot_messages
+        db = await self._connection()
+        async with self._db_lock, db.execute(
+            "SELECT seq, role, content, metadata, created_at FROM chat_messages "
+            "WHERE session_id = ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+            (session_id, seq, limit),
+        ) as cursor:
+            rows = await cursor.fetchall()
+        messages = [self._row_to_message(row) for row in reversed(rows)]
+        return messages, not messages or messages[0]["seq"] == 0
+    
+    async def _summarize(self, session_id: str, before_seq: Optional[int], budget: float) -> Optional[Dict[str, Any]]:
+        """Build an extractive summary of turns older than before_seq within budget"""
+        if before_seq is None:
+            async with self._lock(session_id):
+                before_seq = (await self._hot_session(session_id)).next_seq
+        older, _ = await self._load_before(session_id, before_seq, limit=self.hot_messages)
+        
+        lines: List[str] = []
+        used = self.token_counter("Summary of earlier conversation:")
+        for message in reversed(older):
+            first_sentence = message["content"].strip().split("\n")[0].split(". ")[0][:200]
+            line = f"- {message['role']}: {first_sentence}"
+            tokens = self.token_counter(line)
+            if used + tokens > budget:
+                break
+            lines.append(line)
+            used += tokens
+        
+        if not lines:
+            return None
+        lines.reverse()
+        return {
+            "seq": None,
+            "role": "system",
+            "content": "Summary of earlier conversation:\n" + "\n".join(lines),
+            "metadata": {"summary": True},
+            "created_at": None,
+        }
+    
+    async def clear(self, session_id: str) -> None:
+        """Delete a session's history"""
+        async with self._lock(session_id):
+            db = await self._connection()
+            async with self._db_lock:
+                await db.execute("DELETE FROM chat_messages WHERE session_id = ?", (session_id,))
+                await db.commit()
+            self._hot.pop(session_id, None)
+    
+    async def close(self) -> None:
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+        self._hot.clear()
+    
+    @staticmethod
+    def _row_to_message(row: tuple) -> Dict[str, Any]:
+        seq, role, content, metadata, created_at = row
+        return {
+            "seq": seq,
+            "role": role,
+            "content": content,
+            "metadata": json.loads(metadata) if metadata else {},
+            "created_at": created_at,
+        }
+
+
+_store: Optional[SessionMemoryStore] = None
+
+
+def get_memory_store() -> SessionMemoryStore:
+    """Return the process-wide session memory store"""
+    global _store
+    if _store is None:
+        _store = SessionMemoryStore(
+            settings.MEMORY_DB_PATH,
+            hot_sessions=settings.MEMORY_HOT_SESSIONS,
+            hot_messages=settings.MEMORY_HOT_MESSAGES,
+        )
+    return _store
+
+
+async def close_memory_store() -> None:
+    global _store
+    if _store is not None:
+        await _store.close()
+        _store = None
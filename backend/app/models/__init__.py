@@ -1,4 +1,3 @@
-from .models import User, Flow, Project
-from .variable import Variable
+from .models import User, Flow, FlowVersion, Project, Variable
 
-__all__ = ["User", "Flow", "Project", "Variable"]
\ No newline at end of file
+__all__ = ["User", "Flow", "FlowVersion", "Project", "Variable"]
\ No newline at end of file
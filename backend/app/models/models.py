@@ -1,12 +1,19 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Boolean, JSON, Integer
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Boolean, JSON, Integer, Index, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from datetime import datetime, timezone
 import uuid
 
 from app.db.database import Base
 
 
+def utcnow() -> datetime:
+    # Set from Python so every row carries the same microsecond-precision
+    # format; keyset pagination compares these values directly
+    return datetime.now(timezone.utc)
+
+
 class User(Base):
     __tablename__ = "users"
     
@@ -54,12 +61,34 @@ class Flow(Base):
     is_component = Column(Boolean, default=False)  # For custom components
     version = Column(Integer, default=1)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), default=utcnow, onupdate=utcnow, server_default=func.now())
     
     # Relationships
     user = relationship("User", back_populates="flows")
     project = relationship("Project", back_populates="flows")
     executions = relationship("FlowExecution", back_populates="flow", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Serves the paginated flow list, newest first
+        Index("ix_flows_user_project_updated", "user_id", "project_id", "updated_at"),
+    )
+
+
+class FlowVersion(Base):
+    __tablename__ = "flow_versions"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    flow_id = Column(UUID(as_uuid=True), ForeignKey("flows.id"), nullable=False)
+    version = Column(Integer, nullable=False)
+    kind = Column(String(16), nullable=False)  # snapshot, delta
+    base_version = Column(Integer)  # Version a delta applies to
+    payload = Column(LargeBinary, nullable=False)  # zlib-compressed JSON graph or JSON Patch
+    size = Column(Integer, nullable=False)  # Compressed payload bytes
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_flow_versions_flow_version", "flow_id", "version", unique=True),
+    )
 
 
 class FlowExecution(Base):
@@ -96,6 +125,11 @@ class Variable(Base):
     # Relationships
     user = relationship("User", back_populates="variables")
     project = relationship("Project", back_populates="variables")
+    
+    __table_args__ = (
+        # Covers the per-user name uniqueness check and the resolver's lookup
+        Index("ix_variables_user_scope_project_name", "user_id", "scope", "project_id", "name"),
+    )
 
 
 class APIKey(Base):
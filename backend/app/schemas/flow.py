@@ -1,4 +1,4 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Literal
 from pydantic import BaseModel, Field
 from datetime import datetime
 import uuid
@@ -32,6 +32,63 @@ class FlowResponse(FlowBase):
         from_attributes = True
 
 
+class FlowSummary(BaseModel):
+    """Flow metadata without the graph, for list views"""
+    id: uuid.UUID
+    name: str
+    description: Optional[str] = None
+    user_id: uuid.UUID
+    project_id: Optional[uuid.UUID]
+    is_component: Optional[bool] = None
+    version: int
+    created_at: datetime
+    updated_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
+
+
+class FlowPage(BaseModel):
+    items: List[FlowSummary]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= to get the next page
+
+
+class FlowVersionInfo(BaseModel):
+    version: int
+    kind: Literal["snapshot", "delta"]
+    size: int  # Stored bytes
+    created_at: Optional[datetime]
+
+
+class FlowVersionResponse(BaseModel):
+    id: uuid.UUID
+    version: int
+    data: Dict[str, Any]
+
+
+class JsonPatchOperation(BaseModel):
+    """One RFC 6902 operation against the flow graph"""
+    op: Literal["add", "remove", "replace", "move", "copy", "test"]
+    path: str
+    value: Optional[Any] = None
+    from_: Optional[str] = Field(None, alias="from")
+
+
+class FlowPatchRequest(BaseModel):
+    base_version: int  # Version the operations were made against
+    operations: List[JsonPatchOperation]
+
+
+class FlowPatchResponse(BaseModel):
+    id: uuid.UUID
+    version: int
+    saved: bool  # False while the change is still buffered for autosave
+
+
 class FlowExecuteRequest(BaseModel):
     inputs: Dict[str, Any] = Field(default_factory=dict)
     context: Dict[str, Any] = Field(default_factory=dict)
+    version: Optional[int] = None  # Run this saved version instead of the latest graph
+    trace: bool = False  # Include per-node timing spans in the response
+    trace_format: Literal["json", "otel", "chrome"] = "json"
+    outputs: Optional[List[str]] = None  # "node_id" or "node_id.port"; only their ancestors run
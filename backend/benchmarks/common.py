@@ -0,0 +1,90 @@
+"""
+Shared helpers for benchmark runners: percentiles, result files and comparisons
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+from datetime import datetime, timezone
+from pathlib import Path
+import json
+import math
+import platform
+import subprocess
+import sys
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0-100)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+def latency_summary(samples_s: Sequence[float]) -> Dict[str, float]:
+    """p50/p90/p99/mean/max in milliseconds"""
+    return {
+        "p50_ms": round(percentile(samples_s, 50) * 1000, 3),
+        "p90_ms": round(percentile(samples_s, 90) * 1000, 3),
+        "p99_ms": round(percentile(samples_s, 99) * 1000, 3),
+        "mean_ms": round(sum(samples_s) / len(samples_s) * 1000, 3) if samples_s else 0.0,
+        "max_ms": round(max(samples_s) * 1000, 3) if samples_s else 0.0,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata(suite: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "suite": suite,
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "options": options,
+    }
+
+
+def write_results(suite: str, meta: Dict[str, Any], results: List[Dict[str, Any]], output: Optional[str]) -> Path:
+    """Write results as JSON, by default to benchmarks/results/<suite>-<commit>-<time>.json"""
+    if output:
+        path = Path(output)
+    else:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = RESULTS_DIR / f"{suite}-{meta.get('commit') or 'nogit'}-{stamp}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"meta": meta, "results": results}, indent=2))
+    return path
+
+
+def compare(baseline_path: str, results: List[Dict[str, Any]], key_fields: Sequence[str], metrics: Sequence[str]) -> None:
+    """Print the relative change of each metric against a previous result file"""
+    baseline = json.loads(Path(baseline_path).read_text())
+    base_by_key = {tuple(r.get(k) for k in key_fields): r for r in baseline["results"]}
+    print(f"\nComparison against {baseline_path} (commit {baseline['meta'].get('commit')}):")
+    for result in results:
+        key = tuple(result.get(k) for k in key_fields)
+        base = base_by_key.get(key)
+        if base is None:
+            continue
+        changes = []
+        for metric in metrics:
+            old, new = base.get(metric), result.get(metric)
+            if old and new is not None:
+                changes.append(f"{metric} {(new - old) / old * 100:+.1f}%")
+        print(f"  {' / '.join(str(k) for k in key)}: {', '.join(changes)}")
+
+
+def print_table(results: List[Dict[str, Any]], columns: Sequence[str]) -> None:
+    widths = [max(len(c), *(len(str(r.get(c, ""))) for r in results)) for c in columns]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for result in results:
+        print("  ".join(str(result.get(c, "")).ljust(w) for c, w in zip(columns, widths)))
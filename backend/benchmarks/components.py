@@ -0,0 +1,95 @@
+"""
+Stub components for benchmarking the flow engine without real providers
+"""
+
+from typing import Any, Dict
+import asyncio
+import random
+
+from app.components.base import BaseComponent, ComponentSchema, PortSchema, DataType
+
+
+def _schema(name: str, inputs: list, outputs: list) -> ComponentSchema:
+    return ComponentSchema(
+        name=name,
+        display_name=name,
+        description=f"Benchmark stub: {name}",
+        category="Benchmark",
+        icon="Gauge",
+        inputs=[PortSchema(name=port, display_name=port, type=DataType.ANY, required=False) for port in inputs],
+        outputs=[PortSchema(name=port, display_name=port, type=DataType.ANY) for port in outputs],
+    )
+
+
+def injected_latency(mean: float, sigma: float = 0.5) -> float:
+    """Log-normal latency with the given mean, like real provider response times"""
+    if mean <= 0:
+        return 0.0
+    return random.lognormvariate(0, sigma) * mean / (2.718281828 ** (sigma ** 2 / 2))
+
+
+class PassthroughComponent(BaseComponent):
+    """Copies its input to its output with no I/O"""
+    
+    build_inputs = ()
+    
+    def get_schema(self) -> ComponentSchema:
+        return _schema("bench_passthrough", ["value"], ["value"])
+    
+    async def build(self) -> None:
+        pass
+    
+    async def run(self) -> Dict[str, Any]:
+        return {"value": self.get_input("value")}
+
+
+class FakeLLMComponent(BaseComponent):
+    """Sleeps like an LLM call and reports token usage"""
+    
+    build_inputs = ()
+    latency = 0.05  # Mean seconds per call, overridden by the runner
+    
+    def get_schema(self) -> ComponentSchema:
+        return _schema("bench_llm", ["prompt", "context"], ["response", "usage"])
+    
+    async def build(self) -> None:
+        pass
+    
+    async def run(self) -> Dict[str, Any]:
+        await asyncio.sleep(injected_latency(self.latency))
+        prompt = str(self.get_input("prompt") or "")
+        return {
+            "response": f"answer to: {prompt[:64]}",
+            "usage": {"prompt_tokens": len(prompt) // 4 + 1, "completion_tokens": 32, "total_tokens": len(prompt) // 4 + 33},
+        }
+
+
+class FakeVectorStoreComponent(BaseComponent):
+    """Sleeps like a vector search and returns fake documents"""
+    
+    build_inputs = ()
+    latency = 0.01
+    n_results = 5
+    
+    def get_schema(self) -> ComponentSchema:
+        return _schema("bench_vectorstore", ["query"], ["results"])
+    
+    async def build(self) -> None:
+        pass
+    
+    async def run(self) -> Dict[str, Any]:
+        await asyncio.sleep(injected_latency(self.latency))
+        query = str(self.get_input("query") or "")
+        return {
+            "results": [
+                {"id": f"doc_{i}", "document": f"document {i} about {query[:32]}", "distance": i / 10}
+                for i in range(self.n_results)
+            ]
+        }
+
+
+BENCHMARK_COMPONENTS = {
+    "bench_passthrough": PassthroughComponent,
+    "bench_llm": FakeLLMComponent,
+    "bench_vectorstore": FakeVectorStoreComponent,
+}
@@ -0,0 +1,128 @@
+"""
+Flow engine benchmark.
+
+Runs FlowExecutor over synthetic flows (chains, fan-outs, diamonds, layered
+DAGs; 10 to 10k nodes) built from stub components with injected provider
+latency, and reports throughput, latency percentiles and peak memory.
+
+    python -m benchmarks.flow_engine
+    python -m benchmarks.flow_engine --shapes chain,dag --sizes 100,1000 --mix rag
+    python -m benchmarks.flow_engine --compare benchmarks/results/<previous>.json
+"""
+
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import logging
+import time
+import tracemalloc
+
+from app.core.config import settings
+from app.flows.executor import FlowExecutor
+from benchmarks.common import compare, latency_summary, metadata, print_table, write_results
+from benchmarks.components import BENCHMARK_COMPONENTS, FakeLLMComponent, FakeVectorStoreComponent
+from benchmarks.flows import MIXES, SHAPES, generate
+
+KEY_FIELDS = ("shape", "mix", "nodes")
+COMPARED_METRICS = ("runs_per_s", "p50_ms", "p99_ms", "peak_memory_kb")
+
+
+async def run_flow(flow: Dict[str, Any]) -> float:
+    executor = FlowExecutor(flow, {"flow_id": "benchmark"}, components=BENCHMARK_COMPONENTS)
+    started = time.perf_counter()
+    await executor.execute()
+    return time.perf_counter() - started
+
+
+async def measure_peak_memory(flow: Dict[str, Any]) -> int:
+    """Peak Python heap allocated during one run (measured separately: tracemalloc is slow)"""
+    tracemalloc.start()
+    try:
+        await run_flow(flow)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+async def run_scenario(shape: str, size: int, mix: str, runs: int, concurrency: int, warmup: int) -> Dict[str, Any]:
+    flow, nodes = generate(shape, size, mix)
+    
+    for _ in range(warmup):
+        await run_flow(flow)
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def limited() -> float:
+        async with semaphore:
+            return await run_flow(flow)
+    
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(limited() for _ in range(runs)))
+    elapsed = time.perf_counter() - started
+    
+    peak_memory = await measure_peak_memory(flow)
+    
+    return {
+        "shape": shape,
+        "mix": mix,
+        "nodes": nodes,
+        "edges": len(flow["edges"]),
+        "runs": runs,
+        "concurrency": concurrency,
+        "runs_per_s": round(runs / elapsed, 3),
+        "nodes_per_s": round(runs * nodes / elapsed, 1),
+        **latency_summary(latencies),
+        "peak_memory_kb": round(peak_memory / 1024, 1),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    FakeLLMComponent.latency = args.llm_latency
+    FakeVectorStoreComponent.latency = args.vector_latency
+    # Generated leaves are identical; merged, they would measure one node instead of n
+    settings.FLOW_MERGE_DUPLICATES = args.merge_duplicates
+    
+    results: List[Dict[str, Any]] = []
+    for shape in args.shapes.split(","):
+        for size in (int(s) for s in args.sizes.split(",")):
+            # Keep large flows from dominating wall time
+            runs = max(args.min_runs, min(args.runs, args.node_budget // size))
+            result = await run_scenario(shape, size, args.mix, runs, args.concurrency, args.warmup)
+            results.append(result)
+            print(
+                f"{shape:8} {result['nodes']:>6} nodes  {result['runs_per_s']:>9} runs/s  "
+                f"p50 {result['p50_ms']:>9} ms  p99 {result['p99_ms']:>9} ms  "
+                f"peak {result['peak_memory_kb']:>9} KiB"
+            )
+    
+    print()
+    print_table(results, ("shape", "mix", "nodes", "runs", "runs_per_s", "nodes_per_s", "p50_ms", "p99_ms", "peak_memory_kb"))
+    
+    path = write_results("flow_engine", metadata("flow_engine", vars(args)), results, args.output)
+    print(f"\nResults written to {path}")
+    
+    if args.compare:
+        compare(args.compare, results, KEY_FIELDS, COMPARED_METRICS)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shapes", default=",".join(SHAPES), help="Comma-separated flow shapes")
+    parser.add_argument("--sizes", default="10,100,1000,10000", help="Comma-separated node counts")
+    parser.add_argument("--mix", default="passthrough", choices=list(MIXES), help="Component mix")
+    parser.add_argument("--runs", type=int, default=50, help="Measured runs per scenario")
+    parser.add_argument("--min-runs", type=int, default=3, help="Lower bound on runs for large flows")
+    parser.add_argument("--node-budget", type=int, default=50000, help="Cap runs so runs*nodes stays under this")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured runs per scenario")
+    parser.add_argument("--concurrency", type=int, default=1, help="Flow runs in flight at once")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Mean fake LLM latency (s)")
+    parser.add_argument("--vector-latency", type=float, default=0.01, help="Mean fake vector search latency (s)")
+    parser.add_argument("--merge-duplicates", action="store_true", help="Let the executor merge identical nodes")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/...)")
+    parser.add_argument("--compare", help="Previous result file to compare against")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main(parse_args()))
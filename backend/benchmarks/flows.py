@@ -0,0 +1,105 @@
+"""
+Synthetic flow generators of different shapes
+"""
+
+from typing import Any, Dict, List, Tuple
+import random
+
+PORTS = {
+    "bench_passthrough": ("value", "value"),
+    "bench_llm": ("prompt", "response"),
+    "bench_vectorstore": ("query", "results"),
+}
+
+
+def _node(node_id: str, node_type: str, value: Any = None) -> Dict[str, Any]:
+    data = {}
+    if value is not None:
+        data["inputs"] = {PORTS[node_type][0]: value}
+    return {"id": node_id, "type": node_type, "data": data, "position": {"x": 0, "y": 0}}
+
+
+def _edge(source: Dict[str, Any], target: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": f"{source['id']}->{target['id']}",
+        "source": source["id"],
+        "target": target["id"],
+        "sourceHandle": PORTS[source["type"]][1],
+        "targetHandle": PORTS[target["type"]][0],
+    }
+
+
+def _pick_type(rng: random.Random, mix: Dict[str, float]) -> str:
+    return rng.choices(list(mix), weights=list(mix.values()))[0]
+
+
+def chain(n: int, mix: Dict[str, float], seed: int = 0) -> Dict[str, Any]:
+    """n nodes in a single line: maximal depth, no parallelism"""
+    rng = random.Random(seed)
+    nodes = [_node("n0", "bench_passthrough", "input")]
+    nodes += [_node(f"n{i}", _pick_type(rng, mix)) for i in range(1, n)]
+    edges = [_edge(a, b) for a, b in zip(nodes, nodes[1:])]
+    return {"nodes": nodes, "edges": edges}
+
+
+def fanout(n: int, mix: Dict[str, float], seed: int = 0) -> Dict[str, Any]:
+    """One root feeding n-1 independent leaves: maximal width"""
+    rng = random.Random(seed)
+    root = _node("n0", "bench_passthrough", "input")
+    leaves = [_node(f"n{i}", _pick_type(rng, mix)) for i in range(1, n)]
+    return {"nodes": [root] + leaves, "edges": [_edge(root, leaf) for leaf in leaves]}
+
+
+def diamond(n: int, mix: Dict[str, float], seed: int = 0, width: int = 8) -> Dict[str, Any]:
+    """Stacked diamonds: split into `width` branches, join, repeat"""
+    rng = random.Random(seed)
+    nodes = [_node("n0", "bench_passthrough", "input")]
+    edges: List[Dict[str, Any]] = []
+    join = nodes[0]
+    while len(nodes) < n:
+        branch_count = min(width, max(1, n - len(nodes) - 1))
+        branches = [_node(f"n{len(nodes) + i}", _pick_type(rng, mix)) for i in range(branch_count)]
+        nodes += branches
+        edges += [_edge(join, branch) for branch in branches]
+        if len(nodes) >= n:
+            break
+        new_join = _node(f"n{len(nodes)}", "bench_passthrough")
+        nodes.append(new_join)
+        edges += [_edge(branch, new_join) for branch in branches]
+        join = new_join
+    return {"nodes": nodes, "edges": edges}
+
+
+def layered_dag(n: int, mix: Dict[str, float], seed: int = 0, width: int = 16) -> Dict[str, Any]:
+    """Random DAG in layers; every node depends on 1-3 nodes of the previous layer"""
+    rng = random.Random(seed)
+    nodes = [_node("n0", "bench_passthrough", "input")]
+    edges: List[Dict[str, Any]] = []
+    previous = [nodes[0]]
+    while len(nodes) < n:
+        layer = [_node(f"n{len(nodes) + i}", _pick_type(rng, mix)) for i in range(min(width, n - len(nodes)))]
+        for node in layer:
+            for source in rng.sample(previous, min(len(previous), rng.randint(1, 3))):
+                edges.append(_edge(source, node))
+        nodes += layer
+        previous = layer
+    return {"nodes": nodes, "edges": edges}
+
+
+SHAPES = {
+    "chain": chain,
+    "fanout": fanout,
+    "diamond": diamond,
+    "dag": layered_dag,
+}
+
+# Component mixes: pure engine overhead vs. provider-bound RAG-like flows
+MIXES: Dict[str, Dict[str, float]] = {
+    "passthrough": {"bench_passthrough": 1.0},
+    "rag": {"bench_passthrough": 0.5, "bench_vectorstore": 0.3, "bench_llm": 0.2},
+}
+
+
+def generate(shape: str, n: int, mix: str, seed: int = 0) -> Tuple[Dict[str, Any], int]:
+    flow = SHAPES[shape](n, MIXES[mix], seed=seed)
+    return flow, len(flow["nodes"])
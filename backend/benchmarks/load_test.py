@@ -0,0 +1,313 @@
+"""
+In-process load test for the HTTP and WebSocket APIs.
+
+Drives app.main:app through the ASGI interface (no network, no server
+process) against a throwaway SQLite database with authentication stubbed out,
+replaying a weighted mix of flow CRUD, /run and WebSocket calls at a target
+request rate. Reports per-operation latency percentiles, error rates and
+event-loop lag.
+
+    python -m benchmarks.load_test --rps 200 --duration 30
+    python -m benchmarks.load_test --mix list=1,get=5,run=2,websocket=1
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from collections import defaultdict
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+import uuid
+
+import httpx
+
+# Must be configured before the app (and its engine) is imported
+_DB_DIR = tempfile.mkdtemp(prefix="loadtest-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_DIR}/loadtest.db"
+os.environ.setdefault("MEMORY_DB_PATH", f"{_DB_DIR}/memory.db")
+os.environ.setdefault("DEBUG", "false")
+
+from app.main import app  # noqa: E402
+from app.api.auth import get_current_user  # noqa: E402
+from app.db.database import AsyncSessionLocal, Base, engine  # noqa: E402
+from app.flows.executor import FlowExecutor  # noqa: E402
+from app.models.models import User  # noqa: E402
+from benchmarks.common import compare, latency_summary, metadata, print_table, write_results  # noqa: E402
+from benchmarks.components import BENCHMARK_COMPONENTS  # noqa: E402
+from benchmarks.flows import generate  # noqa: E402
+
+DEFAULT_MIX = "list=3,get=5,create=1,update=2,run=2,websocket=1"
+KEY_FIELDS = ("operation",)
+COMPARED_METRICS = ("p50_ms", "p99_ms", "error_rate")
+
+
+class ASGIWebSocket:
+    """Minimal in-process WebSocket client speaking the ASGI protocol"""
+    
+    def __init__(self, app, path: str):
+        self.app = app
+        self.path = path
+        self._to_app: asyncio.Queue = asyncio.Queue()
+        self._from_app: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+    
+    async def __aenter__(self) -> "ASGIWebSocket":
+        scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": self.path,
+            "raw_path": self.path.encode(),
+            "query_string": b"",
+            "headers": [],
+            "client": ("127.0.0.1", 0),
+            "server": ("testserver", 80),
+            "subprotocols": [],
+        }
+        self._task = asyncio.create_task(self.app(scope, self._to_app.get, self._from_app.put))
+        await self._to_app.put({"type": "websocket.connect"})
+        message = await self._from_app.get()
+        if message["type"] != "websocket.accept":
+            raise ConnectionError(f"WebSocket rejected: {message}")
+        return self
+    
+    async def send_json(self, data: Dict[str, Any]) -> None:
+        await self._to_app.put({"type": "websocket.receive", "text": json.dumps(data)})
+    
+    async def receive_json(self) -> Dict[str, Any]:
+        message = await self._from_app.get()
+        if message["type"] != "websocket.send":
+            raise ConnectionError(f"Unexpected message: {message}")
+        return json.loads(message.get("text") or message.get("bytes"))
+    
+    async def __aexit__(self, *exc) -> None:
+        await self._to_app.put({"type": "websocket.disconnect", "code": 1000})
+        try:
+            await asyncio.wait_for(self._task, timeout=5)
+        except (asyncio.TimeoutError, Exception):
+            self._task.cancel()
+
+
+class EventLoopLagMonitor:
+    """Measures how late the loop wakes a task that sleeps for a fixed interval"""
+    
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+    
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - started - self.interval))
+    
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.client: Optional[httpx.AsyncClient] = None
+        self.flow_ids: List[str] = []
+        self.flow_data = generate("dag", args.flow_nodes, "passthrough")[0]
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.error_samples: Dict[str, str] = {}
+        self.operations: Dict[str, Callable[[], Awaitable[None]]] = {
+            "list": self.list_flows,
+            "get": self.get_flow,
+            "create": self.create_flow,
+            "update": self.update_flow,
+            "run": self.run_flow,
+            "websocket": self.websocket_execute,
+        }
+    
+    async def setup(self) -> None:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        
+        user = User(
+            id=uuid.uuid4(),
+            email="loadtest@example.com",
+            username="loadtest",
+            hashed_password="not-used",
+            is_active=True,
+        )
+        async with AsyncSessionLocal() as session:
+            session.add(user)
+            await session.commit()
+        
+        # Auth is not what we measure here: every request is this user
+        app.dependency_overrides[get_current_user] = lambda: user
+        
+        # /run resolves node types through the executor; use benchmark stubs
+        FlowExecutor.get_component_class = lambda executor, component_type: BENCHMARK_COMPONENTS.get(component_type)
+        
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://testserver", limits=limits, timeout=60
+        )
+        for _ in range(self.args.seed_flows):
+            await self.create_flow()
+        self.latencies.clear()
+    
+    async def teardown(self) -> None:
+        await self.client.aclose()
+        await engine.dispose()
+    
+    async def list_flows(self) -> None:
+        response = await self.client.get("/api/v1/flows/")
+        response.raise_for_status()
+    
+    async def get_flow(self) -> None:
+        response = await self.client.get(f"/api/v1/flows/{random.choice(self.flow_ids)}")
+        response.raise_for_status()
+    
+    async def create_flow(self) -> None:
+        response = await self.client.post(
+            "/api/v1/flows/", json={"name": f"load {len(self.flow_ids)}", "data": self.flow_data}
+        )
+        response.raise_for_status()
+        self.flow_ids.append(response.json()["id"])
+    
+    async def update_flow(self) -> None:
+        response = await self.client.put(
+            f"/api/v1/flows/{random.choice(self.flow_ids)}", json={"data": self.flow_data}
+        )
+        response.raise_for_status()
+    
+    async def run_flow(self) -> None:
+        response = await self.client.post(f"/api/v1/flows/{random.choice(self.flow_ids)}/run", json={})
+        response.raise_for_status()
+    
+    async def websocket_execute(self) -> None:
+        async with ASGIWebSocket(app, f"/ws/flow/{random.choice(self.flow_ids)}") as ws:
+            await ws.send_json({"type": "execute"})
+            await ws.receive_json()
+    
+    async def timed(self, name: str) -> None:
+        started = time.perf_counter()
+        try:
+            await self.operations[name]()
+        except Exception as e:
+            self.errors[name] += 1
+            self.error_samples.setdefault(name, f"{type(e).__name__}: {e}"[:200])
+        finally:
+            self.latencies[name].append(time.perf_counter() - started)
+    
+    async def run(self, mix: Dict[str, float]) -> float:
+        """Open-loop arrivals at the target rate, so slow responses do not slow the load"""
+        names, weights = list(mix), list(mix.values())
+        interval = 1.0 / self.args.rps
+        deadline = time.perf_counter() + self.args.duration
+        in_flight = asyncio.Semaphore(self.args.max_in_flight)
+        tasks = set()
+        
+        async def one(name: str) -> None:
+            async with in_flight:
+                await self.timed(name)
+        
+        started = time.perf_counter()
+        next_at = started
+        while next_at < deadline:
+            task = asyncio.create_task(one(random.choices(names, weights)[0]))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            next_at += interval
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        if tasks:
+            await asyncio.gather(*tasks)
+        return time.perf_counter() - started
+    
+    def report(self, elapsed: float) -> List[Dict[str, Any]]:
+        results = []
+        for name, samples in sorted(self.latencies.items()):
+            results.append({
+                "operation": name,
+                "requests": len(samples),
+                "errors": self.errors[name],
+                "error_rate": round(self.errors[name] / len(samples), 4) if samples else 0.0,
+                **latency_summary(samples),
+            })
+        total = sum(len(s) for s in self.latencies.values())
+        results.append({
+            "operation": "all",
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "error_rate": round(sum(self.errors.values()) / total, 4) if total else 0.0,
+            "achieved_rps": round(total / elapsed, 1),
+            **latency_summary([x for s in self.latencies.values() for x in s]),
+        })
+        return results
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+async def main(args: argparse.Namespace) -> None:
+    mix = parse_mix(args.mix)
+    test = LoadTest(args)
+    unknown = set(mix) - set(test.operations)
+    if unknown:
+        raise SystemExit(f"Unknown operations in mix: {', '.join(sorted(unknown))}")
+    
+    await test.setup()
+    monitor = EventLoopLagMonitor()
+    monitor.start()
+    try:
+        elapsed = await test.run(mix)
+    finally:
+        await monitor.stop()
+        await test.teardown()
+    
+    results = test.report(elapsed)
+    lag = {"operation": "event_loop_lag", "requests": len(monitor.samples), **latency_summary(monitor.samples)}
+    results.append(lag)
+    
+    print_table(results, ("operation", "requests", "errors", "error_rate", "p50_ms", "p90_ms", "p99_ms", "max_ms"))
+    print(f"\nTarget {args.rps} rps, achieved {results[-2]['achieved_rps']} rps over {elapsed:.1f}s")
+    for name, sample in test.error_samples.items():
+        print(f"  first {name} error: {sample}")
+    
+    path = write_results("load_test", metadata("load_test", vars(args)), results, args.output)
+    print(f"Results written to {path}")
+    
+    if args.compare:
+        compare(args.compare, results, KEY_FIELDS, COMPARED_METRICS)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rps", type=float, default=100, help="Target request rate")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds of load")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weighted operations, e.g. list=3,get=5,run=2")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Cap on concurrent requests")
+    parser.add_argument("--seed-flows", type=int, default=50, help="Flows created before the run")
+    parser.add_argument("--flow-nodes", type=int, default=50, help="Nodes per generated flow")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/...)")
+    parser.add_argument("--compare", help="Previous result file to compare against")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main(parse_args()))